@@ -0,0 +1,718 @@
+"""Sharded backfill coordinator: leased date shards on a SQLite work queue.
+
+A multi-year reload is split into shards of BACKFILL_SHARD_DAYS consecutive
+dates (``plan``), kept in a work queue and processed by many workers at once
+(``run``):
+
+* A worker claims one shard at a time under a lease of BACKFILL_LEASE_SECONDS.
+  When a lease expires because its worker crashed or hung, the shard goes back
+  to the queue and another worker claims it. This counts as a failed attempt.
+  A shard that fails BACKFILL_MAX_ATTEMPTS times is set aside as ``failed``
+  until ``retry``.
+* A run that stops at its deadline returns a continuation. The shard shrinks
+  to the remaining dates and start page and goes back on the queue.
+* Progress is logged after every shard and printed by ``status``. It covers
+  shards by state, dates done, rows, Flickr calls and an ETA.
+
+Redoing a shard is safe because every run MERGEs on (Date, Photo ID) and skips
+dates whose load fingerprint has not changed.
+
+There are two kinds of worker:
+
+* ``--url``: each shard is POSTed to the deployed function as a ``Dates`` /
+  ``StartPage`` payload. Every in-flight shard then runs on its own Cloud
+  Function instance.
+* ``--local``: workers call main.process_dates in-process.
+
+The queue is a SQLite file. Several coordinator processes on one host can
+share it, and a restarted coordinator carries on where the last one stopped.
+
+All workers share one Flickr quota per API key (FLICKR_HOURLY_QUOTA):
+
+* ``--url`` workers run in separate function instances, each with a limiter
+  of its own. Every shard is therefore sent with ``QuotaPerHour`` set to the
+  quota divided by the number of workers, which the instance enforces without
+  bursts. In addition, a worker reserves a shard's expected calls on a
+  coordinator-wide TokenBucket before dispatching it, and settles the
+  difference with the calls it reported afterwards (TokenBucket.debit).
+* ``--local`` workers share the process-wide limiter every Flickr call in this
+  process draws from, so they need no extra pacing.
+
+Extra workers therefore raise throughput until the quota is reached, and no
+further.
+
+Usage:
+    python backfill_coordinator.py plan --start 2015-01-01 --end 2025-12-31
+    python backfill_coordinator.py run --url https://<function-url> --workers 16
+    python backfill_coordinator.py run --local --workers 2
+    python backfill_coordinator.py status
+    python backfill_coordinator.py retry
+
+Environment variables (optional):
+    BACKFILL_DB             – Queue database path (default backfill.db).
+    BACKFILL_SHARD_DAYS     – Dates per shard (default 7).
+    BACKFILL_WORKERS        – Concurrent workers for ``run`` (default 4).
+    BACKFILL_LEASE_SECONDS  – Lease length; must exceed the function timeout
+                              for --url workers (default 600).
+    BACKFILL_MAX_ATTEMPTS   – Failed attempts before a shard is set aside
+                              (default 3).
+    BACKFILL_ID_TOKEN       – Identity token sent to --url, e.g. the output of
+                              ``gcloud auth print-identity-token``.
+"""
+
+import argparse
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from flickr_ratelimit import FLICKR_HOURLY_QUOTA, FLICKR_RATE_BURST, TokenBucket
+
+BACKFILL_DB = os.getenv("BACKFILL_DB", "backfill.db")
+BACKFILL_SHARD_DAYS = int(os.getenv("BACKFILL_SHARD_DAYS", "7"))
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "4"))
+BACKFILL_LEASE_SECONDS = int(os.getenv("BACKFILL_LEASE_SECONDS", "600"))
+BACKFILL_MAX_ATTEMPTS = int(os.getenv("BACKFILL_MAX_ATTEMPTS", "3"))
+RETRY_DELAY_SECONDS = 30  # Back-off before a failed shard is retried, per attempt
+IDLE_POLL_SECONDS = 5  # Longest sleep of a worker waiting for claimable shards
+DATE_FORMAT = "%Y-%m-%d"
+
+SHARD_STATES = ("pending", "leased", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shards (
+    shard_id      INTEGER PRIMARY KEY,
+    first_date    TEXT NOT NULL,
+    last_date     TEXT NOT NULL,
+    date_count    INTEGER NOT NULL,
+    dates         TEXT NOT NULL,    -- JSON list of the dates still to process
+    start_page    INTEGER NOT NULL DEFAULT 1,
+    status        TEXT NOT NULL DEFAULT 'pending',
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    lease_owner   TEXT,
+    lease_expires REAL,
+    not_before    REAL NOT NULL DEFAULT 0,
+    rows          INTEGER NOT NULL DEFAULT 0,
+    calls         INTEGER NOT NULL DEFAULT 0,
+    error         TEXT,
+    updated_at    REAL
+);
+CREATE INDEX IF NOT EXISTS shards_status ON shards (status, shard_id);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class Shard(NamedTuple):
+    """A claimed shard: the dates left to process and where to start."""
+
+    shard_id: int
+    dates: tuple
+    start_page: int
+    attempts: int
+
+
+def split_window(start: str, end: str, shard_days: int = BACKFILL_SHARD_DAYS,
+                 skip=()) -> list:
+    """Split an inclusive date window into shards of consecutive dates.
+
+    Args:
+        start:      First date (YYYY-MM-DD).
+        end:        Last date (YYYY-MM-DD).
+        shard_days: Maximum dates per shard.
+        skip:       Dates to leave out; shards never span them.
+
+    Returns:
+        List of shards, each a list of date strings.
+
+    Raises:
+        ValueError: If end is before start or shard_days is not positive.
+    """
+    start_dt = datetime.strptime(start, DATE_FORMAT)
+    end_dt = datetime.strptime(end, DATE_FORMAT)
+    if end_dt < start_dt:
+        raise ValueError("end cannot be before start.")
+    if shard_days < 1:
+        raise ValueError("shard_days must be at least 1.")
+
+    skip = set(skip)
+    shards, current = [], []
+    for offset in range((end_dt - start_dt).days + 1):
+        date = (start_dt + timedelta(days=offset)).strftime(DATE_FORMAT)
+        if date in skip:
+            if current:
+                shards.append(current)
+            current = []
+            continue
+        current.append(date)
+        if len(current) == shard_days:
+            shards.append(current)
+            current = []
+    if current:
+        shards.append(current)
+    return shards
+
+
+class ShardQueue:
+    """Work queue of date shards with leases, stored in SQLite.
+
+    Every state change runs in an immediate transaction, so threads sharing an
+    instance and processes sharing the database file never claim the same
+    shard twice.
+    """
+
+    def __init__(self, path: str = BACKFILL_DB,
+                 max_attempts: int = BACKFILL_MAX_ATTEMPTS, clock=time.time):
+        """
+        Args:
+            path:         SQLite database file, or ":memory:" for a queue
+                          used within one process (the CLI needs a file).
+            max_attempts: Failed attempts after which a shard is set aside.
+            clock:        Wall-clock time function; leases are compared across
+                          processes, so this must not be a monotonic clock.
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+    def plan(self, start: str, end: str, shard_days: int = BACKFILL_SHARD_DAYS) -> int:
+        """Queue shards for every date of a window not already in a shard.
+
+        Planning an overlapping or identical window again only adds the
+        dates that are new.
+
+        Args:
+            start:      First date (YYYY-MM-DD).
+            end:        Last date (YYYY-MM-DD).
+            shard_days: Maximum dates per shard.
+
+        Returns:
+            Number of shards added.
+        """
+        now = self._clock()
+        with self._transaction() as conn:
+            covered = set()
+            for row in conn.execute(
+                "SELECT first_date, last_date FROM shards "
+                "WHERE last_date >= ? AND first_date <= ?",
+                (start, end),
+            ):
+                covered.update(split_window(row["first_date"], row["last_date"], 1 << 30)[0])
+            shards = split_window(start, end, shard_days, skip=covered)
+            conn.executemany(
+                "INSERT INTO shards (first_date, last_date, date_count, dates, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(dates[0], dates[-1], len(dates), json.dumps(dates), now) for dates in shards],
+            )
+        logger.info(
+            "Planned %d shard(s) with %d date(s) for %s to %s.",
+            len(shards), sum(len(dates) for dates in shards), start, end,
+        )
+        return len(shards)
+
+    def claim(self, worker_id: str, lease_seconds: float = BACKFILL_LEASE_SECONDS):
+        """Lease the next claimable shard to a worker.
+
+        Leases that have expired are returned to the queue first, as failed
+        attempts.
+
+        Args:
+            worker_id:     Identifier of the claiming worker.
+            lease_seconds: How long the shard stays reserved for the worker.
+
+        Returns:
+            The claimed Shard, or None if no shard can be claimed right now.
+        """
+        now = self._clock()
+        with self._transaction() as conn:
+            expired = conn.execute(
+                "UPDATE shards SET "
+                "  status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END, "
+                "  attempts = attempts + 1, "
+                "  error = 'lease of ' || lease_owner || ' expired', "
+                "  lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE status = 'leased' AND lease_expires <= ?",
+                (self.max_attempts, now, now),
+            ).rowcount
+            if expired:
+                logger.warning("%d shard lease(s) expired; requeued.", expired)
+
+            row = conn.execute(
+                "SELECT shard_id, dates, start_page, attempts FROM shards "
+                "WHERE status = 'pending' AND not_before <= ? "
+                "ORDER BY shard_id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE shards SET status = 'leased', lease_owner = ?, "
+                "lease_expires = ?, updated_at = ? WHERE shard_id = ?",
+                (worker_id, now + lease_seconds, now, row["shard_id"]),
+            )
+        return Shard(
+            row["shard_id"], tuple(json.loads(row["dates"])), row["start_page"], row["attempts"]
+        )
+
+    def renew(self, shard: Shard, worker_id: str,
+              lease_seconds: float = BACKFILL_LEASE_SECONDS) -> bool:
+        """Extend a worker's lease on a shard to lease_seconds from now.
+
+        Args:
+            shard:         Shard returned by claim.
+            worker_id:     Worker holding the lease.
+            lease_seconds: New remaining lease length.
+
+        Returns:
+            False if the worker no longer held the lease.
+        """
+        now = self._clock()
+        with self._transaction() as conn:
+            return bool(conn.execute(
+                "UPDATE shards SET lease_expires = ?, updated_at = ? "
+                "WHERE shard_id = ? AND status = 'leased' AND lease_owner = ? "
+                "AND lease_expires > ?",
+                (now + lease_seconds, now, shard.shard_id, worker_id, now),
+            ).rowcount)
+
+    def _finish(self, shard: Shard, worker_id: str, assignments: str, values: tuple) -> bool:
+        with self._transaction() as conn:
+            updated = conn.execute(
+                f"UPDATE shards SET {assignments}, lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? "
+                "WHERE shard_id = ? AND status = 'leased' AND lease_owner = ?",
+                values + (self._clock(), shard.shard_id, worker_id),
+            ).rowcount
+        if not updated:
+            logger.warning(
+                "Shard %d: lease of %s was lost; the result is not recorded.",
+                shard.shard_id, worker_id,
+            )
+        return bool(updated)
+
+    def complete(self, shard: Shard, worker_id: str, rows: int = 0, calls: int = 0) -> bool:
+        """Mark a leased shard as done.
+
+        Args:
+            shard:     Shard returned by claim.
+            worker_id: Worker holding the lease.
+            rows:      Rows the run loaded.
+            calls:     Flickr requests the run made.
+
+        Returns:
+            False if the worker no longer held the lease.
+        """
+        return self._finish(
+            shard, worker_id,
+            "status = 'done', dates = '[]', rows = rows + ?, calls = calls + ?, error = NULL",
+            (rows, calls),
+        )
+
+    def release(self, shard: Shard, worker_id: str, dates: list, start_page: int,
+                rows: int = 0, calls: int = 0) -> bool:
+        """Requeue the unfinished part of a leased shard (from a continuation).
+
+        Args:
+            shard:      Shard returned by claim.
+            worker_id:  Worker holding the lease.
+            dates:      Dates still to process.
+            start_page: Page to resume dates[0] at.
+            rows:       Rows the run loaded.
+            calls:      Flickr requests the run made.
+
+        Returns:
+            False if the worker no longer held the lease.
+        """
+        return self._finish(
+            shard, worker_id,
+            "status = 'pending', dates = ?, start_page = ?, "
+            "rows = rows + ?, calls = calls + ?",
+            (json.dumps(list(dates)), start_page, rows, calls),
+        )
+
+    def fail(self, shard: Shard, worker_id: str, error: str) -> bool:
+        """Record a failed attempt; the shard is retried after a back-off.
+
+        Args:
+            shard:     Shard returned by claim.
+            worker_id: Worker holding the lease.
+            error:     Description of the failure.
+
+        Returns:
+            False if the worker no longer held the lease.
+        """
+        attempts = shard.attempts + 1
+        return self._finish(
+            shard, worker_id,
+            "status = ?, attempts = ?, error = ?, not_before = ?",
+            (
+                "failed" if attempts >= self.max_attempts else "pending",
+                attempts,
+                error,
+                self._clock() + RETRY_DELAY_SECONDS * attempts,
+            ),
+        )
+
+    def retry_failed(self) -> int:
+        """Return every failed shard to the queue with its attempts reset.
+
+        Returns:
+            Number of shards requeued.
+        """
+        with self._transaction() as conn:
+            return conn.execute(
+                "UPDATE shards SET status = 'pending', attempts = 0, not_before = 0 "
+                "WHERE status = 'failed'"
+            ).rowcount
+
+    def next_wake(self):
+        """Return when a shard may next become claimable.
+
+        Returns:
+            Earliest retry time of a pending shard or lease expiry of a leased
+            one (seconds since the epoch), or None if every shard is done or
+            failed.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(CASE WHEN status = 'pending' THEN not_before "
+                "ELSE lease_expires END) AS wake "
+                "FROM shards WHERE status IN ('pending', 'leased')"
+            ).fetchone()
+        return row["wake"]
+
+    def progress(self) -> dict:
+        """Return a snapshot of the backfill's progress.
+
+        Returns:
+            Dict with shard counts per state ("shards"), "dates_total",
+            "dates_done" (dates of done shards plus those already processed
+            in requeued ones), "rows", "calls" and the "failed" shards with
+            their last error.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT shard_id, first_date, last_date, status, date_count, "
+                "dates, rows, calls, error FROM shards"
+            ).fetchall()
+        shards = dict.fromkeys(SHARD_STATES, 0)
+        dates_done = 0
+        for row in rows:
+            shards[row["status"]] += 1
+            if row["status"] != "failed":
+                dates_done += row["date_count"] - len(json.loads(row["dates"]))
+        return {
+            "shards": shards,
+            "dates_total": sum(row["date_count"] for row in rows),
+            "dates_done": dates_done,
+            "rows": sum(row["rows"] for row in rows),
+            "calls": sum(row["calls"] for row in rows),
+            "failed": [
+                {
+                    "shard_id": row["shard_id"],
+                    "dates": f"{row['first_date']} to {row['last_date']}",
+                    "error": row["error"],
+                }
+                for row in rows if row["status"] == "failed"
+            ],
+        }
+
+
+# ---------------------------------------------------------------------------
+# Workers
+# ---------------------------------------------------------------------------
+
+def local_processor(lease_seconds: float = BACKFILL_LEASE_SECONDS, **options):
+    """Return a shard processor that runs main.process_dates in-process.
+
+    Each run gets a deadline that leaves main.RUN_RESERVE_SECONDS of the lease
+    for staging and the MERGE, so it returns a continuation rather than
+    outliving its lease.
+
+    Args:
+        lease_seconds: Lease length the shards are claimed with.
+        **options:     Extra keyword arguments for main.process_dates
+                       (load_mode, min_views, force).
+    """
+    import main
+    from flickr_api import Deadline
+
+    if lease_seconds <= main.RUN_RESERVE_SECONDS:
+        raise ValueError(
+            f"lease_seconds must exceed RUN_RESERVE_SECONDS ({main.RUN_RESERVE_SECONDS})."
+        )
+
+    def process(shard: Shard) -> dict:
+        return main.process_dates(
+            list(shard.dates),
+            start_page=shard.start_page,
+            deadline=Deadline(lease_seconds - main.RUN_RESERVE_SECONDS),
+            **options,
+        )
+
+    return process
+
+
+def http_processor(url: str, token: str = None,
+                   timeout: float = BACKFILL_LEASE_SECONDS,
+                   quota_per_hour: float = None, **payload):
+    """Return a shard processor that POSTs each shard to the deployed function.
+
+    Args:
+        url:            HTTPS endpoint of the function.
+        token:          Identity token for the Authorization header, if
+                        required.
+        timeout:        Seconds to wait for the response; keep it within the
+                        lease.
+        quota_per_hour: Flickr requests per hour each instance may make (its
+                        share of the quota), sent as `QuotaPerHour`.
+        **payload:      Extra payload fields (e.g. Force, MinViews, LoadMode).
+
+    Raises (from the returned processor):
+        urllib.error.URLError: If the request fails or returns an HTTP error.
+    """
+    if quota_per_hour is not None:
+        payload["QuotaPerHour"] = quota_per_hour
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
+    def process(shard: Shard) -> dict:
+        body = dict(payload, Dates=list(shard.dates), StartPage=shard.start_page,
+                    ReturnMetrics=True)
+        request = urllib.request.Request(
+            url, data=json.dumps(body).encode("utf-8"), headers=headers, method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+
+    return process
+
+
+def run_workers(queue: ShardQueue, process, workers: int = BACKFILL_WORKERS,
+                lease_seconds: float = BACKFILL_LEASE_SECONDS,
+                limiter: TokenBucket = None) -> dict:
+    """Process the queue with concurrent workers until no shard is left.
+
+    Each worker loops: claim a shard, reserve its expected Flickr calls on
+    the limiter (renewing the lease after any wait), process it, then record
+    the outcome (done, continuation or failure) and settle the reservation
+    with the calls the shard reported. The expected calls per date are the
+    average of the shards done so far (at least one). Workers exit once every
+    shard is done or failed.
+
+    Args:
+        queue:         ShardQueue to work through.
+        process:       Callable taking a Shard and returning a dict with an
+                       optional "continuation" and "metrics" (a
+                       process_dates result or the function's JSON body).
+        workers:       Number of concurrent workers.
+        lease_seconds: Lease length per claim.
+        limiter:       TokenBucket shared by the workers, for processors
+                       whose calls bypass this process's limiter (see
+                       http_processor); None = no pacing here.
+
+    Returns:
+        The queue's final progress().
+    """
+    started = time.monotonic()
+    baseline = queue.progress()["dates_done"]
+    prefix = f"{socket.gethostname()}-{os.getpid()}"
+
+    def work(worker_id: str) -> None:
+        while True:
+            shard = queue.claim(worker_id, lease_seconds)
+            if shard is None:
+                wake = queue.next_wake()
+                if wake is None:
+                    return
+                time.sleep(min(max(wake - time.time(), 0.1), IDLE_POLL_SECONDS))
+                continue
+
+            reserved = 0
+            if limiter is not None:
+                reserved = expected_calls(queue.progress(), len(shard.dates))
+                waited = limiter.acquire(tokens=reserved)
+                if waited and not queue.renew(shard, worker_id, lease_seconds):
+                    # The lease ran out while waiting; another worker has it.
+                    limiter.debit(-reserved)
+                    continue
+
+            logger.info(
+                "%s: shard %d, %d date(s) from %s (page %d, attempt %d).",
+                worker_id, shard.shard_id, len(shard.dates), shard.dates[0],
+                shard.start_page, shard.attempts + 1,
+            )
+            try:
+                outcome = process(shard)
+            except Exception as exc:  # noqa: BLE001 - any failure is retried
+                logger.warning("%s: shard %d failed: %s", worker_id, shard.shard_id, exc)
+                queue.fail(shard, worker_id, f"{type(exc).__name__}: {exc}")
+                continue
+
+            metrics = outcome.get("metrics") or {}
+            calls = metrics.get("flickr", {}).get("attempts", 0)
+            rows = metrics.get("rows", 0)
+            if limiter is not None:
+                limiter.debit(calls - reserved)
+            continuation = outcome.get("continuation")
+            if continuation:
+                queue.release(
+                    shard, worker_id, continuation["Dates"],
+                    continuation.get("StartPage", 1), rows, calls,
+                )
+            else:
+                queue.complete(shard, worker_id, rows, calls)
+            logger.info(
+                "%s: %s | %s", worker_id, outcome.get("message"),
+                format_progress(queue.progress(), time.monotonic() - started, baseline),
+            )
+
+    threads = [
+        threading.Thread(target=work, args=(f"{prefix}-{index}",), daemon=True)
+        for index in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return queue.progress()
+
+
+def expected_calls(progress: dict, date_count: int) -> int:
+    """Estimate the Flickr calls of a shard from the shards done so far.
+
+    Args:
+        progress:   ShardQueue.progress() snapshot.
+        date_count: Dates in the shard.
+
+    Returns:
+        Average calls per date done times date_count, at least one per date.
+    """
+    per_date = progress["calls"] / progress["dates_done"] if progress["dates_done"] else 1
+    return max(date_count, round(per_date * date_count))
+
+
+def format_progress(progress: dict, elapsed: float, baseline: int = 0) -> str:
+    """Return a one-line summary of progress() with a throughput-based ETA.
+
+    Args:
+        progress: ShardQueue.progress() snapshot.
+        elapsed:  Seconds since this coordinator started.
+        baseline: dates_done when it started.
+    """
+    shards = progress["shards"]
+    total = progress["dates_total"]
+    done = progress["dates_done"]
+    line = (
+        f"{shards['done']}/{sum(shards.values())} shards done, "
+        f"{shards['leased']} leased, {shards['failed']} failed; "
+        f"{done}/{total} dates ({done / total:.1%}), "
+        f"{progress['rows']} rows, {progress['calls']} Flickr calls"
+        if total else "no shards planned"
+    )
+    rate = (done - baseline) / elapsed if elapsed > 0 else 0
+    if rate > 0 and done < total:
+        line += f"; ETA {timedelta(seconds=round((total - done) / rate))}"
+    return line
+
+
+# ---------------------------------------------------------------------------
+# Command line
+# ---------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=BACKFILL_DB, help="Queue database path.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan = commands.add_parser("plan", help="Queue shards for a date window.")
+    plan.add_argument("--start", required=True, help="First date (YYYY-MM-DD).")
+    plan.add_argument("--end", required=True, help="Last date (YYYY-MM-DD).")
+    plan.add_argument("--shard-days", type=int, default=BACKFILL_SHARD_DAYS)
+
+    run = commands.add_parser("run", help="Work through the queue.")
+    target = run.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="Deployed function endpoint to POST shards to.")
+    target.add_argument("--local", action="store_true",
+                        help="Run main.process_dates in this process.")
+    run.add_argument("--token", default=os.getenv("BACKFILL_ID_TOKEN"),
+                     help="Identity token for --url.")
+    run.add_argument("--workers", type=int, default=BACKFILL_WORKERS)
+    run.add_argument("--lease-seconds", type=int, default=BACKFILL_LEASE_SECONDS)
+    run.add_argument("--force", action="store_true",
+                     help="Reload dates even if their fingerprints match.")
+    run.add_argument("--min-views", type=int, default=None)
+
+    commands.add_parser("status", help="Print progress as JSON.")
+    commands.add_parser("retry", help="Requeue failed shards.")
+
+    args = parser.parse_args()
+    if args.db == ":memory:":
+        parser.error("--db must be a file: plan, run and status share the queue.")
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    queue = ShardQueue(args.db)
+    try:
+        if args.command == "plan":
+            queue.plan(args.start, args.end, args.shard_days)
+            print(format_progress(queue.progress(), 0))
+        elif args.command == "status":
+            print(json.dumps(queue.progress(), indent=2))
+        elif args.command == "retry":
+            print(f"Requeued {queue.retry_failed()} failed shard(s).")
+        else:
+            options = {"force": args.force}
+            if args.min_views is not None:
+                options["min_views"] = args.min_views
+            limiter = None
+            if args.local:
+                process = local_processor(args.lease_seconds, **options)
+            else:
+                payload = {"Force": args.force}
+                if args.min_views is not None:
+                    payload["MinViews"] = args.min_views
+                process = http_processor(
+                    args.url, args.token, timeout=args.lease_seconds,
+                    quota_per_hour=FLICKR_HOURLY_QUOTA / args.workers, **payload
+                )
+                limiter = TokenBucket(FLICKR_HOURLY_QUOTA / 3600.0, FLICKR_RATE_BURST)
+            final = run_workers(
+                queue, process, args.workers, args.lease_seconds, limiter
+            )
+            print(format_progress(final, 0))
+    finally:
+        queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Benchmark: history_store queries vs. re-reading a TSV export.
+
+Builds a synthetic multi-year history (``--days`` dates with ``--photos``
+popular photos each) twice – as a HistoryStore Parquet dataset and as the
+single TSV file flickrGetDailyPhotoViews.py writes – then times typical
+questions against both:
+
+* top 20 photos by views over the last year,
+* 30-day rolling views of one photo over the last 90 days,
+* the 20 biggest day-over-day increases on the latest date.
+
+The TSV baseline re-reads the whole export with the csv module each time, as
+the notebooks did.
+
+Usage:
+    python benchmarks/bench_history.py [--days 1095] [--photos 2000]
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flickr_export import EXPORT_COLUMNS, TSV_DELIMITER  # noqa: E402
+from history_store import HistoryStore  # noqa: E402
+
+
+def synthetic_days(days: int, photos: int):
+    """Yield (date, rows) for consecutive dates with a drifting popular set."""
+    rng = random.Random(42)
+    first = date.today() - timedelta(days=days)
+    catalogue = photos * 3
+    for offset in range(days):
+        current = (first + timedelta(days=offset)).isoformat()
+        popular = rng.sample(range(catalogue), photos)
+        yield current, [
+            (current, 50000000000 + photo, f"Photo {photo}",
+             rng.randint(1, 500), rng.randint(0, 5), f"{photo:010x}", str(65535 - photo % 1000))
+            for photo in popular
+        ]
+
+
+def tsv_rows(path: str):
+    with open(path, newline="", encoding="utf-8") as tsv_file:
+        reader = csv.reader(tsv_file, delimiter=TSV_DELIMITER)
+        next(reader)
+        yield from reader
+
+
+def tsv_top(path, start, n=20):
+    totals = defaultdict(int)
+    for row in tsv_rows(path):
+        if row[0] >= start:
+            totals[row[1]] += int(row[3])
+    return sorted(totals.items(), key=lambda item: -item[1])[:n]
+
+
+def tsv_rolling(path, photo_id, start, window=30):
+    views = {}
+    for row in tsv_rows(path):
+        if row[1] == photo_id:
+            views[row[0]] = int(row[3])
+    result = []
+    for current in sorted(day for day in views if day >= start):
+        day = date.fromisoformat(current)
+        result.append(sum(views.get((day - timedelta(days=back)).isoformat(), 0)
+                          for back in range(window)))
+    return result
+
+
+def tsv_deltas(path, latest, n=20):
+    previous_day = (date.fromisoformat(latest) - timedelta(days=1)).isoformat()
+    today, previous = {}, {}
+    for row in tsv_rows(path):
+        if row[0] == latest:
+            today[row[1]] = int(row[3])
+        elif row[0] == previous_day:
+            previous[row[1]] = int(row[3])
+    deltas = {photo: views - previous.get(photo, 0) for photo, views in today.items()}
+    return sorted(deltas.items(), key=lambda item: -item[1])[:n]
+
+
+def timed(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main_benchmark(days: int, photos: int) -> None:
+    with tempfile.TemporaryDirectory() as workdir:
+        store = HistoryStore(os.path.join(workdir, "history"))
+        tsv_path = os.path.join(workdir, "export.csv")
+
+        started = time.perf_counter()
+        with open(tsv_path, "w", newline="", encoding="utf-8") as tsv_file:
+            writer = csv.writer(tsv_file, delimiter=TSV_DELIMITER)
+            writer.writerow(EXPORT_COLUMNS)
+            for current, rows in synthetic_days(days, photos):
+                store.write_date(current, rows)
+                writer.writerows(rows)
+        dates = store.stored_dates()
+        print(f"{len(dates)} dates x {photos} photos written in "
+              f"{time.perf_counter() - started:.1f}s")
+
+        latest = dates[-1]
+        year_ago = dates[max(0, len(dates) - 365)]
+        quarter_ago = dates[max(0, len(dates) - 90)]
+        photo_id = store.top_photos(1, year_ago)["Photo ID"][0].as_py()
+
+        cases = (
+            ("top 20, last year",
+             lambda: store.top_photos(20, year_ago),
+             lambda: tsv_top(tsv_path, year_ago)),
+            ("rolling 30d, 1 photo",
+             lambda: store.rolling_views(30, quarter_ago, photo_ids=[photo_id]),
+             lambda: tsv_rolling(tsv_path, str(photo_id), quarter_ago)),
+            ("day-over-day top 20",
+             lambda: store.day_over_day(latest, latest, n=20),
+             lambda: tsv_deltas(tsv_path, latest)),
+        )
+
+        print(f"{'query':<24} {'parquet ms':>11} {'tsv ms':>10}")
+        for name, parquet_query, tsv_query in cases:
+            print(f"{name:<24} {timed(parquet_query):>11.1f} {timed(tsv_query, 1):>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=1095)
+    parser.add_argument("--photos", type=int, default=2000)
+    args = parser.parse_args()
+    main_benchmark(args.days, args.photos)
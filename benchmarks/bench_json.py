@@ -0,0 +1,117 @@
+"""Micro-benchmark: flickrapi parsed-json vs. the raw-JSON response path.
+
+Encodes synthetic stats.getPopularPhotos pages (benchmarks/fake_flickr.py,
+500 photos each by default, like a real FLICKR_PAGE_SIZE page) to bytes and
+measures the CPU time to turn each body into PhotoStat records:
+
+* ``flickrapi parsed-json`` – what a format="parsed-json" client does: decode
+  the bytes to str, json.loads, then main.build_rows.
+* ``raw + json``            – flickr_api.parse_json_response without orjson.
+* ``raw + orjson``          – flickr_api.parse_json_response with orjson (used
+  when it is installed and FLICKR_RAW_JSON=1).
+
+Before timing, check_fallback verifies that parse_json_response without
+orjson yields the same rows as flickrapi and still raises FlickrError for
+error responses; it runs whether or not orjson is installed.
+
+Usage:
+    python benchmarks/bench_json.py [--pages 200] [--per-page 500] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import flickr_api  # noqa: E402
+import main  # noqa: E402
+from fake_flickr import build_page  # noqa: E402
+from flickrapi.core import FlickrAPI  # noqa: E402
+from flickrapi.exceptions import FlickrError  # noqa: E402
+
+DATE = "2024-01-01"
+
+
+def parsed_json_path(body: bytes) -> list:
+    return main.build_rows(DATE, FlickrAPI.parse_json(None, body))
+
+
+def raw_path(body: bytes) -> list:
+    return main.build_rows(DATE, flickr_api.parse_json_response(body))
+
+
+def check_fallback(body: bytes) -> None:
+    """Check the stdlib-json path of parse_json_response against flickrapi."""
+    orjson = flickr_api.orjson
+    flickr_api.orjson = None
+    try:
+        assert raw_path(body) == parsed_json_path(body)
+        error = b'{"stat":"fail","code":105,"message":"Rate Limit Exceeded"}'
+        try:
+            flickr_api.parse_json_response(error)
+        except FlickrError as exc:
+            assert exc.code == 105
+        else:
+            raise AssertionError("error response did not raise FlickrError")
+    finally:
+        flickr_api.orjson = orjson
+    print("Fallback without orjson: OK")
+
+
+def measure(convert, bodies: list, repeat: int) -> float:
+    """Return the best CPU seconds to convert every body, over repeat runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        for body in bodies:
+            convert(body)
+        best = min(best, time.process_time() - started)
+    return best
+
+
+def main_benchmark(pages: int, per_page: int, repeat: int) -> None:
+    photo_count = pages * per_page
+    bodies = [
+        json.dumps(build_page(DATE, page, per_page, photo_count)).encode("utf-8")
+        for page in range(1, pages + 1)
+    ]
+    assert parsed_json_path(bodies[0]) == raw_path(bodies[0])
+    check_fallback(bodies[0])
+
+    orjson = flickr_api.orjson
+    cases = [("flickrapi parsed-json", parsed_json_path, None)]
+    cases.append(("raw + json", raw_path, None))
+    if orjson is not None:
+        cases.append(("raw + orjson", raw_path, orjson))
+    else:
+        print("orjson is not installed; skipping the orjson case.")
+
+    megabytes = sum(len(body) for body in bodies) / 1e6
+    print(f"{pages} pages x {per_page} photos ({megabytes:.1f} MB), best of {repeat}")
+    print(f"{'path':<24} {'cpu s':>8} {'ms/page':>8} {'rows/s':>10} {'speedup':>8}")
+    baseline = None
+    try:
+        for name, convert, decoder in cases:
+            flickr_api.orjson = decoder
+            seconds = measure(convert, bodies, repeat)
+            baseline = baseline or seconds
+            print(
+                f"{name:<24} {seconds:>8.3f} {seconds / pages * 1000:>8.2f} "
+                f"{photo_count / seconds:>10.0f} {baseline / seconds:>7.2f}x"
+            )
+    finally:
+        flickr_api.orjson = orjson
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--per-page", type=int, default=main.FLICKR_PAGE_SIZE)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main_benchmark(args.pages, args.per_page, args.repeat)
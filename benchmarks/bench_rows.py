@@ -0,0 +1,150 @@
+"""Micro-benchmark: per-row dicts with prebuilt URLs vs. PhotoStat records.
+
+Builds a large synthetic stats.getPopularPhotos response shaped like
+examples/response.json and compares the previous row builder (a 9-key dict
+per photo with both URL strings formatted up front) against
+main.build_rows, which returns compact PhotoStat tuples and defers URL
+construction to serialisation.
+
+Reports parse time and memory retained per row (via tracemalloc), plus the
+cost of serialising each representation to NDJSON.
+
+Usage:
+    python benchmarks/bench_rows.py [--photos 100000] [--repeat 3]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+DATE = "2024-01-01"
+# URL templates the legacy rows carried (the flickrstats_daily view builds
+# the same URLs now).
+PHOTO_URL_TEMPLATE = "https://www.flickr.com/photos/{owner}/{photo_id}"
+THUMBNAIL_URL_TEMPLATE = (
+    "https://live.staticflickr.com/{server}/{photo_id}_{secret}_q.jpg"
+)
+
+
+def synthetic_response(photo_count: int) -> dict:
+    """Return a single-page response with photo_count photos."""
+    return {
+        "photos": {
+            "page": 1,
+            "pages": 1,
+            "perpage": photo_count,
+            "total": photo_count,
+            "photo": [
+                {
+                    "id": str(50000000000 + i),
+                    "owner": "33951951@N00",
+                    "secret": f"{i:010x}",
+                    "server": str(65535 - i % 1000),
+                    "farm": 66,
+                    "title": f"Synthetic photo number {i}",
+                    "ispublic": 1,
+                    "isfriend": 0,
+                    "isfamily": 0,
+                    "stats": {
+                        "views": photo_count - i,
+                        "comments": 0,
+                        "favorites": i % 7,
+                        "total_views": 10 * (photo_count - i),
+                        "total_comments": 0,
+                        "total_favorites": i % 11,
+                    },
+                }
+                for i in range(photo_count)
+            ],
+        },
+        "stat": "ok",
+    }
+
+
+def legacy_build_rows(date: str, response: dict) -> list:
+    """Row builder used before PhotoStat: one dict with both URLs per photo."""
+    rows = []
+    for photo in response["photos"]["photo"]:
+        photo_id = photo["id"]
+        owner = photo.get("owner", "")
+        rows.append(
+            {
+                "Date": date,
+                "Photo ID": int(photo_id),
+                "Photo Title": photo["title"],
+                "Daily Views": int(photo["stats"]["views"]),
+                "Daily Favorites": int(photo["stats"]["favorites"]),
+                "Secret": photo["secret"],
+                "Server": int(photo["server"]),
+                "Link": PHOTO_URL_TEMPLATE.format(
+                    owner=owner, photo_id=photo_id
+                ),
+                "thumbnail": THUMBNAIL_URL_TEMPLATE.format(
+                    server=photo["server"],
+                    photo_id=photo_id,
+                    secret=photo["secret"],
+                ),
+            }
+        )
+    return rows
+
+
+def legacy_to_ndjson(rows: list) -> bytes:
+    return "\n".join(
+        json.dumps(row, ensure_ascii=False, separators=(",", ":")) for row in rows
+    ).encode("utf-8")
+
+
+def measure(builder, response: dict, repeat: int):
+    """Return (best build seconds, retained bytes, rows) for a builder."""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        rows = builder(DATE, response)
+        best = min(best, time.perf_counter() - started)
+        del rows
+
+    gc.collect()
+    tracemalloc.start()
+    rows = builder(DATE, response)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, retained, rows
+
+
+def main_benchmark(photo_count: int, repeat: int) -> None:
+    response = synthetic_response(photo_count)
+    cases = (
+        ("dict rows (legacy)", legacy_build_rows, legacy_to_ndjson),
+        ("PhotoStat records", main.build_rows, main.rows_to_ndjson),
+    )
+
+    print(f"{photo_count} photos, best of {repeat}")
+    print(f"{'representation':<20} {'parse s':>9} {'bytes/row':>10} {'ndjson s':>9}")
+    for name, builder, serialise in cases:
+        seconds, retained, rows = measure(builder, response, repeat)
+        started = time.perf_counter()
+        payload = serialise(rows)
+        ndjson_seconds = time.perf_counter() - started
+        print(
+            f"{name:<20} {seconds:>9.3f} {retained / photo_count:>10.0f} "
+            f"{ndjson_seconds:>9.3f}"
+        )
+        del rows, payload
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--photos", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main_benchmark(args.photos, args.repeat)
@@ -0,0 +1,103 @@
+"""Startup benchmark: import time and time to first request for main.py.
+
+Each measurement runs in a fresh interpreter, mimicking a Cloud Functions cold
+start, and reports:
+
+* ``import main``           – what the runtime pays before it can serve.
+* ``eager imports``         – importing flickrapi and google.cloud.bigquery up
+                              front, i.e. what ``import main`` used to cost.
+* ``first clients``         – import main, then build the Flickr and BigQuery
+                              clients via get_flickr_client / get_bq_client
+                              (the work done by the first request).
+* ``warm clients``          – the same calls again in the same process, as
+                              served by a warm instance.
+
+No network access is needed: dummy Flickr credentials are supplied and
+BigQuery uses anonymous credentials.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPETS = {
+    "import main": """
+import time
+t = time.perf_counter()
+import main
+print(time.perf_counter() - t)
+""",
+    "eager imports": """
+import time
+t = time.perf_counter()
+import flickrapi
+from google.cloud import bigquery
+print(time.perf_counter() - t)
+""",
+    "first clients": """
+import time
+t = time.perf_counter()
+import google.auth
+from google.auth.credentials import AnonymousCredentials
+google.auth.default = lambda *a, **k: (AnonymousCredentials(), "benchmark")
+import main
+main.get_flickr_client()
+main.get_bq_client()
+print(time.perf_counter() - t)
+""",
+    "warm clients": """
+import time
+import google.auth
+from google.auth.credentials import AnonymousCredentials
+google.auth.default = lambda *a, **k: (AnonymousCredentials(), "benchmark")
+import main
+main.get_flickr_client()
+main.get_bq_client()
+t = time.perf_counter()
+main.get_flickr_client()
+main.get_bq_client()
+print(time.perf_counter() - t)
+""",
+}
+
+DUMMY_ENV = {
+    "FLICKR_API_KEY": "benchmark-key",
+    "FLICKR_API_SECRET": "benchmark-secret",
+    "FLICKR_OAUTH_TOKEN": "benchmark-token",
+    "FLICKR_OAUTH_TOKEN_SECRET": "benchmark-token-secret",
+}
+
+
+def run_snippet(code: str) -> float:
+    """Run code in a fresh interpreter and return the seconds it printed."""
+    env = dict(os.environ, **DUMMY_ENV)
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main_benchmark(runs: int) -> None:
+    print(f"median of {runs} fresh interpreters")
+    for name, code in SNIPPETS.items():
+        samples = [run_snippet(code) for _ in range(runs)]
+        print(f"{name:<16} {statistics.median(samples) * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    main_benchmark(args.runs)
@@ -0,0 +1,278 @@
+"""In-process fake of the google.cloud.bigquery.Client methods used by main.py.
+
+``FakeBigQueryClient`` keeps tables as lists of row dicts in memory and
+implements just enough behaviour for benchmarks to drive main_handler and the
+staging helpers end to end:
+
+* ``insert_rows_json`` / ``load_table_from_file`` append rows (NDJSON payloads
+  are parsed, so serialisation cost is real).
+* ``query`` records the SQL. TRUNCATE empties a table, and the fact-table
+  MERGE (``MERGE `target` ... USING `stage` ...``) is applied as an upsert on
+  (Date, Photo ID) that only counts rows whose values changed. MERGEs from a
+  parameter array (``USING UNNEST(@entries)``, the load manifest and photo
+  dimension upserts), ``SELECT ... FROM `table` WHERE Date IN UNNEST(@dates)``
+  and a plain ``SELECT ... FROM `table``` work on in-memory tables. Any other
+  statement is accepted and returns no rows. In a multi-statement job (SQL
+  with a ``;``) only the fact-table MERGE is applied, and it is reported as
+  the job's child by ``list_jobs(parent_job=...)``; the summary tables are not
+  emulated.
+* A ``BEGIN TRANSACTION ... COMMIT TRANSACTION`` block stays open for
+  ``transaction_seconds``. Like BigQuery, the client aborts a transaction
+  that mutates a table another open transaction mutates
+  (``TransactionAborted``).
+* ``create_table`` / ``delete_table`` / ``schema_from_json`` manage the
+  per-run staging tables.
+
+Optional ``latency`` (seconds) is added to every job to emulate round trips.
+"""
+
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+_MERGE_PATTERN = re.compile(r"MERGE\s+`([^`]+)`\s+T\s+USING\s+`([^`]+)`\s+S", re.S)
+_TRUNCATE_PATTERN = re.compile(r"TRUNCATE\s+TABLE\s+`([^`]+)`", re.S)
+_UNNEST_MERGE_PATTERN = re.compile(r"MERGE\s+`([^`]+)`\s+T\s+USING\s+UNNEST\(@(\w+)\)", re.S)
+_INSERT_PATTERN = re.compile(r"INSERT\s*\(([^)]*)\)\s*VALUES\s*\((.*?)\)\s*$", re.S)
+_SELECT_PATTERN = re.compile(r"SELECT\s+(.+?)\s+FROM\s+`([^`]+)`\s+WHERE\s+Date\s+IN\s+UNNEST\(@(\w+)\)", re.S)
+_SELECT_ALL_PATTERN = re.compile(r"SELECT\s+(.+?)\s+FROM\s+`([^`]+)`\s*$", re.S)
+_TRANSACTION_PATTERN = re.compile(r"BEGIN\s+TRANSACTION;(.*?)COMMIT\s+TRANSACTION;", re.S)
+_DML_TARGET_PATTERN = re.compile(r"\b(?:MERGE|INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+`([^`]+)`")
+
+
+class TransactionAborted(Exception):
+    """Raised like BigQuery's error for conflicting concurrent transactions."""
+
+
+def _columns(column_list: str) -> list:
+    """Split a SQL column list, dropping backticks."""
+    return [column.strip().strip("`") for column in column_list.split(",")]
+
+
+def _parameters(job_config) -> dict:
+    """Return a job config's query parameters as {name: python value}."""
+    values = {}
+    for parameter in getattr(job_config, "query_parameters", None) or []:
+        if hasattr(parameter, "values"):  # ArrayQueryParameter
+            values[parameter.name] = [
+                getattr(item, "struct_values", item) for item in parameter.values
+            ]
+        else:
+            values[parameter.name] = parameter.value
+    return values
+
+
+class FakeJob:
+    """Stand-in for LoadJob / QueryJob with the attributes main.py reads."""
+
+    def __init__(self, job_type: str, rows=None, affected: int = 0,
+                 bytes_processed: int = 0, output_rows: int = 0, query: str = None,
+                 children=()):
+        self.job_type = job_type
+        self.query = query
+        self.children = list(children)
+        self.errors = None
+        self.output_rows = output_rows
+        self.num_dml_affected_rows = affected
+        self.total_bytes_processed = bytes_processed
+        self.total_bytes_billed = bytes_processed
+        self.slot_millis = 0
+        self._rows = rows or []
+
+    def result(self, *args, **kwargs):
+        return self._rows
+
+
+class FakeBigQueryClient:
+    """Thread-safe in-memory stand-in for google.cloud.bigquery.Client."""
+
+    def __init__(self, project: str = "benchmark", latency: float = 0.0,
+                 transaction_seconds: float = 0.0):
+        self.project = project
+        self.latency = latency
+        self.transaction_seconds = transaction_seconds
+        self.tables = {}
+        self.queries = []
+        self.load_jobs = 0
+        self.streaming_inserts = 0
+        self._transactions = []  # Tables mutated by each open transaction
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    @staticmethod
+    def _table_id(table) -> str:
+        if isinstance(table, str):
+            return table
+        return f"{table.project}.{table.dataset_id}.{table.table_id}"
+
+    # -- staging ------------------------------------------------------------
+
+    def insert_rows_json(self, table, rows, **kwargs):
+        self._wait()
+        with self._lock:
+            self.tables.setdefault(self._table_id(table), []).extend(rows)
+            self.streaming_inserts += 1
+        return []
+
+    def load_table_from_file(self, file_obj, table, job_config=None, **kwargs):
+        self._wait()
+        rows = [json.loads(line) for line in file_obj.read().splitlines() if line]
+        with self._lock:
+            self.tables.setdefault(self._table_id(table), []).extend(rows)
+            self.load_jobs += 1
+        return FakeJob("load", output_rows=len(rows))
+
+    # -- tables -------------------------------------------------------------
+
+    def schema_from_json(self, path):
+        with open(path) as schema_file:
+            return json.load(schema_file)
+
+    def create_table(self, table, exists_ok=False, **kwargs):
+        with self._lock:
+            self.tables.setdefault(self._table_id(table), [])
+        return table
+
+    def delete_table(self, table, not_found_ok=False, **kwargs):
+        with self._lock:
+            self.tables.pop(self._table_id(table), None)
+
+    # -- queries ------------------------------------------------------------
+
+    def query(self, sql, job_config=None, **kwargs):
+        self._wait()
+        transaction = self._begin_transaction(sql)
+        try:
+            return self._query(sql, job_config)
+        finally:
+            if transaction is not None:
+                with self._lock:
+                    self._transactions.remove(transaction)
+
+    def _begin_transaction(self, sql: str):
+        """Open the script's transaction, if any, and hold it open."""
+        body = _TRANSACTION_PATTERN.search(sql)
+        if body is None:
+            return None
+        tables = set(_DML_TARGET_PATTERN.findall(body.group(1)))
+        with self._lock:
+            for other in self._transactions:
+                if tables & other:
+                    raise TransactionAborted(
+                        "Transaction is aborted due to concurrent update "
+                        f"against table {sorted(tables & other)[0]}."
+                    )
+            self._transactions.append(tables)
+        time.sleep(self.transaction_seconds)
+        return tables
+
+    def _query(self, sql, job_config):
+        with self._lock:
+            self.queries.append(sql)
+
+            truncate = _TRUNCATE_PATTERN.search(sql)
+            if truncate:
+                self.tables[truncate.group(1)] = []
+                return FakeJob("query")
+
+            merge = _MERGE_PATTERN.search(sql)
+            if merge and merge.group(2) in self.tables:
+                job = self._merge(merge.group(1), merge.group(2))
+                if ";" not in sql:
+                    return job
+                job.query = sql[merge.start():]
+                return FakeJob("query", bytes_processed=job.total_bytes_processed,
+                               children=[job])
+
+            parameters = _parameters(job_config)
+            upsert = _UNNEST_MERGE_PATTERN.search(sql)
+            if upsert:
+                return self._merge_entries(
+                    upsert.group(1), parameters[upsert.group(2)], sql
+                )
+
+            select = _SELECT_PATTERN.search(sql)
+            if select:
+                columns = _columns(select.group(1))
+                wanted = {str(value) for value in parameters[select.group(3)]}
+                rows = [
+                    {column: row.get(column) for column in columns}
+                    for row in self.tables.get(select.group(2), [])
+                    if str(row["Date"]) in wanted
+                ]
+                return FakeJob("query", rows=rows)
+
+            select = _SELECT_ALL_PATTERN.search(sql.strip())
+            if select:
+                columns = _columns(select.group(1))
+                rows = [
+                    {column: row.get(column) for column in columns}
+                    for row in self.tables.get(select.group(2), [])
+                ]
+                return FakeJob("query", rows=rows)
+
+        return FakeJob("query")
+
+    def list_jobs(self, parent_job=None, **kwargs):
+        return list(getattr(parent_job, "children", []))
+
+    def _merge_entries(self, target_id: str, entries: list, sql: str) -> FakeJob:
+        """Upsert parameter structs, mapped to columns by the INSERT clause.
+
+        The first column is the key. With ``WHEN MATCHED AND (...)`` only new
+        or changed rows are written and counted.
+        """
+        insert = _INSERT_PATTERN.search(sql.strip())
+        pairs = list(zip(_columns(insert.group(1)), insert.group(2).split(",")))
+        mapping = [
+            (column, value.strip()[2:])
+            for column, value in pairs if value.strip().startswith("S.")
+        ]
+        timestamps = [
+            column for column, value in pairs if "CURRENT_TIMESTAMP" in value
+        ]
+        key = mapping[0][0]
+        table = self.tables.setdefault(target_id, [])
+        index = {str(row[key]): row for row in table}
+        affected = 0
+        conditional = "WHEN MATCHED AND" in sql
+        now = datetime.now(timezone.utc)
+        for entry in entries:
+            row = {column: entry[field] for column, field in mapping}
+            row.update((column, now) for column in timestamps)
+            existing = index.get(str(row[key]))
+            if existing is None:
+                table.append(row)
+                index[str(row[key])] = row
+            elif conditional and all(
+                    existing.get(column) == row[column] for column, _ in mapping):
+                continue
+            else:
+                existing.update(row)
+            affected += 1
+        return FakeJob("query", affected=affected)
+
+    def _merge(self, target_id: str, stage_id: str) -> FakeJob:
+        target = self.tables.setdefault(target_id, [])
+        index = {(row["Date"], row["Photo ID"]): row for row in target}
+        affected = 0
+        for row in self.tables[stage_id]:
+            key = (row["Date"], row["Photo ID"])
+            if key in index:
+                existing = index[key]
+                if (existing["Daily Views"], existing["Daily Favorites"]) == (
+                        row["Daily Views"], row["Daily Favorites"]):
+                    continue
+                existing.update(row)
+            else:
+                merged = dict(row)
+                target.append(merged)
+                index[key] = merged
+            affected += 1
+        scanned = sum(len(json.dumps(row)) for row in target)
+        return FakeJob("query", affected=affected, bytes_processed=scanned)
@@ -0,0 +1,184 @@
+"""Local HTTP stand-in for the Flickr REST API (stats.getPopularPhotos).
+
+``FakeFlickrServer`` serves paginated responses shaped like
+examples/response.json from a ``ThreadingHTTPServer`` on 127.0.0.1, so the
+real flickrapi client, the pooled session from flickr_auth and the retry /
+rate-limit logic in flickr_api are all exercised without network access.
+
+Knobs:
+    photo_count      – Photos per date (views descend with the photo index).
+    latency          – Seconds added to every response.
+    rate_limit_every – Answer every Nth request with Flickr error 105
+                       (0 disables injection).
+
+Use ``make_client(server)`` to get a FlickrAPI instance pointed at the server.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+OWNER = "33951951@N00"
+MAX_PER_PAGE = 500  # Flickr clamps per_page to this
+
+
+def build_page(date: str, page: int, per_page: int, photo_count: int) -> dict:
+    """Return one stats.getPopularPhotos page for a synthetic account."""
+    pages = max(1, -(-photo_count // per_page))
+    start = (page - 1) * per_page
+    stop = min(start + per_page, photo_count)
+    seed = int(date.replace("-", "")) % 997
+
+    return {
+        "photos": {
+            "page": page,
+            "pages": pages if photo_count else 0,
+            "perpage": per_page,
+            "total": photo_count,
+            "photo": [
+                {
+                    "id": str(50000000000 + index),
+                    "owner": OWNER,
+                    "secret": f"{(index * 2654435761) & 0xFFFFFFFFFF:010x}",
+                    "server": str(65535 - index % 1000),
+                    "farm": 66,
+                    "title": f"Synthetic photo {index}",
+                    "ispublic": 1,
+                    "isfriend": 0,
+                    "isfamily": 0,
+                    "stats": {
+                        "views": photo_count - index + seed,
+                        "comments": 0,
+                        "favorites": (index + seed) % 7,
+                        "total_views": 10 * (photo_count - index),
+                        "total_comments": 0,
+                        "total_favorites": index % 11,
+                    },
+                }
+                for index in range(start, stop)
+            ],
+        },
+        "stat": "ok",
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like api.flickr.com
+
+    def log_message(self, *args):  # noqa: D401 - silence per-request logging
+        pass
+
+    def _params(self) -> dict:
+        query = urlparse(self.path).query
+        if self.command == "POST":
+            length = int(self.headers.get("Content-Length") or 0)
+            query = self.rfile.read(length).decode("utf-8")
+        return {key: values[0] for key, values in parse_qs(query).items()}
+
+    def _respond(self):
+        server = self.server.fake
+        params = self._params()
+        request_number = server.count_request()
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        if server.rate_limit_every and request_number % server.rate_limit_every == 0:
+            payload = {"stat": "fail", "code": 105, "message": "Rate Limit Exceeded"}
+            server.count_rate_limited()
+        elif params.get("method") != "flickr.stats.getPopularPhotos":
+            payload = {"stat": "fail", "code": 112,
+                       "message": f"Method \"{params.get('method')}\" not found"}
+        else:
+            payload = build_page(
+                params.get("date", "1970-01-01"),
+                int(params.get("page", 1)),
+                min(int(params.get("per_page", 100)), MAX_PER_PAGE),
+                server.photo_count,
+            )
+
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _respond
+    do_POST = _respond
+
+
+class FakeFlickrServer:
+    """Background HTTP server emulating stats.getPopularPhotos."""
+
+    def __init__(self, photo_count: int = 1000, latency: float = 0.0,
+                 rate_limit_every: int = 0):
+        self.photo_count = photo_count
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.requests = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    def count_request(self) -> int:
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+    def count_rate_limited(self) -> None:
+        with self._lock:
+            self.rate_limited += 1
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._httpd.server_port}/services/rest/"
+
+    def start(self) -> "FakeFlickrServer":
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def make_client(server: FakeFlickrServer, pool_size: int = 10):
+    """Return a parsed-json FlickrAPI client that talks to server.
+
+    The client is built like the production one (OAuth token, pooled
+    keep-alive session) with dummy credentials.
+    """
+    import flickrapi
+    from flickrapi.auth import FlickrAccessToken
+
+    from flickr_auth import use_pooled_session
+
+    flickr = flickrapi.FlickrAPI(
+        "benchmark-key",
+        "benchmark-secret",
+        token=FlickrAccessToken("benchmark-token", "benchmark-token-secret", "read"),
+        format="parsed-json",
+        store_token=False,
+    )
+    flickr.REST_URL = server.url
+    return use_pooled_session(flickr, pool_size=pool_size)
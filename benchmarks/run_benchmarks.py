@@ -0,0 +1,288 @@
+"""Offline end-to-end benchmark of the extractor.
+
+Starts a FakeFlickrServer (benchmarks/fake_flickr.py) and uses an in-process
+FakeBigQueryClient (benchmarks/fake_bigquery.py), then drives:
+
+* ``fetch``   – main.fetch_flickr_stats for each date.
+* ``load``    – main.load_to_stage in "load" and "stream" mode with those rows.
+* ``handler`` – main.main_handler for the whole date range.
+* ``cli``     – flickrGetDailyPhotoViews.py for the same range, once per output
+                format (--cli-formats), in a temp dir.
+
+For each scenario it reports wall time, throughput (rows/s), p50/p95 Flickr
+page latency (measured around every HTTP request) and peak Python memory
+(tracemalloc, measured in a separate pass so it does not distort timings).
+Pass --json to save the results for comparison between commits.
+
+Usage:
+    python benchmarks/run_benchmarks.py --photos 20000 --dates 3 \\
+        --latency 0.02 --rate-limit-every 50
+    python benchmarks/run_benchmarks.py --photos 20000 --min-views 17000
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import runpy
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+import flickr_api  # noqa: E402
+import flickr_cache  # noqa: E402
+import flickr_ratelimit  # noqa: E402
+import main  # noqa: E402
+from fake_bigquery import FakeBigQueryClient  # noqa: E402
+from fake_flickr import FakeFlickrServer, make_client  # noqa: E402
+
+
+class PageTimer:
+    """Records the latency of every HTTP request a Flickr client makes."""
+
+    def __init__(self, flickr_client):
+        self.samples = []
+        self._lock = threading.Lock()
+        oauth = flickr_client.flickr_oauth
+        self._original = oauth.do_request
+
+        def timed_do_request(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return self._original(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.samples.append(time.perf_counter() - started)
+
+        oauth.do_request = timed_do_request
+
+    def reset(self):
+        with self._lock:
+            self.samples = []
+
+    def percentiles(self) -> dict:
+        if len(self.samples) < 2:
+            value = self.samples[0] if self.samples else 0.0
+            return {"p50_ms": value * 1000, "p95_ms": value * 1000}
+        cuts = statistics.quantiles(self.samples, n=100)
+        return {"p50_ms": cuts[49] * 1000, "p95_ms": cuts[94] * 1000}
+
+
+class FakeRequest:
+    """Minimal Flask-request stand-in for main_handler."""
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def get_json(self, silent=False):
+        return self.payload
+
+
+def peak_memory(func) -> int:
+    """Run func under tracemalloc and return its peak traced bytes."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_scenario(name, func, timer, measure_memory=True) -> dict:
+    """Time func (which returns a row count), then measure its peak memory."""
+    timer.reset()
+    started = time.perf_counter()
+    rows = func()
+    seconds = time.perf_counter() - started
+    result = {
+        "scenario": name,
+        "seconds": seconds,
+        "rows": rows,
+        "rows_per_s": rows / seconds if seconds else 0.0,
+        "requests": len(timer.samples),
+        **timer.percentiles(),
+    }
+    if measure_memory:
+        result["peak_mib"] = peak_memory(func) / (1024 * 1024)
+    return result
+
+
+def run_cli(flickr_client, start: str, end: str, output_format: str = "tsv",
+            workers: int = 4, min_views: int = 0) -> int:
+    """Run flickrGetDailyPhotoViews.py for a range and return its row count."""
+    import flickr_auth
+
+    original_argv = sys.argv
+    original_client = flickr_auth.get_authenticated_client
+    flickr_auth.get_authenticated_client = lambda *args, **kwargs: flickr_client
+
+    with tempfile.TemporaryDirectory() as workdir:
+        output = os.path.join(workdir, f"stats.{output_format}")
+        sys.argv = [
+            "flickrGetDailyPhotoViews.py", "--start", start, "--end", end,
+            "--format", output_format, "--workers", str(workers),
+            "--output", output, "--no-cache", "--min-views", str(min_views),
+        ]
+        try:
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                runpy.run_path(
+                    os.path.join(REPO_ROOT, "flickrGetDailyPhotoViews.py"),
+                    run_name="__main__",
+                )
+        finally:
+            sys.argv = original_argv
+            flickr_auth.get_authenticated_client = original_client
+
+        if output_format == "parquet":
+            import pyarrow.dataset as ds
+
+            return ds.dataset(output, format="parquet").count_rows()
+        with open(output, encoding="utf-8") as output_file:
+            lines = sum(1 for _ in output_file)
+        return lines - 1 if output_format == "tsv" else lines
+
+
+def main_benchmark(args) -> list:
+    flickr_cache.configure_default_cache(None)
+    flickr_api.INITIAL_RETRY_DELAY = args.retry_delay
+    if args.quota_per_hour:
+        flickr_ratelimit._default_limiter = flickr_ratelimit.TokenBucket(
+            args.quota_per_hour / 3600.0, flickr_ratelimit.FLICKR_RATE_BURST
+        )
+    else:
+        flickr_ratelimit._default_limiter = flickr_ratelimit.TokenBucket(1e9, 1e9)
+
+    first_day = date(2024, 1, 1)
+    dates = [(first_day + timedelta(days=offset)).isoformat()
+             for offset in range(args.dates)]
+
+    server = FakeFlickrServer(
+        photo_count=args.photos,
+        latency=args.latency,
+        rate_limit_every=args.rate_limit_every,
+    ).start()
+    try:
+        pool_size = main.FLICKR_DATE_WORKERS * main.FLICKR_FETCH_WORKERS
+        flickr_client = make_client(server, pool_size=pool_size)
+        timer = PageTimer(flickr_client)
+        results = []
+
+        fetched = {}
+
+        def fetch():
+            fetched.clear()
+            for day in dates:
+                fetched[day] = main.fetch_flickr_stats(
+                    flickr_client, day, min_views=args.min_views)
+            return sum(len(rows) for rows in fetched.values())
+
+        results.append(run_scenario("fetch", fetch, timer))
+        all_rows = [row for day in dates for row in fetched[day]]
+
+        for mode in main.LOAD_MODES:
+            def load(mode=mode):
+                bq_client = FakeBigQueryClient()
+                main.load_to_stage(bq_client, all_rows, mode=mode)
+                return len(all_rows)
+
+            results.append(run_scenario(f"load ({mode})", load, timer))
+
+        def handler():
+            bq_client = FakeBigQueryClient()
+            main._clients.update(flickr=flickr_client, bigquery=bq_client)
+            main._photo_cache.clear()  # every run starts like a cold instance
+            main._photo_cache_loaded.clear()
+            with contextlib.redirect_stdout(open(os.devnull, "w")):  # run metrics
+                main.main_handler(
+                    FakeRequest({"StartDate": dates[0], "EndDate": dates[-1],
+                                 "MinViews": args.min_views})
+                )
+            return len(bq_client.tables.get(main.BQ_TARGET_TABLE, []))
+
+        results.append(run_scenario("handler", handler, timer))
+
+        if not args.skip_cli:
+            for output_format in args.cli_formats.split(","):
+                results.append(run_scenario(
+                    f"cli ({output_format})",
+                    lambda output_format=output_format: run_cli(
+                        flickr_client, dates[0], dates[-1], output_format,
+                        args.cli_workers, args.min_views,
+                    ),
+                    timer,
+                ))
+
+        results.append({
+            "scenario": "server",
+            "requests": server.requests,
+            "rate_limited": server.rate_limited,
+            "limiter": flickr_ratelimit.get_default_limiter().stats(),
+        })
+        return results
+    finally:
+        server.stop()
+
+
+def print_results(results: list) -> None:
+    header = (f"{'scenario':<15} {'seconds':>8} {'rows':>8} {'rows/s':>10} "
+              f"{'requests':>8} {'p50 ms':>8} {'p95 ms':>8} {'peak MiB':>9}")
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        if result["scenario"] == "server":
+            print(f"\nserver: {result['requests']} requests, "
+                  f"{result['rate_limited']} answered with error 105; "
+                  f"limiter: {result['limiter']}")
+            continue
+        print(
+            f"{result['scenario']:<15} {result['seconds']:>8.2f} {result['rows']:>8} "
+            f"{result['rows_per_s']:>10.0f} {result['requests']:>8} "
+            f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+            f"{result.get('peak_mib', 0):>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--photos", type=int, default=5000,
+                        help="photos per date (up to 100000)")
+    parser.add_argument("--dates", type=int, default=3, help="number of dates")
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="seconds added to every fake Flickr response")
+    parser.add_argument("--rate-limit-every", type=int, default=0,
+                        help="answer every Nth request with error 105 (0 = never)")
+    parser.add_argument("--retry-delay", type=float, default=0.05,
+                        help="initial retry backoff in seconds")
+    parser.add_argument("--quota-per-hour", type=int, default=0,
+                        help="emulate a Flickr quota (0 = unlimited)")
+    parser.add_argument("--min-views", type=int, default=0,
+                        help="MinViews cutoff for fetch, handler and CLI "
+                             "(fake views run from --photos down to 1)")
+    parser.add_argument("--skip-cli", action="store_true")
+    parser.add_argument("--cli-formats", default="tsv,ndjson",
+                        help="comma-separated CLI output formats to run "
+                             "(tsv, ndjson, parquet)")
+    parser.add_argument("--cli-workers", type=int, default=4,
+                        help="--workers passed to the CLI")
+    parser.add_argument("--json", help="write results to this JSON file")
+    args = parser.parse_args()
+
+    import logging
+    logging.basicConfig(level=logging.ERROR)  # retry warnings are expected here
+
+    results = main_benchmark(args)
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(results, json_file, indent=2)
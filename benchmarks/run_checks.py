@@ -0,0 +1,206 @@
+"""Offline checks of concurrency and edge-case behaviour.
+
+Each ``check_*`` function sets up its own fakes (benchmarks/fake_flickr.py,
+benchmarks/fake_bigquery.py), asserts on the outcome and prints one line.
+Nothing here talks to Flickr or BigQuery.
+
+Usage:
+    python benchmarks/run_checks.py [check_name ...]
+"""
+
+import contextlib
+import io
+import os
+import sys
+import threading
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import flickr_cache  # noqa: E402
+import flickr_ratelimit  # noqa: E402
+import flickrGetDailyPhotoViews as cli  # noqa: E402
+import main  # noqa: E402
+from fake_bigquery import FakeBigQueryClient  # noqa: E402
+from fake_flickr import FakeFlickrServer, make_client  # noqa: E402
+
+
+class FakeClock:
+    """Manually advanced monotonic clock for TokenBucket."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class MemoryWriter:
+    """flickr_export writer stand-in that keeps the written dates."""
+
+    path = "<memory>"
+
+    def __init__(self):
+        self.dates = {}
+
+    def is_date_complete(self, date: str) -> bool:
+        return False
+
+    def next_page(self, date: str) -> int:
+        return 1
+
+    def write_date(self, date: str, first_page: int, pages: list,
+                   total_pages: int) -> None:
+        self.dates[date] = [row for page in pages for row in page]
+
+
+class MemoryHistory:
+    """history_store.HistoryStore stand-in that keeps the written dates."""
+
+    def __init__(self):
+        self.dates = {}
+
+    def write_date(self, date: str, rows: list) -> None:
+        self.dates[date] = rows
+
+
+def check_concurrent_penalties() -> None:
+    """Eight workers reporting error 105 at once pause the bucket only once."""
+    clock = FakeClock()
+    bucket = flickr_ratelimit.TokenBucket(10.0, 10, jitter=0, clock=clock)
+    barrier = threading.Barrier(8)
+
+    def report_limit():
+        barrier.wait()
+        bucket.penalize(2.0)
+
+    workers = [threading.Thread(target=report_limit) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    delay = bucket._reserve()
+    assert 2.0 <= delay <= 2.2, f"expected a ~2 s pause, got {delay:.1f} s"
+    clock.now += 2.0
+    assert bucket._reserve() < 1.0, "pause did not end after 2 s"
+    assert bucket.stats()["penalties"] == 8
+    print(f"Concurrent penalties: OK (next token after {delay:.1f} s)")
+
+
+def check_cli_history_cutoff() -> None:
+    """The CLI leaves dates cut short by --min-views out of the history."""
+    flickr_cache.configure_default_cache(None)
+    flickr_ratelimit._default_limiter = flickr_ratelimit.TokenBucket(1e9, 1e9)
+    dates = ["2024-01-01", "2024-01-02"]
+    with FakeFlickrServer(photo_count=1200) as server:
+        flickr = make_client(server)
+        for min_views, expect_history in ((0, True), (1000, False)):
+            writer, history = MemoryWriter(), MemoryHistory()
+            with contextlib.redirect_stdout(io.StringIO()):
+                cli.fetch_dates(flickr, writer, dates, 2, history, min_views)
+            assert sorted(writer.dates) == dates
+            if expect_history:
+                assert history.dates == writer.dates
+                assert all(len(rows) == 1200 for rows in history.dates.values())
+            else:
+                assert all(rows and len(rows) < 1200 for rows in writer.dates.values())
+                assert history.dates == {}, "truncated dates reached the history"
+    print("CLI history with --min-views: OK")
+
+
+def check_concurrent_merges() -> None:
+    """Two shards merging at the same time with summary tables both succeed.
+
+    The fake client aborts overlapping transactions that mutate the same
+    table, as BigQuery does, and both runs are held at a barrier so their
+    MERGE jobs overlap.
+    """
+    flickr_cache.configure_default_cache(None)
+    flickr_ratelimit._default_limiter = flickr_ratelimit.TokenBucket(1e9, 1e9)
+    bq_client = FakeBigQueryClient(transaction_seconds=0.3)
+    barrier = threading.Barrier(2)
+    query = bq_client.query
+
+    def query_after_barrier(sql, *args, **kwargs):
+        if main.BQ_DAILY_TOTALS_TABLE in sql:
+            barrier.wait(timeout=30)
+        return query(sql, *args, **kwargs)
+
+    bq_client.query = query_after_barrier
+    dates = ["2024-01-01", "2024-01-02"]
+    errors = []
+    aggregates = main.BQ_AGGREGATES
+    with FakeFlickrServer(photo_count=600) as server:
+        main._clients.update(flickr=make_client(server), bigquery=bq_client)
+        main._photo_cache.clear()
+        main._photo_cache_loaded.clear()
+        main.BQ_AGGREGATES = True
+
+        def run_shard(date):
+            try:
+                main.process_dates([date])
+            except Exception as exc:  # reported below
+                errors.append(f"{date}: {type(exc).__name__}: {exc}")
+
+        shards = [threading.Thread(target=run_shard, args=(date,)) for date in dates]
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):  # run metrics
+                for shard in shards:
+                    shard.start()
+                for shard in shards:
+                    shard.join()
+        finally:
+            main.BQ_AGGREGATES = aggregates
+            main._clients.clear()
+
+    assert not errors, "; ".join(errors)
+    loaded = {row["Date"] for row in bq_client.tables[main.BQ_TARGET_TABLE]}
+    assert loaded == set(dates), f"fact table holds {sorted(loaded)}"
+    print("Concurrent MERGE with summary tables: OK")
+
+
+def check_fill_gaps_after_cutoff() -> None:
+    """Dates loaded with MinViews are refetched by a gap fill without it."""
+    flickr_cache.configure_default_cache(None)
+    flickr_ratelimit._default_limiter = flickr_ratelimit.TokenBucket(1e9, 1e9)
+    bq_client = FakeBigQueryClient()
+    dates = ["2024-01-01", "2024-01-02"]
+    with FakeFlickrServer(photo_count=1200) as server:
+        main._clients.update(flickr=make_client(server), bigquery=bq_client)
+        main._photo_cache.clear()
+        main._photo_cache_loaded.clear()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):  # run metrics
+                main.process_dates(dates, min_views=1000)
+                cutoffs = [row["min_views"]
+                           for row in bq_client.tables[main.BQ_MANIFEST_TABLE]]
+                truncated = main.process_dates(dates, fill_gaps=True)["metrics"]
+                settled = main.process_dates(dates, fill_gaps=True)["metrics"]
+        finally:
+            main._clients.clear()
+
+    assert cutoffs == [1000, 1000], cutoffs
+    assert truncated["dates_truncated"] == 2, truncated
+    assert settled["status"] == "no_gaps", settled["status"]
+    loaded = bq_client.tables[main.BQ_TARGET_TABLE]
+    assert len(loaded) == 2 * 1200, f"{len(loaded)} rows after the gap fill"
+    manifest = bq_client.tables[main.BQ_MANIFEST_TABLE]
+    assert all(row["min_views"] == 0 for row in manifest), manifest
+    print("FillGaps after a MinViews cutoff: OK")
+
+
+CHECKS = [check_concurrent_penalties, check_cli_history_cutoff,
+          check_concurrent_merges, check_fill_gaps_after_cutoff]
+
+
+if __name__ == "__main__":
+    import logging
+    for name in ("", "main"):  # main.py sets INFO on both when imported
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    selected = set(sys.argv[1:])
+    for check in CHECKS:
+        if not selected or check.__name__ in selected:
+            check()
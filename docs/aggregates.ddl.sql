@@ -0,0 +1,49 @@
+-- Summary tables kept up to date by main.run_merge_with_aggregates.
+--
+-- Every run executes these statements before refreshing the tables, so they
+-- are created (and photo_totals / daily_totals filled from the full history)
+-- on the first run after deployment. Once a table exists its statement does
+-- nothing. To rebuild a table from scratch, drop it; the next run recreates it.
+--
+--   photo_totals  – per photo: lifetime views/favorites, days seen, first and
+--                   last date (recomputed for the photos each run loads;
+--                   titles live in the photos dimension)
+--   daily_totals  – per date: photos, views, favorites (recomputed for the
+--                   dates each run loads)
+--   photo_windows – per photo: views/favorites over the 7 and 30 days up to
+--                   the latest loaded date (rebuilt from the last 30 days)
+
+CREATE TABLE IF NOT EXISTS `flickrstats-492309.flickrstats.photo_totals`
+CLUSTER BY `Photo ID`
+AS
+SELECT
+  `Photo ID`,
+  SUM(`Daily Views`) AS lifetime_views,
+  SUM(`Daily Favorites`) AS lifetime_favorites,
+  COUNT(*) AS days_seen,
+  MIN(Date) AS first_date,
+  MAX(Date) AS last_date,
+  CURRENT_TIMESTAMP() AS updated_at
+FROM `flickrstats-492309.flickrstats.flickrstats_all`
+GROUP BY `Photo ID`;
+
+CREATE TABLE IF NOT EXISTS `flickrstats-492309.flickrstats.daily_totals`
+AS
+SELECT
+  Date,
+  COUNT(*) AS photos,
+  SUM(`Daily Views`) AS views,
+  SUM(`Daily Favorites`) AS favorites,
+  CURRENT_TIMESTAMP() AS updated_at
+FROM `flickrstats-492309.flickrstats.flickrstats_all`
+GROUP BY Date;
+
+CREATE TABLE IF NOT EXISTS `flickrstats-492309.flickrstats.photo_windows` (
+  `Photo ID`    INT64,
+  window_end    DATE,
+  views_7d      INT64,
+  favorites_7d  INT64,
+  views_30d     INT64,
+  favorites_30d INT64
+)
+CLUSTER BY `Photo ID`;
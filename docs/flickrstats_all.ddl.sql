@@ -0,0 +1,32 @@
+-- Layout of the main fact table: partitioned by Date, clustered on Photo ID.
+--
+-- The column list matches docs/flickrstats_all.schema.json. The JSON schema
+-- cannot express partitioning or clustering, so the table must be created
+-- (or migrated) with this DDL for main.run_merge's date-bounded MERGE to
+-- prune partitions. Photo titles, secrets, servers and owners live in the
+-- photos dimension (docs/photos.ddl.sql), not in the daily rows.
+
+-- Fresh install
+CREATE TABLE IF NOT EXISTS `flickrstats-492309.flickrstats.flickrstats_all` (
+  `Date`            DATE,
+  `Photo ID`        INT64,
+  `Daily Views`     INT64,
+  `Daily Favorites` INT64,
+  `loaded_at`       TIMESTAMP,
+  `updated_at`      TIMESTAMP
+)
+PARTITION BY `Date`
+CLUSTER BY `Photo ID`;
+
+-- One-off migration of an existing unpartitioned table. Partitioning cannot
+-- be added in place, so copy into a new table and swap the names.
+--
+-- CREATE TABLE `flickrstats-492309.flickrstats.flickrstats_all_partitioned`
+-- PARTITION BY `Date`
+-- CLUSTER BY `Photo ID`
+-- AS SELECT * FROM `flickrstats-492309.flickrstats.flickrstats_all`;
+--
+-- ALTER TABLE `flickrstats-492309.flickrstats.flickrstats_all`
+--   RENAME TO flickrstats_all_unpartitioned;
+-- ALTER TABLE `flickrstats-492309.flickrstats.flickrstats_all_partitioned`
+--   RENAME TO flickrstats_all;
@@ -0,0 +1,42 @@
+-- Load manifest: one row per date loaded into flickrstats_all.
+--
+-- main.write_fingerprints upserts a row after each successful MERGE with a
+-- SHA-256 fingerprint of the date's sorted (Photo ID, Daily Views,
+-- Daily Favorites) values (main.date_fingerprint), the number of rows
+-- loaded and, for a date a MinViews cutoff cut short, that cutoff (0 when
+-- every photo was loaded). main.read_fingerprints reads it at the start of a
+-- run. When every fetched date has the same fingerprint as before, the run
+-- skips the MERGE. Deleting a row (or sending "Force": true) reloads that date.
+--
+-- The table is also the list of loaded dates: "FillGaps" runs
+-- (main.find_gap_dates) fetch only the dates of a window that have no row
+-- here, whose fetched_at is too close to the date to be final, or whose
+-- min_views is above the gap fill's own cutoff. Every run that fetches a
+-- complete date refreshes its fetched_at, changed or not.
+
+CREATE TABLE IF NOT EXISTS `flickrstats-492309.flickrstats.load_manifest` (
+  `Date`        DATE NOT NULL,
+  `fingerprint` STRING NOT NULL,
+  `row_count`   INT64,
+  `min_views`   INT64,
+  `fetched_at`  TIMESTAMP
+)
+CLUSTER BY `Date`;
+
+-- Tables created before min_views was recorded: add the column. Existing
+-- rows read as NULL, i.e. loaded without a cutoff.
+ALTER TABLE `flickrstats-492309.flickrstats.load_manifest`
+  ADD COLUMN IF NOT EXISTS `min_views` INT64;
+
+-- One-off: record dates loaded before the manifest existed, so gap filling
+-- does not treat them as missing. The empty fingerprint never matches, so
+-- each such date is restaged once the next time it is fetched.
+--
+-- INSERT INTO `flickrstats-492309.flickrstats.load_manifest`
+--   (Date, fingerprint, row_count, fetched_at)
+-- SELECT Date, '', COUNT(*), MAX(updated_at)
+-- FROM `flickrstats-492309.flickrstats.flickrstats_all`
+-- WHERE Date NOT IN (
+--   SELECT Date FROM `flickrstats-492309.flickrstats.load_manifest`
+-- )
+-- GROUP BY Date;
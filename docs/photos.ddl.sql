@@ -0,0 +1,81 @@
+-- Photo dimension and the wide daily view.
+--
+--   photos            – one row per photo: title, secret, server and owner.
+--                       main.upsert_photos inserts new photos and updates
+--                       edited ones; unchanged photos are not written.
+--   flickrstats_daily – flickrstats_all joined with photos, with Link and
+--                       thumbnail rebuilt from the photo's fields. It has the
+--                       columns the fact table had before the split, so
+--                       existing queries and dashboards can switch to it.
+
+CREATE TABLE IF NOT EXISTS `flickrstats-492309.flickrstats.photos` (
+  `Photo ID`    INT64 NOT NULL,
+  `Photo Title` STRING,
+  `Secret`      STRING,
+  `Server`      INT64,
+  `Owner`       STRING,
+  `updated_at`  TIMESTAMP
+)
+CLUSTER BY `Photo ID`;
+
+CREATE OR REPLACE VIEW `flickrstats-492309.flickrstats.flickrstats_daily` AS
+SELECT
+  F.Date,
+  F.`Photo ID`,
+  P.`Photo Title`,
+  F.`Daily Views`,
+  F.`Daily Favorites`,
+  P.Secret,
+  P.Server,
+  CONCAT('https://www.flickr.com/photos/', P.Owner, '/', CAST(F.`Photo ID` AS STRING)) AS Link,
+  CONCAT(
+    'https://live.staticflickr.com/', CAST(P.Server AS STRING), '/',
+    CAST(F.`Photo ID` AS STRING), '_', P.Secret, '_q.jpg'
+  ) AS thumbnail,
+  F.loaded_at,
+  F.updated_at
+FROM `flickrstats-492309.flickrstats.flickrstats_all` F
+LEFT JOIN `flickrstats-492309.flickrstats.photos` P
+  USING (`Photo ID`);
+
+-- One-off migration of a fact table that still carries the metadata columns.
+-- Run the two CREATE statements above first, then:
+--
+-- 1. Fill the dimension from each photo's most recent row (the owner is
+--    recovered from the stored Link):
+--
+-- MERGE `flickrstats-492309.flickrstats.photos` T
+-- USING (
+--   SELECT
+--     `Photo ID` AS photo_id,
+--     ARRAY_AGG(
+--       STRUCT(`Photo Title` AS title, Secret AS secret, Server AS server, Link AS link)
+--       ORDER BY Date DESC LIMIT 1
+--     )[OFFSET(0)] AS latest
+--   FROM `flickrstats-492309.flickrstats.flickrstats_all`
+--   GROUP BY `Photo ID`
+-- ) S
+--   ON T.`Photo ID` = S.photo_id
+-- WHEN NOT MATCHED THEN
+--   INSERT (`Photo ID`, `Photo Title`, Secret, Server, Owner, updated_at)
+--   VALUES (
+--     S.photo_id, S.latest.title, S.latest.secret, S.latest.server,
+--     REGEXP_EXTRACT(S.latest.link, r'/photos/([^/]+)/'), CURRENT_TIMESTAMP()
+--   );
+--
+-- 2. Rewrite the fact table without the metadata columns. Dropping columns
+--    in place does not free their storage until the data is rewritten, so
+--    copy and swap the names as for the partitioning migration:
+--
+-- CREATE TABLE `flickrstats-492309.flickrstats.flickrstats_all_slim`
+-- PARTITION BY `Date`
+-- CLUSTER BY `Photo ID`
+-- AS SELECT Date, `Photo ID`, `Daily Views`, `Daily Favorites`, loaded_at, updated_at
+-- FROM `flickrstats-492309.flickrstats.flickrstats_all`;
+--
+-- ALTER TABLE `flickrstats-492309.flickrstats.flickrstats_all`
+--   RENAME TO flickrstats_all_wide;
+-- ALTER TABLE `flickrstats-492309.flickrstats.flickrstats_all_slim`
+--   RENAME TO flickrstats_all;
+--
+-- Drop flickrstats_all_wide once the view has been checked.
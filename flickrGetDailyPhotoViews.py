@@ -1,51 +1,82 @@
 """
-Fetches daily popular photo statistics from Flickr for a user-defined date range.
+Fetches daily popular photo statistics from Flickr for a date range.
 
-This script authenticates with the Flickr API, prompts the user for a start
-and end date (inclusive), and then retrieves data for popular photos for each
-day in that range. The data includes photo ID, title, views, favorites,
-secret, and server.
+This script authenticates with the Flickr API and retrieves data for popular
+photos for each day in an inclusive date range. The data includes photo ID,
+title, views, favorites, secret, and server. Several dates are fetched
+concurrently and written in date order through a buffered writer.
 
 Execution:
-    python flickrGetDailyPhotoViews.py
-
-Inputs:
-    - Start Date: Prompts the user to enter the start date in YYYY-MM-DD format.
-    - End Date: Prompts the user to enter the end date in YYYY-MM-DD format.
-      (If the same as the start date, data for a single day is fetched).
+    python flickrGetDailyPhotoViews.py --start 2024-01-01 --end 2024-12-31
+    python flickrGetDailyPhotoViews.py --start 2024-01-01 --format parquet --workers 8
+    python flickrGetDailyPhotoViews.py   # prompts for the dates interactively
+
+Options:
+    --start / --end: Date range in YYYY-MM-DD format (--end defaults to
+      --start). When --start is omitted on a terminal, the dates are prompted
+      for as before.
+    --workers: Number of dates fetched at the same time.
+    --format: tsv (default), ndjson or parquet (requires pyarrow).
+    --output: Output path (see below for the default).
+    --no-cache: Do not use the on-disk response cache.
+    --history [PATH]: Also store every fully fetched date in the local Parquet
+      history (history_store.py; default FLICKR_HISTORY_PATH or
+      .flickr_history). Requires pyarrow and numpy.
+    --min-views N: Only keep photos with at least N daily views. Flickr
+      returns photos most-viewed first, so paging stops at the first photo
+      below N and the rest of the date is never requested.
 
 Outputs:
-    - A CSV file named dynamically based on the input dates:
-        - flickr_stats_YYYY-MM-DD.csv (if start and end dates are the same)
-        - flickr_stats_YYYY-MM-DD_to_YYYY-MM-DD.csv (if dates differ)
-    - This CSV file contains columns: Date, Photo ID, Photo Title, Daily Views,
-      Daily Favorites, Secret, Server.
+    - A file named dynamically based on the dates:
+        - flickr_stats_YYYY-MM-DD.<ext> (if start and end dates are the same)
+        - flickr_stats_YYYY-MM-DD_to_YYYY-MM-DD.<ext> (if dates differ)
+      where <ext> is csv (tab-separated), ndjson, or parquet (a directory with
+      one Date=YYYY-MM-DD/part-0.parquet file per date).
+    - Columns: Date, Photo ID, Photo Title, Daily Views, Daily Favorites,
+      Secret, Server.
     - Progress messages are printed to the console during execution.
+
+Environment variables (optional):
+    FLICKR_RAW_JSON: Set to 1 to request raw JSON pages and decode them with
+      flickr_api.parse_json_response (orjson when installed) instead of
+      flickrapi's parsed-json parser, as in the Cloud Function.
 """
 
-import flickrapi
-import csv
+import argparse
+import itertools
+import logging
 import os
-import time
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+
+import flickrapi
+
+from flickr_api import MAX_RETRIES, make_api_call_with_retry, parse_json_response
 from flickr_auth import get_authenticated_client
+from flickr_cache import FLICKR_CACHE_PATH, configure_default_cache
+from flickr_export import EXPORT_FORMATS, open_writer, photo_row
 
 # Constants for API configuration
-FLICKR_PAGE_SIZE = 100  # Photos per page (max: 500)
-MAX_RETRIES = 3  # Maximum retry attempts for failed API calls
-INITIAL_RETRY_DELAY = 2  # Initial delay in seconds before retry
-MAX_RETRY_DELAY = 60  # Maximum delay in seconds between retries
+FLICKR_PAGE_SIZE = 500  # Photos per page (Flickr's maximum)
+
+# Opt-in fast path for decoding pages (same switch as main.py)
+FLICKR_RAW_JSON = os.getenv('FLICKR_RAW_JSON', '0') == '1'
+
+# Dates fetched at the same time by default (each one pages sequentially)
+DEFAULT_WORKERS = 4
+
+# Responses are cached on disk so re-running a range costs no API calls for
+# dates that are already closed (see flickr_cache.py)
+DEFAULT_CACHE_PATH = os.path.join('.flickr_cache', 'responses.sqlite')
 
 # Constants for date formatting
 DATE_FORMAT = '%Y-%m-%d'
 
-# Constants for CSV configuration
-CSV_DELIMITER = '\t'
-CSV_COLUMNS = ['Date', 'Photo ID', 'Photo Title', 'Daily Views',
-               'Daily Favorites', 'Secret', 'Server']
+# File extension of the default output name for each format
+OUTPUT_EXTENSIONS = {'tsv': 'csv', 'ndjson': 'ndjson', 'parquet': 'parquet'}
 
-# Get authenticated Flickr client
-flickr = get_authenticated_client()
 
 # Function to validate date format
 def validate_date(date_string: str) -> bool:
@@ -65,157 +96,281 @@ def validate_date(date_string: str) -> bool:
         return False
 
 
-def make_api_call_with_retry(flickr, method_name: str, **params):
+def prompt_for_dates():
     """
-    Make Flickr API call with exponential backoff retry logic.
-
-    Args:
-        flickr: FlickrAPI instance
-        method_name: API method (e.g., 'stats.getPopularPhotos')
-        **params: API parameters
+    Prompts for a start and end date until a valid range is entered.
 
     Returns:
-        API response dict or None if all retries failed
+        Tuple of (start_date_str, end_date_str).
     """
-    retry_delay = INITIAL_RETRY_DELAY
-
-    for attempt in range(MAX_RETRIES):
-        try:
-            # Get the method from flickr object dynamically
-            method_parts = method_name.split('.')
-            method = flickr
-            for part in method_parts:
-                method = getattr(method, part)
-
-            return method(**params)
-
-        except flickrapi.exceptions.FlickrError as e:
-            error_code = getattr(e, 'code', None)
-
-            # Check if it's a rate limit error
-            if error_code in [105, 'Rate Limit Exceeded']:
-                if attempt < MAX_RETRIES - 1:
-                    print(f"Rate limit hit. Retrying in {retry_delay} seconds... "
-                          f"(Attempt {attempt + 1}/{MAX_RETRIES})")
-                    time.sleep(retry_delay)
-                    retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
-                    continue
-
-            # For other Flickr errors, raise immediately
-            raise
-
-        except Exception as e:
-            if attempt < MAX_RETRIES - 1:
-                print(f"Error occurred: {e}. Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-                retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
-                continue
-            raise
+    while True:
+        start_date_str = input("Enter the start date (YYYY-MM-DD): ")
+        if not validate_date(start_date_str):
+            print("Invalid start date format. Please use YYYY-MM-DD.")
+            continue
 
-    return None
+        end_date_str = input("Enter the end date (YYYY-MM-DD): ")
+        if not validate_date(end_date_str):
+            print("Invalid end date format. Please use YYYY-MM-DD.")
+            continue
+
+        # Validate that end_date is not before start_date
+        if end_date_str < start_date_str:
+            print("Error: End date cannot be before start date. Please try again.")
+            continue
 
+        # Warn about future dates
+        today = datetime.now().strftime(DATE_FORMAT)
+        if start_date_str > today or end_date_str > today:
+            print("Warning: You've entered future dates. Data may not be available yet.")
+            confirm = input("Continue anyway? (y/n): ")
+            if confirm.lower() != 'y':
+                continue
 
-while True:
-    start_date_str = input("Enter the start date (YYYY-MM-DD): ")
-    if not validate_date(start_date_str):
-        print("Invalid start date format. Please use YYYY-MM-DD.")
-        continue
+        return start_date_str, end_date_str
 
-    end_date_str = input("Enter the end date (YYYY-MM-DD): ")
-    if not validate_date(end_date_str):
-        print("Invalid end date format. Please use YYYY-MM-DD.")
-        continue
 
-    # Validate that end_date is not before start_date
+def date_range(start_date_str: str, end_date_str: str) -> list:
+    """
+    Returns every date from start to end (inclusive) as YYYY-MM-DD strings.
+    """
     start_date_dt = datetime.strptime(start_date_str, DATE_FORMAT)
     end_date_dt = datetime.strptime(end_date_str, DATE_FORMAT)
+    return [(start_date_dt + timedelta(days=offset)).strftime(DATE_FORMAT)
+            for offset in range((end_date_dt - start_date_dt).days + 1)]
 
-    if end_date_dt < start_date_dt:
-        print("Error: End date cannot be before start date. Please try again.")
-        continue
-
-    # Warn about future dates
-    today = datetime.now().date()
-    if start_date_dt.date() > today or end_date_dt.date() > today:
-        print(f"Warning: You've entered future dates. Data may not be available yet.")
-        confirm = input("Continue anyway? (y/n): ")
-        if confirm.lower() != 'y':
-            continue
-
-    print(f"Start Date: {start_date_str}")
-    print(f"End Date: {end_date_str}")
-    break
 
-# Generate the list of dates to process based on user input
-dates_to_process = []
-current_date_dt = start_date_dt
-while current_date_dt <= end_date_dt:
-    dates_to_process.append(current_date_dt.strftime(DATE_FORMAT))
-    current_date_dt += timedelta(days=1)
+def default_output_path(start_date_str: str, end_date_str: str, output_format: str) -> str:
+    """
+    Returns flickr_stats_<start>[_to_<end>].<ext> for the given format.
+    """
+    extension = OUTPUT_EXTENSIONS[output_format]
+    if start_date_str == end_date_str:
+        return f"flickr_stats_{start_date_str}.{extension}"
+    return f"flickr_stats_{start_date_str}_to_{end_date_str}.{extension}"
 
-print("Generated list of dates to process:")
-print(dates_to_process)
 
-# Determine CSV filename based on whether the start and end dates are the same
-if start_date_str == end_date_str:
-    filepath = f"flickr_stats_{start_date_str}.csv"
-else:
-    filepath = f"flickr_stats_{start_date_str}_to_{end_date_str}.csv"
-print(f"Output CSV file will be: {filepath}")
+def fetch_date(flickr, current_date: str, first_page: int = 1, min_views: int = 0) -> dict:
+    """
+    Fetches the pages of one date, starting at first_page.
 
-file_exists_for_header = os.path.exists(filepath)
+    Pages are fetched in order; if a page fails after all retries the
+    remaining pages are skipped, so the result always holds consecutive pages.
+    With min_views set, the first page whose last photo is below the cutoff
+    is the last one fetched and total_pages is lowered to it, so the date is
+    still checkpointed as complete. The result is then flagged as truncated.
 
-for current_date in dates_to_process:
-    print(f"Processing data for: {current_date}")
+    Args:
+        flickr: Authenticated FlickrAPI instance.
+        current_date: Date string in YYYY-MM-DD format.
+        first_page: First page to fetch (greater than 1 when resuming).
+        min_views: Minimum daily views of a photo to keep (0 keeps all).
 
+    Returns:
+        Dict with total_pages, total_photos, pages (a list of row lists) and
+        truncated (True if min_views dropped photos), or None if the date
+        could not be fetched at all.
+    """
     params = {
         'date': current_date,
         'per_page': FLICKR_PAGE_SIZE,
-        'page': 1
+        'page': 1,
     }
+    if FLICKR_RAW_JSON:
+        # Raw JSON decoded by parse_json_response (orjson when installed) is
+        # cheaper than flickrapi's parsed-json path for large pages
+        params.update(format='json', parser=parse_json_response)
 
     # Initial API call for the current date to determine total pages and photos
-    try:
-        response_initial = make_api_call_with_retry(flickr, 'stats.getPopularPhotos', **params)
-        if not response_initial:
-            print(f"Failed to fetch data for {current_date} after {MAX_RETRIES} retries. Skipping this date.")
-            continue
+    response_initial = make_api_call_with_retry(flickr, 'stats.getPopularPhotos', **params)
+    if not response_initial:
+        print(f"Failed to fetch data for {current_date} after {MAX_RETRIES} retries. Skipping this date.")
+        return None
+
+    total_pages = response_initial['photos']['pages']
+    result = {
+        'total_pages': total_pages,
+        'total_photos': response_initial['photos']['total'],
+        'pages': [],
+        'truncated': False,
+    }
 
-        total_photos_for_date = response_initial['photos']['total']
-        total_pages_for_date = response_initial['photos']['pages']
-        print(f"Date: {current_date} - Total pages: {total_pages_for_date}, Total photos: {total_photos_for_date}")
+    for page_number in range(first_page, total_pages + 1):
+        if page_number == 1:
+            response_page = response_initial
+        else:
+            params['page'] = page_number
+            response_page = make_api_call_with_retry(flickr, 'stats.getPopularPhotos', **params)
+
+        if not response_page:
+            print(f"Failed to fetch page {page_number} for {current_date}. Skipping remaining pages.")
+            break
+
+        rows = [photo_row(current_date, photo) for photo in response_page['photos']['photo']]
+        if min_views and rows and rows[-1][3] < min_views:
+            # Views are in descending order: everything after this is below the cutoff
+            result['pages'].append([row for row in rows if row[3] >= min_views])
+            if page_number < total_pages:
+                print(f"{current_date}: below {min_views} views at page {page_number}, "
+                      f"skipping pages {page_number + 1}-{total_pages}.")
+            result['total_pages'] = page_number
+            result['truncated'] = True
+            break
+        result['pages'].append(rows)
+
+    return result
+
+
+def fetch_dates(flickr, writer, dates_to_process: list, workers: int, history=None,
+                min_views: int = 0) -> None:
+    """
+    Fetches dates concurrently and writes them to writer in date order.
 
-        with open(filepath, mode='a', newline='') as csv_file:
-            writer = csv.writer(csv_file, delimiter=CSV_DELIMITER)
+    At most `workers` dates are in flight at once, so memory is bounded by
+    that many dates' rows however long the range is.
 
-            if not file_exists_for_header:
-                writer.writerow(CSV_COLUMNS)
-                file_exists_for_header = True
+    Args:
+        flickr: Authenticated FlickrAPI instance.
+        writer: Opened writer from flickr_export.open_writer.
+        dates_to_process: Dates to fetch, in output order.
+        workers: Maximum number of dates fetched at the same time.
+        history: Optional history_store.HistoryStore that also receives
+            every date fetched in full. Dates cut short by min_views are
+            left out, so the history only holds complete days.
+        min_views: Minimum daily views of a photo to keep (see fetch_date).
+    """
+    pending = []
+    for current_date in dates_to_process:
+        if writer.is_date_complete(current_date):
+            print(f"Skipping {current_date}: already complete in checkpoint.")
+        else:
+            pending.append((current_date, writer.next_page(current_date)))
+
+    def submit(executor, item):
+        current_date, first_page = item
+        if first_page > 1:
+            print(f"Resuming {current_date} at page {first_page}.")
+        return current_date, first_page, executor.submit(
+            fetch_date, flickr, current_date, first_page, min_views)
+
+    pending = iter(pending)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        window = deque(submit(executor, item) for item in itertools.islice(pending, workers))
+        while window:
+            current_date, first_page, future = window.popleft()
+            item = next(pending, None)
+            if item is not None:
+                window.append(submit(executor, item))
+
+            try:
+                result = future.result()
+            except flickrapi.exceptions.FlickrError as e:
+                print(f"Flickr API Error for date {current_date}: {e}")
+                continue
+            except Exception as e:
+                print(f"An unexpected error occurred for date {current_date}: {e}")
+                continue
+            if result is None:
+                continue
 
-            page_number = 1
-            while page_number <= total_pages_for_date:
-                params['page'] = page_number
-                response_page = make_api_call_with_retry(flickr, 'stats.getPopularPhotos', **params)
+            print(f"Date: {current_date} - Total pages: {result['total_pages']}, "
+                  f"Total photos: {result['total_photos']}")
+            writer.write_date(current_date, first_page, result['pages'], result['total_pages'])
+            print(f"Data for {current_date} written to {writer.path}")
+
+            if history is None:
+                continue
+            if result['truncated']:
+                print(f"{current_date} not added to the history: truncated by --min-views.")
+            elif first_page == 1 and len(result['pages']) == result['total_pages']:
+                history.write_date(current_date, [row for page in result['pages'] for row in page])
 
-                if not response_page:
-                    print(f"Failed to fetch page {page_number} for {current_date}. Skipping remaining pages.")
-                    break
 
-                for photo in response_page['photos']['photo']:
-                    photo_id = photo['id']
-                    title = photo['title']
-                    server = photo['server']
-                    secret = photo['secret']
-                    views = photo['stats']['views']
-                    favorites = photo['stats']['favorites']
-                    writer.writerow([current_date, photo_id, title, views, favorites, secret, server])
+def parse_args(argv=None):
+    """
+    Parses the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Export daily Flickr popular-photo stats for a date range.")
+    parser.add_argument('--start', help="first date (YYYY-MM-DD); prompted for if omitted")
+    parser.add_argument('--end', help="last date, inclusive (YYYY-MM-DD); defaults to --start")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"dates fetched at the same time (default {DEFAULT_WORKERS})")
+    parser.add_argument('--format', dest='output_format', choices=EXPORT_FORMATS,
+                        default='tsv', help="output format (default tsv)")
+    parser.add_argument('--output', help="output path (default flickr_stats_<dates>.<ext>)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="do not use the on-disk response cache")
+    parser.add_argument('--min-views', type=int, default=0, metavar='N',
+                        help="only keep photos with at least N daily views; "
+                             "stops paging a date once photos drop below N")
+    parser.add_argument('--history', nargs='?', const='', default=None, metavar='PATH',
+                        help="also add fetched dates to the local Parquet history store")
+    args = parser.parse_args(argv)
+
+    for name in ('start', 'end'):
+        value = getattr(args, name)
+        if value is not None and not validate_date(value):
+            parser.error(f"--{name} must be a date in YYYY-MM-DD format.")
+    if args.start is None:
+        if args.end is not None:
+            parser.error("--end requires --start.")
+        if not sys.stdin.isatty():
+            parser.error("--start is required when not running interactively.")
+        args.start, args.end = prompt_for_dates()
+    elif args.end is None:
+        args.end = args.start
+    if args.end < args.start:
+        parser.error("End date cannot be before start date.")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
+    if args.min_views < 0:
+        parser.error("--min-views cannot be negative.")
+    return args
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+
+    # Show retry / rate-limit messages from the shared API helper on the console
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
+
+    if not args.no_cache:
+        configure_default_cache(FLICKR_CACHE_PATH or DEFAULT_CACHE_PATH)
+
+    today = datetime.now().strftime(DATE_FORMAT)
+    if args.end > today:
+        print("Warning: The range includes future dates. Data may not be available yet.")
+
+    print(f"Start Date: {args.start}")
+    print(f"End Date: {args.end}")
+    dates_to_process = date_range(args.start, args.end)
+    print(f"Processing {len(dates_to_process)} date(s) with {args.workers} worker(s).")
+
+    filepath = args.output or default_output_path(args.start, args.end, args.output_format)
+    print(f"Output {args.output_format} file will be: {filepath}")
+
+    history = None
+    if args.history is not None:
+        from history_store import FLICKR_HISTORY_PATH, HistoryStore
+
+        history = HistoryStore(args.history or FLICKR_HISTORY_PATH)
+        print(f"Fetched dates will also be stored in: {history.path}")
+
+    # Resume from the checkpoint next to the output, if there is one
+    writer, discarded_bytes = open_writer(args.output_format, filepath)
+    if discarded_bytes:
+        print(f"Discarded {discarded_bytes} bytes written after the last checkpoint.")
+    try:
+        # Get authenticated Flickr client with one connection per worker
+        flickr = get_authenticated_client(pool_size=args.workers)
+        fetch_dates(flickr, writer, dates_to_process, args.workers, history,
+                    args.min_views)
+    finally:
+        writer.close()
 
-                page_number += 1
-        print(f"Data for {current_date} written to {filepath}")
+    print(f"All processing complete. Data saved to {filepath}")
 
-    except flickrapi.exceptions.FlickrError as e:
-        print(f"Flickr API Error for date {current_date}: {e}")
-    except Exception as e:
-        print(f"An unexpected error occurred for date {current_date}: {e}")
 
-print(f"All processing complete. Data saved to {filepath}")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
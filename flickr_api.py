@@ -0,0 +1,217 @@
+"""Shared Flickr API call helper used by the Cloud Function and the CLI.
+
+``make_api_call_with_retry`` is the single place where Flickr API methods are
+invoked.  Responses are first looked up in the optional on-disk cache (see
+``flickr_cache``); on a miss, every attempt takes a token from the shared
+rate limiter (see ``flickr_ratelimit``), so parallel fetches stay within the
+hourly quota.  Failed attempts are retried with exponential backoff plus
+jitter; a Flickr rate-limit error (code 105) also penalises the shared limiter
+so that all workers back off together.  An optional ``stats`` collector
+(``run_metrics.CallStats``) records each call's latency, retries and waits.
+
+Callers that opt in to skipping flickrapi's response parsing (main.py with
+FLICKR_RAW_JSON=1) request the raw body (``format="json"``) and pass
+``parser=parse_json_response``, which decodes it with orjson when that is
+installed (falling back to the json module) and still raises FlickrError for
+error responses, so retries work unchanged.
+
+An optional ``Deadline`` bounds the whole call: no attempt starts, and no
+backoff or rate-limiter wait is begun, that would run past it.  The call
+raises ``DeadlineExceeded`` instead, so callers can stop cleanly and save
+what they already have.
+"""
+
+import json
+import logging
+import random
+import time
+
+import flickrapi
+
+try:  # Optional C decoder for raw responses; json is used without it.
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+from flickr_cache import get_default_cache
+from flickr_ratelimit import get_default_limiter
+
+MAX_RETRIES = 3  # Maximum attempts per API call
+INITIAL_RETRY_DELAY = 2  # Initial backoff in seconds
+MAX_RETRY_DELAY = 60  # Maximum backoff in seconds
+RATE_LIMIT_ERROR_CODES = (105, "Rate Limit Exceeded")
+
+logger = logging.getLogger(__name__)
+
+
+def parse_json_response(body) -> dict:
+    """Decode a raw ``format="json"`` Flickr response.
+
+    Equivalent to flickrapi's "parsed-json" parser, but decodes the bytes
+    directly (with orjson when available) instead of via an interim str.
+
+    Args:
+        body: Response body as returned by a call with format="json".
+
+    Returns:
+        The decoded response.
+
+    Raises:
+        flickrapi.exceptions.FlickrError: If Flickr answered with stat=fail.
+    """
+    parsed = orjson.loads(body) if orjson is not None else json.loads(body)
+    if parsed.get("stat", "") == "fail":
+        raise flickrapi.exceptions.FlickrError(
+            "Error: %(code)s: %(message)s" % parsed, code=parsed["code"]
+        )
+    return parsed
+
+
+class DeadlineExceeded(Exception):
+    """Raised instead of starting an attempt or wait past the deadline."""
+
+
+class Deadline:
+    """A point in time after which no new Flickr work should be started."""
+
+    def __init__(self, seconds: float, clock=time.monotonic):
+        """
+        Args:
+            seconds: Time from now until the deadline.
+            clock:   Monotonic clock function (overridable for tests).
+        """
+        self._clock = clock
+        self.expires_at = clock() + seconds
+
+    def remaining(self) -> float:
+        """Return the seconds left before the deadline (never negative)."""
+        return max(0.0, self.expires_at - self._clock())
+
+    def expired(self) -> bool:
+        """Return whether the deadline has passed."""
+        return self._clock() >= self.expires_at
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Return the jittered backoff for a zero-based retry attempt.
+
+    Uses "equal jitter": half of the exponential delay is fixed and the other
+    half is random, which spreads out retries from concurrent workers.
+    """
+    delay = min(INITIAL_RETRY_DELAY * (2 ** attempt), MAX_RETRY_DELAY)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def make_api_call_with_retry(flickr_client, method_name: str, limiter=None,
+                             cache=None, stats=None, deadline=None, parser=None,
+                             **params):
+    """Make a cached, rate-limited Flickr API call with jittered backoff.
+
+    Args:
+        flickr_client: Authenticated FlickrAPI instance.
+        method_name:   Dot-separated method name (e.g. 'stats.getPopularPhotos').
+        limiter:       TokenBucket to draw from; defaults to the process-wide
+                       limiter from flickr_ratelimit.get_default_limiter().
+        cache:         ResponseCache to consult; defaults to
+                       flickr_cache.get_default_cache() (None = disabled).
+        stats:         Optional run_metrics.CallStats that records the call's
+                       latency, attempts and time spent sleeping or waiting.
+        deadline:      Optional Deadline; attempts, backoffs and limiter waits
+                       that would not finish before it are not started.
+        parser:        Optional callable applied to each response before it
+                       is cached or returned (e.g. parse_json_response); it
+                       may raise FlickrError to trigger the usual handling.
+        **params:      Keyword arguments forwarded to the API method.
+
+    Returns:
+        API response, or None if all retries were exhausted.
+
+    Raises:
+        DeadlineExceeded: If the deadline passed before a response was received.
+        flickrapi.exceptions.FlickrError: For non-rate-limit Flickr errors.
+        Exception: For persistent non-Flickr errors after all retries.
+    """
+    limiter = limiter or get_default_limiter()
+    cache = cache or get_default_cache()
+    started = time.monotonic()
+
+    if cache is not None:
+        cached = cache.get(method_name, params)
+        if cached is not None:
+            if stats is not None:
+                stats.record_call(time.monotonic() - started, attempts=0,
+                                  cache_hit=True)
+            return cached
+
+    method = flickr_client
+    for part in method_name.split("."):
+        method = getattr(method, part)
+
+    attempts = 0
+    rate_limited = 0
+    retry_sleep = 0.0
+    limiter_wait = 0.0
+    response = None
+    try:
+        for attempt in range(MAX_RETRIES):
+            if deadline is None:
+                limiter_wait += limiter.acquire()
+            else:
+                waited = None
+                if not deadline.expired():
+                    waited = limiter.acquire(timeout=deadline.remaining())
+                if waited is None:
+                    raise DeadlineExceeded(
+                        f"{method_name}: deadline reached after {attempts} attempt(s)"
+                    )
+                limiter_wait += waited
+            attempts += 1
+            try:
+                response = method(**params)
+                if parser is not None:
+                    response = parser(response)
+                if cache is not None and isinstance(response, dict):
+                    cache.put(method_name, params, response)
+                return response
+
+            except flickrapi.exceptions.FlickrError as exc:
+                if getattr(exc, "code", None) in RATE_LIMIT_ERROR_CODES:
+                    rate_limited += 1
+                    if attempt < MAX_RETRIES - 1:
+                        retry_delay = _backoff_delay(attempt)
+                        logger.warning(
+                            "Rate limit hit. Backing off all workers for %.1fs "
+                            "(attempt %d/%d).",
+                            retry_delay, attempt + 1, MAX_RETRIES,
+                        )
+                        limiter.penalize(retry_delay)
+                        continue
+                raise
+
+            except Exception as exc:  # noqa: BLE001
+                if attempt < MAX_RETRIES - 1:
+                    retry_delay = _backoff_delay(attempt)
+                    if deadline is not None and retry_delay >= deadline.remaining():
+                        raise DeadlineExceeded(
+                            f"{method_name}: no time left to retry after {exc}"
+                        ) from exc
+                    logger.warning(
+                        "Error: %s. Retrying in %.1fs (attempt %d/%d).",
+                        exc, retry_delay, attempt + 1, MAX_RETRIES,
+                    )
+                    time.sleep(retry_delay)
+                    retry_sleep += retry_delay
+                    continue
+                raise
+
+        return None
+    finally:
+        if stats is not None:
+            stats.record_call(
+                time.monotonic() - started,
+                attempts=attempts,
+                rate_limited=rate_limited,
+                retry_sleep=retry_sleep,
+                limiter_wait=limiter_wait,
+                failed=not response,
+            )
@@ -15,14 +15,115 @@ Two authentication modes are supported:
   (``FLICKR_OAUTH_TOKEN`` and ``FLICKR_OAUTH_TOKEN_SECRET``).  Use this for
   headless environments such as Google Cloud Functions where browser interaction
   is impossible.  The token is injected at runtime via Cloud Secret Manager.
+
+Both modes return a client whose HTTP calls go through a pooled keep-alive
+``requests`` session (``create_pooled_session``), so parallel page fetches
+reuse TCP/TLS connections to api.flickr.com instead of handshaking per call.
+Pool size, timeouts and transport-level retries are configurable through the
+``FLICKR_HTTP_*`` environment variables below or per call.
+
+Optional environment variables:
+    FLICKR_HTTP_POOL_SIZE       – Keep-alive connections kept per host (default 10).
+    FLICKR_HTTP_CONNECT_TIMEOUT – Connect timeout in seconds (default 10).
+    FLICKR_HTTP_READ_TIMEOUT    – Read timeout in seconds (default 60).
+    FLICKR_HTTP_RETRIES         – Transport retries when a connection cannot be
+                                  established (default 2).
 """
 
 import os
 import webbrowser
 import flickrapi
+import requests
 from dotenv import load_dotenv
 from flickrapi.auth import FlickrAccessToken
-from typing import Tuple
+from requests.adapters import HTTPAdapter
+from typing import Optional, Tuple
+from urllib3.util.retry import Retry
+
+FLICKR_HTTP_POOL_SIZE = int(os.getenv('FLICKR_HTTP_POOL_SIZE', '10'))
+FLICKR_HTTP_CONNECT_TIMEOUT = float(os.getenv('FLICKR_HTTP_CONNECT_TIMEOUT', '10'))
+FLICKR_HTTP_READ_TIMEOUT = float(os.getenv('FLICKR_HTTP_READ_TIMEOUT', '60'))
+FLICKR_HTTP_RETRIES = int(os.getenv('FLICKR_HTTP_RETRIES', '2'))
+
+
+def create_pooled_session(pool_size: int = FLICKR_HTTP_POOL_SIZE,
+                          retries: int = FLICKR_HTTP_RETRIES) -> requests.Session:
+    """
+    Create a keep-alive requests session sized for concurrent Flickr calls.
+
+    Only failures to connect are retried at the transport level, with a short
+    backoff. Error statuses and read timeouts are left to the caller's retry
+    logic (flickr_api.make_api_call_with_retry), which also takes a rate-limit
+    token and checks the run deadline before every attempt.
+
+    Args:
+        pool_size: Connections kept alive per host; match the fetch concurrency.
+        retries: Transport-level retries per request.
+
+    Returns:
+        Configured requests.Session
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=0,
+        allowed_methods=frozenset({'GET'}),
+        backoff_factor=0.5,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def use_pooled_session(flickr: flickrapi.FlickrAPI,
+                       session: Optional[requests.Session] = None,
+                       pool_size: int = FLICKR_HTTP_POOL_SIZE) -> flickrapi.FlickrAPI:
+    """
+    Route a FlickrAPI client's HTTP calls through a pooled session.
+
+    flickrapi otherwise uses one class-level session with requests' default
+    pool for every client.
+
+    Args:
+        flickr: FlickrAPI instance to configure.
+        session: Session to use; a new pooled session is created if omitted.
+        pool_size: Pool size for a newly created session.
+
+    Returns:
+        The same FlickrAPI instance, for chaining.
+    """
+    flickr.flickr_oauth.session = session or create_pooled_session(pool_size)
+    return flickr
+
+
+def connection_stats(flickr: flickrapi.FlickrAPI) -> dict:
+    """
+    Summarise connection reuse for a client's HTTP session.
+
+    Args:
+        flickr: FlickrAPI instance (ideally configured via use_pooled_session).
+
+    Returns:
+        Dict with 'requests' sent and 'connections' opened; the ratio shows
+        how many calls each TCP/TLS handshake was amortised over.
+    """
+    stats = {'requests': 0, 'connections': 0}
+    adapters = {id(adapter): adapter
+                for adapter in flickr.flickr_oauth.session.adapters.values()}
+    for adapter in adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            stats['requests'] += pool.num_requests
+            stats['connections'] += pool.num_connections
+    return stats
 
 
 def load_credentials() -> Tuple[str, str]:
@@ -49,7 +150,8 @@ def load_credentials() -> Tuple[str, str]:
     return api_key, api_secret
 
 
-def authenticate_flickr(api_key: str, api_secret: str) -> flickrapi.FlickrAPI:
+def authenticate_flickr(api_key: str, api_secret: str,
+                        pool_size: int = FLICKR_HTTP_POOL_SIZE) -> flickrapi.FlickrAPI:
     """
     Authenticate with Flickr API using OAuth.
 
@@ -59,11 +161,16 @@ def authenticate_flickr(api_key: str, api_secret: str) -> flickrapi.FlickrAPI:
     Args:
         api_key: Flickr API key
         api_secret: Flickr API secret
+        pool_size: Keep-alive connection pool size for the client's session
 
     Returns:
         Authenticated FlickrAPI instance with parsed-json format
     """
-    flickr = flickrapi.FlickrAPI(api_key, api_secret, format='parsed-json')
+    flickr = flickrapi.FlickrAPI(
+        api_key, api_secret, format='parsed-json',
+        timeout=(FLICKR_HTTP_CONNECT_TIMEOUT, FLICKR_HTTP_READ_TIMEOUT),
+    )
+    use_pooled_session(flickr, pool_size=pool_size)
 
     # Only authenticate if we don't have a valid token already
     if not flickr.token_valid(perms='read'):
@@ -87,12 +194,15 @@ def authenticate_flickr(api_key: str, api_secret: str) -> flickrapi.FlickrAPI:
     return flickr
 
 
-def get_authenticated_client() -> flickrapi.FlickrAPI:
+def get_authenticated_client(pool_size: int = FLICKR_HTTP_POOL_SIZE) -> flickrapi.FlickrAPI:
     """
     Get an authenticated Flickr API client.
 
     This is a convenience function that combines credential loading and authentication.
 
+    Args:
+        pool_size: Keep-alive connection pool size; match the fetch concurrency
+
     Returns:
         Authenticated FlickrAPI instance
 
@@ -100,10 +210,12 @@ def get_authenticated_client() -> flickrapi.FlickrAPI:
         ValueError: If credentials are missing from environment
     """
     api_key, api_secret = load_credentials()
-    return authenticate_flickr(api_key, api_secret)
+    return authenticate_flickr(api_key, api_secret, pool_size=pool_size)
 
 
-def get_cloud_authenticated_client() -> flickrapi.FlickrAPI:
+def get_cloud_authenticated_client(
+    pool_size: int = FLICKR_HTTP_POOL_SIZE,
+) -> flickrapi.FlickrAPI:
     """Get an authenticated Flickr API client for headless / cloud environments.
 
     Instead of launching a browser, this function reconstructs the OAuth
@@ -118,6 +230,9 @@ def get_cloud_authenticated_client() -> flickrapi.FlickrAPI:
         FLICKR_OAUTH_TOKEN        – OAuth access token.
         FLICKR_OAUTH_TOKEN_SECRET – OAuth access token secret.
 
+    Args:
+        pool_size: Keep-alive connection pool size; match the fetch concurrency.
+
     Returns:
         Authenticated FlickrAPI instance with parsed-json format.
 
@@ -144,10 +259,12 @@ def get_cloud_authenticated_client() -> flickrapi.FlickrAPI:
 
     token = FlickrAccessToken(oauth_token, oauth_token_secret, "read")
 
-    return flickrapi.FlickrAPI(
+    flickr = flickrapi.FlickrAPI(
         api_key,
         api_secret,
         token=token,
         format="parsed-json",
         store_token=False,
-    )
\ No newline at end of file
+        timeout=(FLICKR_HTTP_CONNECT_TIMEOUT, FLICKR_HTTP_READ_TIMEOUT),
+    )
+    return use_pooled_session(flickr, pool_size=pool_size)
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""Persistent on-disk cache for Flickr API responses.
+
+Flickr stats for a day stop changing roughly 28 days after that day, so
+re-running a backfill or reloading a notebook should not have to download the
+same pages again.  ``ResponseCache`` stores parsed-JSON responses in a single
+SQLite file, zlib-compressed and keyed by method name plus call parameters:
+
+* Responses for *closed* dates (older than ``CLOSED_DATE_AGE_DAYS``) never
+  expire.
+* Responses for recent dates, or calls without a ``date`` parameter, expire
+  after ``FLICKR_CACHE_RECENT_TTL`` seconds.
+* The total stored size is capped at ``FLICKR_CACHE_MAX_BYTES``; the least
+  recently used entries are evicted first.
+
+``flickr_api.make_api_call_with_retry`` consults ``get_default_cache()`` before
+taking a rate-limit token, so a cache hit costs no API call at all.
+
+Environment variables (optional):
+    FLICKR_CACHE_PATH       – SQLite file to use. Unset disables the cache
+                              (the CLI supplies its own default path).
+    FLICKR_CACHE_MAX_BYTES  – Size cap in bytes (default 256 MiB).
+    FLICKR_CACHE_RECENT_TTL – TTL in seconds for recent dates (default 3600).
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+
+FLICKR_CACHE_PATH = os.getenv("FLICKR_CACHE_PATH")
+FLICKR_CACHE_MAX_BYTES = int(os.getenv("FLICKR_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+FLICKR_CACHE_RECENT_TTL = int(os.getenv("FLICKR_CACHE_RECENT_TTL", "3600"))
+CLOSED_DATE_AGE_DAYS = 28  # Stats for dates older than this no longer change
+DATE_FORMAT = "%Y-%m-%d"
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key         TEXT PRIMARY KEY,
+    value       BLOB NOT NULL,
+    size        INTEGER NOT NULL,
+    expires_at  REAL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+"""
+
+
+class ResponseCache:
+    """SQLite-backed, size-capped LRU cache of Flickr API responses."""
+
+    def __init__(self, path: str, max_bytes: int = FLICKR_CACHE_MAX_BYTES,
+                 recent_ttl: int = FLICKR_CACHE_RECENT_TTL, clock=time.time):
+        """
+        Args:
+            path:       SQLite file path; parent directories are created.
+            max_bytes:  Maximum total size of stored (compressed) responses.
+            recent_ttl: Lifetime in seconds of entries for open dates.
+            clock:      Wall-clock function (overridable for tests).
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.recent_ttl = recent_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(method_name: str, params: dict) -> str:
+        """Build the cache key for a method call."""
+        return json.dumps([method_name, sorted(params.items())], separators=(",", ":"))
+
+    def ttl_for(self, params: dict):
+        """Return the TTL in seconds for a call, or None for "never expires"."""
+        date = params.get("date")
+        if not date:
+            return self.recent_ttl
+        try:
+            day = datetime.strptime(str(date), DATE_FORMAT).date()
+        except ValueError:
+            return self.recent_ttl
+
+        today = datetime.fromtimestamp(self._clock(), timezone.utc).date()
+        if day < today - timedelta(days=CLOSED_DATE_AGE_DAYS):
+            return None
+        return self.recent_ttl
+
+    def get(self, method_name: str, params: dict):
+        """Return the cached response for a call, or None on a miss."""
+        key = self.make_key(method_name, params)
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(zlib.decompress(value))
+
+    def put(self, method_name: str, params: dict, response) -> None:
+        """Store a JSON-serialisable response and evict old entries if needed."""
+        key = self.make_key(method_name, params)
+        value = zlib.compress(
+            json.dumps(response, separators=(",", ":")).encode("utf-8")
+        )
+        now = self._clock()
+        ttl = self.ttl_for(params)
+        expires_at = None if ttl is None else now + ttl
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), expires_at, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then least recently used ones, until under the cap."""
+        self._conn.execute(
+            "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (self._clock(),),
+        )
+        (total,) = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        logger.info("Evicted %d cached responses to stay under %d bytes.",
+                    evicted, self.max_bytes)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size of the cache."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses,
+                "entries": entries, "bytes": size}
+
+    def close(self) -> None:
+        """Close the underlying SQLite connection."""
+        with self._lock:
+            self._conn.close()
+
+
+_default_cache = None
+_default_cache_configured = False
+_default_cache_lock = threading.Lock()
+
+
+def configure_default_cache(path):
+    """Set (or disable, with None) the cache used by make_api_call_with_retry.
+
+    Args:
+        path: SQLite file path, or None to disable caching.
+
+    Returns:
+        The new default ResponseCache, or None.
+    """
+    global _default_cache, _default_cache_configured
+    with _default_cache_lock:
+        if _default_cache is not None:
+            _default_cache.close()
+        _default_cache = ResponseCache(path) if path else None
+        _default_cache_configured = True
+        return _default_cache
+
+
+def get_default_cache():
+    """Return the process-wide ResponseCache, or None when caching is off.
+
+    On first use the cache is opened from FLICKR_CACHE_PATH unless
+    configure_default_cache() has already been called.
+    """
+    global _default_cache, _default_cache_configured
+    with _default_cache_lock:
+        if not _default_cache_configured:
+            _default_cache = (
+                ResponseCache(FLICKR_CACHE_PATH) if FLICKR_CACHE_PATH else None
+            )
+            _default_cache_configured = True
+        return _default_cache
@@ -0,0 +1,109 @@
+"""Checkpoint manifest for resumable date-range extractions.
+
+``flickrGetDailyPhotoViews.py`` appends rows for many dates to one output
+file.  The manifest, stored next to the output as ``<output>.checkpoint.json``,
+records every completed (date, page) together with the output file size right
+after that page was flushed.  On restart:
+
+* Dates marked complete are skipped.
+* The output is truncated back to the last recorded size, which drops any rows
+  written after the last checkpoint (a partly written page or date).
+* A date that was interrupted resumes from the page after its last completed
+  page.
+
+The manifest is rewritten atomically (temp file + ``os.replace``) after each
+page, so a crash never leaves it half-written.
+"""
+
+import json
+import os
+
+CHECKPOINT_SUFFIX = '.checkpoint.json'
+
+
+class CheckpointManifest:
+    """Tracks completed pages of a date-range extraction into one output file."""
+
+    def __init__(self, output_path: str):
+        """
+        Args:
+            output_path: Path of the output file the checkpoint describes.
+        """
+        self.output_path = output_path
+        self.path = output_path + CHECKPOINT_SUFFIX
+        self.dates = {}
+        self.committed_offset = 0
+
+        if os.path.exists(self.path):
+            with open(self.path) as manifest_file:
+                data = json.load(manifest_file)
+            self.dates = data.get('dates', {})
+            self.committed_offset = data.get('committed_offset', 0)
+        elif os.path.exists(output_path):
+            # Output written before checkpointing existed: keep it as-is and
+            # only protect what we append from now on.
+            self.committed_offset = os.path.getsize(output_path)
+
+    def prepare_output(self) -> int:
+        """Truncate the output to the last checkpointed size.
+
+        Returns:
+            Number of bytes discarded.
+        """
+        if not os.path.exists(self.output_path):
+            return 0
+
+        size = os.path.getsize(self.output_path)
+        if size <= self.committed_offset:
+            return 0
+
+        os.truncate(self.output_path, self.committed_offset)
+        return size - self.committed_offset
+
+    def is_date_complete(self, date: str) -> bool:
+        """Return True if every page of date has been written."""
+        return self.dates.get(date, {}).get('complete', False)
+
+    def next_page(self, date: str) -> int:
+        """Return the first page of date that still needs to be fetched."""
+        return self.dates.get(date, {}).get('pages_done', 0) + 1
+
+    def record_page(self, date: str, page: int, total_pages: int, offset: int) -> None:
+        """Record that page of date was flushed and the output is offset bytes long.
+
+        Args:
+            date:        Date string in YYYY-MM-DD format.
+            page:        Page number that was just written.
+            total_pages: Page count reported by Flickr for date.
+            offset:      Output file size after the page was flushed.
+        """
+        self.dates[date] = {
+            'pages_done': page,
+            'total_pages': total_pages,
+            'complete': page >= total_pages,
+        }
+        self.committed_offset = offset
+        self.save()
+
+    def mark_date_complete(self, date: str, offset: int) -> None:
+        """Mark date as complete, e.g. when Flickr reported no pages for it."""
+        entry = self.dates.setdefault(date, {'pages_done': 0, 'total_pages': 0})
+        entry['complete'] = True
+        self.committed_offset = offset
+        self.save()
+
+    def save(self) -> None:
+        """Atomically write the manifest to disk."""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as manifest_file:
+            json.dump(
+                {
+                    'output': os.path.basename(self.output_path),
+                    'committed_offset': self.committed_offset,
+                    'dates': self.dates,
+                },
+                manifest_file,
+                indent=2,
+                sort_keys=True,
+            )
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,257 @@
+"""Output writers for ``flickrGetDailyPhotoViews.py``.
+
+Rows are plain tuples in ``EXPORT_COLUMNS`` order and are handed over one
+whole date at a time (a list of pages).  Three formats are supported:
+
+* ``tsv``     – tab-separated text with a header row (the original format).
+* ``ndjson``  – one JSON object per line, typed like the BigQuery schema, so
+                the file can be loaded with ``bq load`` or read by pandas,
+                DuckDB, Spark, etc.
+* ``parquet`` – a Hive-partitioned dataset directory with one
+                ``Date=YYYY-MM-DD/part-0.parquet`` file per date (needs the
+                optional ``pyarrow`` package).
+
+The text formats append to a single file through a large write buffer and
+are checkpointed with ``flickr_checkpoint.CheckpointManifest`` after each date,
+so an interrupted export resumes where it stopped.  Parquet files cannot be
+appended to, so every date is written to a temporary file and renamed into
+place once complete; a date whose file exists is finished.
+"""
+
+import csv
+import json
+import os
+
+from flickr_checkpoint import CheckpointManifest
+
+EXPORT_FORMATS = ('tsv', 'ndjson', 'parquet')
+EXPORT_COLUMNS = ['Date', 'Photo ID', 'Photo Title', 'Daily Views',
+                  'Daily Favorites', 'Secret', 'Server']
+TSV_DELIMITER = '\t'
+WRITE_BUFFER_BYTES = 1 << 20  # 1 MiB between flushes to disk
+PARQUET_PART_NAME = 'part-0.parquet'
+
+
+def photo_row(date: str, photo: dict) -> tuple:
+    """Return one stats.getPopularPhotos photo as a row in EXPORT_COLUMNS order."""
+    stats = photo['stats']
+    return (date, int(photo['id']), photo['title'], int(stats['views']),
+            int(stats['favorites']), photo['secret'], photo['server'])
+
+
+class _AppendingWriter:
+    """Base class for formats written by appending to one checkpointed file."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Output file path.
+        """
+        self.path = path
+        self.manifest = CheckpointManifest(path)
+        self._file = None
+
+    def open(self) -> int:
+        """Open the output for appending, dropping rows after the last checkpoint.
+
+        Returns:
+            Number of bytes discarded from an interrupted previous run.
+        """
+        discarded = self.manifest.prepare_output()
+        self._file = open(self.path, mode='a', newline='', encoding='utf-8',
+                          buffering=WRITE_BUFFER_BYTES)
+        if self._file.tell() == 0:
+            self._write_header()
+        return discarded
+
+    def is_date_complete(self, date: str) -> bool:
+        return self.manifest.is_date_complete(date)
+
+    def next_page(self, date: str) -> int:
+        return self.manifest.next_page(date)
+
+    def write_date(self, date: str, first_page: int, pages: list, total_pages: int) -> None:
+        """Append the fetched pages of a date and checkpoint them.
+
+        Args:
+            date:        Date string in YYYY-MM-DD format.
+            first_page:  Page number of pages[0].
+            pages:       Consecutive pages, each a list of row tuples.
+            total_pages: Page count reported by Flickr for date.
+        """
+        for rows in pages:
+            self._write_rows(rows)
+
+        # Checkpoint only once the rows are on disk
+        self._file.flush()
+        offset = os.fstat(self._file.fileno()).st_size
+        if total_pages == 0:
+            self.manifest.mark_date_complete(date, offset)
+        elif pages:
+            self.manifest.record_page(date, first_page + len(pages) - 1,
+                                      total_pages, offset)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_header(self) -> None:
+        pass
+
+    def _write_rows(self, rows: list) -> None:
+        raise NotImplementedError
+
+
+class TsvWriter(_AppendingWriter):
+    """Tab-separated output with a header row."""
+
+    def open(self) -> int:
+        discarded = super().open()
+        self._writer = csv.writer(self._file, delimiter=TSV_DELIMITER)
+        return discarded
+
+    def _write_header(self) -> None:
+        csv.writer(self._file, delimiter=TSV_DELIMITER).writerow(EXPORT_COLUMNS)
+
+    def _write_rows(self, rows: list) -> None:
+        self._writer.writerows(rows)
+
+
+class NdjsonWriter(_AppendingWriter):
+    """Newline-delimited JSON output, one object per row."""
+
+    def _write_rows(self, rows: list) -> None:
+        self._file.writelines(
+            json.dumps(
+                {
+                    'Date': date,
+                    'Photo ID': photo_id,
+                    'Photo Title': title,
+                    'Daily Views': views,
+                    'Daily Favorites': favorites,
+                    'Secret': secret,
+                    'Server': int(server),
+                },
+                ensure_ascii=False,
+            ) + '\n'
+            for date, photo_id, title, views, favorites, secret, server in rows
+        )
+
+
+class ParquetDatasetWriter:
+    """Hive-partitioned Parquet dataset with one file per date.
+
+    The Date column is carried by the ``Date=YYYY-MM-DD`` directory name, as
+    pyarrow.dataset, pandas, DuckDB and Spark expect for partitioned data.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Dataset root directory.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError(
+                "Parquet output requires pyarrow: pip install pyarrow") from exc
+
+        self.path = path
+        self._pa = pa
+        self._pq = pq
+        self.schema = pa.schema([
+            ('Photo ID', pa.int64()),
+            ('Photo Title', pa.string()),
+            ('Daily Views', pa.int64()),
+            ('Daily Favorites', pa.int64()),
+            ('Secret', pa.string()),
+            ('Server', pa.int64()),
+        ])
+
+    def part_path(self, date: str) -> str:
+        return os.path.join(self.path, f'Date={date}', PARQUET_PART_NAME)
+
+    def open(self) -> int:
+        os.makedirs(self.path, exist_ok=True)
+        return 0
+
+    def is_date_complete(self, date: str) -> bool:
+        return os.path.exists(self.part_path(date))
+
+    def next_page(self, date: str) -> int:
+        return 1
+
+    def write_date(self, date: str, first_page: int, pages: list, total_pages: int) -> None:
+        """Write a date's file if every page was fetched; otherwise skip it.
+
+        Args:
+            date:        Date string in YYYY-MM-DD format.
+            first_page:  Page number of pages[0] (always 1 for Parquet).
+            pages:       Consecutive pages, each a list of row tuples.
+            total_pages: Page count reported by Flickr for date.
+        """
+        if first_page + len(pages) - 1 < total_pages:
+            print(f"Not writing {date}: only {len(pages)} of {total_pages} pages "
+                  "were fetched. It will be retried on the next run.")
+            return
+
+        self.write_rows(date, [row for page in pages for row in page])
+
+    def write_rows(self, date: str, rows: list) -> None:
+        """Atomically write (or replace) the file holding all rows of a date.
+
+        Args:
+            date: Date string in YYYY-MM-DD format.
+            rows: Row tuples in EXPORT_COLUMNS order.
+        """
+        columns = list(zip(*rows)) if rows else [()] * len(EXPORT_COLUMNS)
+        table = self._pa.Table.from_arrays(
+            [
+                self._pa.array(columns[1], type=self._pa.int64()),
+                self._pa.array(columns[2], type=self._pa.string()),
+                self._pa.array(columns[3], type=self._pa.int64()),
+                self._pa.array(columns[4], type=self._pa.int64()),
+                self._pa.array(columns[5], type=self._pa.string()),
+                self._pa.array([int(server) for server in columns[6]],
+                               type=self._pa.int64()),
+            ],
+            schema=self.schema,
+        )
+
+        part_path = self.part_path(date)
+        os.makedirs(os.path.dirname(part_path), exist_ok=True)
+        # Dot-prefixed, so readers skip a temp file left behind by a crash
+        tmp_path = os.path.join(os.path.dirname(part_path), f'.{PARQUET_PART_NAME}.tmp')
+        self._pq.write_table(table, tmp_path, compression='zstd')
+        os.replace(tmp_path, part_path)
+
+    def close(self) -> None:
+        pass
+
+
+def open_writer(output_format: str, path: str):
+    """Return an opened writer for output_format and the bytes it discarded.
+
+    Args:
+        output_format: One of EXPORT_FORMATS.
+        path:          Output file (or dataset directory for Parquet).
+
+    Returns:
+        Tuple of (writer, discarded_bytes).
+
+    Raises:
+        ValueError:  If output_format is unknown.
+        ImportError: If Parquet is requested without pyarrow installed.
+    """
+    writers = {'tsv': TsvWriter, 'ndjson': NdjsonWriter,
+               'parquet': ParquetDatasetWriter}
+    if output_format not in writers:
+        raise ValueError(f"Unknown format {output_format!r}; expected one of "
+                         f"{EXPORT_FORMATS}.")
+    writer = writers[output_format](path)
+    return writer, writer.open()
@@ -0,0 +1,200 @@
+"""Proactive rate limiting for Flickr API calls.
+
+Flickr enforces a per-key quota of roughly 3,600 requests per hour and answers
+with error 105 once it is exceeded.  Instead of discovering the limit through
+failures, every call made through ``flickr_api.make_api_call_with_retry``
+first takes a token from a shared token bucket:
+
+* The bucket refills at ``FLICKR_HOURLY_QUOTA / 3600`` tokens per second and
+  holds at most ``FLICKR_RATE_BURST`` tokens, so short bursts go out
+  immediately while sustained traffic is held at the quota.
+* Callers that have to wait sleep for the time their token becomes available
+  plus a small random jitter, so concurrent workers don't wake in lock-step.
+* A rate-limit error reported by Flickr can ``penalize`` the bucket, pushing
+  every worker back at once rather than each one learning about it separately.
+
+One process-wide bucket is returned by ``get_default_limiter()`` and is shared
+by threads (``acquire``), asyncio tasks (``acquire_async``) and the CLI.
+``stats()`` exposes counters for tokens consumed and time spent waiting.
+
+Environment variables (optional):
+    FLICKR_HOURLY_QUOTA – Requests allowed per hour (default 3600).
+    FLICKR_RATE_BURST   – Bucket capacity, i.e. maximum burst (default 50).
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+
+FLICKR_HOURLY_QUOTA = int(os.getenv("FLICKR_HOURLY_QUOTA", "3600"))
+FLICKR_RATE_BURST = int(os.getenv("FLICKR_RATE_BURST", "50"))
+RATE_LIMIT_JITTER = 0.25  # Maximum extra random delay per wait, in seconds
+
+
+class TokenBucket:
+    """Thread-safe token bucket with reservation semantics.
+
+    Each ``acquire`` reserves one token immediately, letting the token count
+    go negative, and returns how long the caller must wait before using it.
+    Waiting callers therefore queue up fairly without polling.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: int,
+                 jitter: float = RATE_LIMIT_JITTER, clock=time.monotonic):
+        """
+        Args:
+            rate_per_second: Sustained refill rate in tokens per second.
+            capacity:        Maximum number of tokens (burst size).
+            jitter:          Maximum random delay added to each wait, in seconds.
+            clock:           Monotonic clock function (overridable for tests).
+        """
+        if rate_per_second <= 0 or capacity < 1:
+            raise ValueError("rate_per_second must be > 0 and capacity >= 1")
+
+        self.rate = float(rate_per_second)
+        self.capacity = float(capacity)
+        self.jitter = jitter
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._paused_until = self._updated
+
+        self._tokens_consumed = 0
+        self._waits = 0
+        self._wait_seconds = 0.0
+        self._penalties = 0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        # No tokens accrue while a penalty pause is in effect.
+        elapsed = now - max(self._updated, self._paused_until)
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = max(self._updated, now)
+
+    def _reserve(self, tokens: int = 1) -> float:
+        """Take tokens and return the delay before they may be used."""
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            self._tokens_consumed += tokens
+            paused = max(self._paused_until - self._updated, 0.0)
+            if self._tokens >= 0 and not paused:
+                return 0.0
+            delay = (paused + max(-self._tokens, 0.0) / self.rate
+                     + random.uniform(0, self.jitter))
+            self._waits += 1
+            self._wait_seconds += delay
+            return delay
+
+    def _cancel(self, delay: float, tokens: int = 1) -> None:
+        """Hand back tokens reserved by ``_reserve`` that will not be used."""
+        with self._lock:
+            self._tokens += tokens
+            self._tokens_consumed -= tokens
+            if delay > 0:
+                self._waits -= 1
+                self._wait_seconds -= delay
+
+    def acquire(self, timeout: float = None, tokens: int = 1):
+        """Block the calling thread until a token is available.
+
+        Args:
+            timeout: Maximum seconds to wait. If the token would only be
+                     available later, it is handed back straight away.
+            tokens:  Number of tokens to take at once (e.g. the expected
+                     calls of a batch of work dispatched elsewhere).
+
+        Returns:
+            Seconds spent waiting, or None if the wait would exceed timeout.
+        """
+        delay = self._reserve(tokens)
+        if timeout is not None and delay > timeout:
+            self._cancel(delay, tokens)
+            return None
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    async def acquire_async(self) -> float:
+        """Asyncio counterpart of ``acquire`` that does not block the loop.
+
+        Returns:
+            Seconds spent waiting.
+        """
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def debit(self, tokens: int) -> None:
+        """Charge tokens that were spent without ``acquire``.
+
+        Used when the calls were made elsewhere (e.g. by a Cloud Function
+        instance a backfill coordinator dispatched work to): later ``acquire``
+        calls wait until the debt has been refilled. A negative count refunds
+        tokens that were reserved but not used, up to the bucket's capacity.
+
+        Args:
+            tokens: Number of requests to account for.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens - tokens)
+            self._tokens_consumed += tokens
+
+    def penalize(self, seconds: float) -> None:
+        """Push back every caller by ``seconds`` after Flickr reports a limit.
+
+        Penalties overlap rather than add up: when several workers hit the
+        limit at once, tokens are handed out again ``seconds`` after the
+        latest report, not after the sum of them.
+
+        Args:
+            seconds: How long no new tokens should be handed out.
+        """
+        with self._lock:
+            self._refill()
+            self._paused_until = max(self._paused_until, self._updated + seconds)
+            self._tokens = min(self._tokens, 0.0)
+            self._penalties += 1
+
+    def stats(self) -> dict:
+        """Return a snapshot of the bucket's counters.
+
+        Returns:
+            Dict with tokens_consumed, waits, wait_seconds, penalties and
+            tokens_available.
+        """
+        with self._lock:
+            self._refill()
+            return {
+                "tokens_consumed": self._tokens_consumed,
+                "waits": self._waits,
+                "wait_seconds": round(self._wait_seconds, 3),
+                "penalties": self._penalties,
+                "tokens_available": round(max(self._tokens, 0.0), 3),
+            }
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_default_limiter() -> TokenBucket:
+    """Return the process-wide limiter shared by all Flickr calls.
+
+    Returns:
+        TokenBucket sized from FLICKR_HOURLY_QUOTA and FLICKR_RATE_BURST.
+    """
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = TokenBucket(
+                rate_per_second=FLICKR_HOURLY_QUOTA / 3600.0,
+                capacity=FLICKR_RATE_BURST,
+            )
+        return _default_limiter
@@ -0,0 +1,363 @@
+"""Local Parquet history of daily photo stats, with fast query helpers.
+
+The store is a Hive-partitioned Parquet dataset with one
+``Date=YYYY-MM-DD/part-0.parquet`` file per date, in the layout written by
+``flickr_export.ParquetDatasetWriter``.  It is fed by the extractor: run
+``flickrGetDailyPhotoViews.py --history`` (or ``--format parquet --output``
+pointed at the store).  New dates add files.  Re-fetching a date replaces its
+file atomically, so the store never holds duplicates.
+
+Queries read through ``pyarrow.dataset``:
+
+* Date bounds are pushed down to the partition directories, so only the
+  files for the requested dates are opened.
+* Photo ID filters are pushed down to Parquet row-group statistics.
+* Only the columns a query needs are read.
+
+The aggregations run as NumPy array operations over the loaded columns, with
+no Python-level loop per row:
+
+* ``top_photos``   – photos with the most views (or favorites) in a range.
+* ``rolling_views`` – per-photo trailing N-day view totals (e.g. 7 or 30).
+* ``day_over_day`` – per-photo change in daily views from the previous day.
+
+A day on which a photo is missing from the stats counts as 0 views.  All
+helpers return ``pyarrow.Table`` objects; call ``.to_pandas()`` for a
+DataFrame.
+
+Requires the optional ``pyarrow`` and ``numpy`` packages (see
+requirements-local.txt).
+
+Usage:
+    python history_store.py dates
+    python history_store.py top --start 2024-01-01 --end 2024-12-31 -n 20
+    python history_store.py rolling --window 30 --start 2024-06-01 --photo-id 5312345
+    python history_store.py deltas --start 2024-06-01 -n 20
+
+Environment variables (optional):
+    FLICKR_HISTORY_PATH – Dataset root directory (default .flickr_history).
+"""
+
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+except ImportError as exc:  # pragma: no cover - optional dependencies
+    raise ImportError(
+        "history_store requires pyarrow and numpy: "
+        "pip install -r requirements-local.txt") from exc
+
+from flickr_export import ParquetDatasetWriter
+
+FLICKR_HISTORY_PATH = os.getenv("FLICKR_HISTORY_PATH", ".flickr_history")
+DATE_FORMAT = "%Y-%m-%d"
+PARTITION_PREFIX = "Date="
+METRICS = ("Daily Views", "Daily Favorites")
+_EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()  # date32 counts days from here
+
+PARTITIONING = ds.partitioning(pa.schema([("Date", pa.date32())]), flavor="hive")
+
+
+def _parse_date(value: str):
+    return datetime.strptime(value, DATE_FORMAT).date()
+
+
+def _to_dates(days: np.ndarray) -> pa.Array:
+    """Convert days since the epoch back to a date32 array."""
+    return pa.array(days.astype(np.int32), type=pa.int32()).cast(pa.date32())
+
+
+class HistoryStore:
+    """Date-partitioned Parquet dataset of daily photo stats."""
+
+    def __init__(self, path: str = FLICKR_HISTORY_PATH):
+        """
+        Args:
+            path: Dataset root directory (created on first write).
+        """
+        self.path = path
+        self._writer = ParquetDatasetWriter(path)
+
+    # -- writing ------------------------------------------------------------
+
+    def write_date(self, date: str, rows: list) -> None:
+        """Store all rows of one date, replacing any previous copy of it.
+
+        Args:
+            date: Date string in YYYY-MM-DD format.
+            rows: Row tuples in flickr_export.EXPORT_COLUMNS order.
+        """
+        self._writer.write_rows(date, rows)
+
+    def stored_dates(self) -> list:
+        """Return the sorted dates present in the store."""
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(
+            name[len(PARTITION_PREFIX):]
+            for name in os.listdir(self.path)
+            if name.startswith(PARTITION_PREFIX)
+            and os.path.exists(self._writer.part_path(name[len(PARTITION_PREFIX):]))
+        )
+
+    # -- reading ------------------------------------------------------------
+
+    def read(self, start: str = None, end: str = None, columns: list = None,
+             photo_ids: list = None, dates: list = None) -> pa.Table:
+        """Read rows for an inclusive date range.
+
+        Args:
+            start:     First date (YYYY-MM-DD), or None for the earliest.
+            end:       Last date (YYYY-MM-DD), or None for the latest.
+            columns:   Columns to read (Date is always included).
+            photo_ids: Restrict to these photo IDs.
+            dates:     Restrict to these dates (strings or datetime.date).
+
+        Returns:
+            pyarrow.Table with a date32 Date column.
+        """
+        if not self.stored_dates():
+            return pa.table({"Date": pa.array([], pa.date32())})
+
+        dataset = ds.dataset(self.path, format="parquet", partitioning=PARTITIONING)
+        condition = None
+        if start is not None:
+            condition = ds.field("Date") >= _parse_date(start)
+        if end is not None:
+            upper = ds.field("Date") <= _parse_date(end)
+            condition = upper if condition is None else condition & upper
+        if photo_ids is not None:
+            ids = ds.field("Photo ID").isin(pa.array(photo_ids, pa.int64()))
+            condition = ids if condition is None else condition & ids
+        if dates is not None:
+            dates = [_parse_date(value) if isinstance(value, str) else value
+                     for value in dates]
+            listed = ds.field("Date").isin(pa.array(dates, pa.date32()))
+            condition = listed if condition is None else condition & listed
+
+        if columns is not None:
+            columns = ["Date"] + [name for name in columns if name != "Date"]
+        return dataset.to_table(columns=columns, filter=condition)
+
+    def _read_arrays(self, start, end, metric, photo_ids, lookback_days):
+        """Return (photo ids, days since epoch, metric) sorted by photo then day.
+
+        The range is extended lookback_days before start so windowed
+        calculations are complete on the first requested date. Duplicate
+        (photo, date) rows keep their first occurrence.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {METRICS}.")
+        if start is not None and lookback_days:
+            start = (_parse_date(start) - timedelta(days=lookback_days)).strftime(DATE_FORMAT)
+
+        table = self.read(start, end, ["Photo ID", metric], photo_ids)
+        if table.num_rows == 0:
+            empty = np.array([], dtype=np.int64)
+            return empty, empty, empty
+
+        ids = table["Photo ID"].to_numpy()
+        days = pc.cast(table["Date"], pa.int32()).to_numpy().astype(np.int64)
+        values = table[metric].to_numpy()
+
+        order = np.lexsort((days, ids))
+        ids, days, values = ids[order], days[order], values[order]
+        keep = np.ones(len(ids), dtype=bool)
+        keep[1:] = (ids[1:] != ids[:-1]) | (days[1:] != days[:-1])
+        return ids[keep], days[keep], values[keep]
+
+    @staticmethod
+    def _photo_keys(ids: np.ndarray, days: np.ndarray, margin: int):
+        """Return sortable (photo, day) keys with margin empty days between photos."""
+        _, photo_index = np.unique(ids, return_inverse=True)
+        first_day = days.min()
+        span = int(days.max() - first_day) + margin + 1
+        return photo_index.astype(np.int64) * span + (days - first_day)
+
+    # -- queries ------------------------------------------------------------
+
+    def top_photos(self, n: int = 10, start: str = None, end: str = None,
+                   metric: str = "Daily Views") -> pa.Table:
+        """Return the n photos with the highest metric total in a date range.
+
+        Args:
+            n:      Number of photos to return.
+            start:  First date (YYYY-MM-DD), or None for the earliest.
+            end:    Last date (YYYY-MM-DD), or None for the latest.
+            metric: "Daily Views" or "Daily Favorites".
+
+        Returns:
+            Table of Photo ID, Photo Title (latest), Total and Days (dates on
+            which the photo appeared), highest total first.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {METRICS}.")
+        if n < 1:
+            raise ValueError("n must be at least 1.")
+        table = self.read(start, end, ["Photo ID", metric])
+        if table.num_rows == 0:
+            return pa.table({"Photo ID": pa.array([], pa.int64()),
+                             "Photo Title": pa.array([], pa.string()),
+                             "Total": pa.array([], pa.int64()),
+                             "Days": pa.array([], pa.int64())})
+
+        totals = table.group_by("Photo ID").aggregate(
+            [(metric, "sum"), ("Date", "count"), ("Date", "max")])
+        top = totals.take(pc.select_k_unstable(
+            totals, n, [(f"{metric}_sum", "descending"), ("Photo ID", "ascending")]))
+
+        # Titles come from each photo's latest date only, so just those
+        # partitions are read instead of the title column of the whole range.
+        latest = top["Date_max"]
+        titles = self.read(
+            columns=["Photo ID", "Photo Title"],
+            photo_ids=top["Photo ID"].to_pylist(),
+            dates=pc.unique(latest).to_pylist(),
+        )
+        keys = pc.binary_join_element_wise(
+            pc.cast(titles["Photo ID"], pa.string()),
+            pc.cast(titles["Date"], pa.string()), ":")
+        wanted = pc.binary_join_element_wise(
+            pc.cast(top["Photo ID"], pa.string()), pc.cast(latest, pa.string()), ":")
+
+        return pa.table({
+            "Photo ID": top["Photo ID"],
+            "Photo Title": titles["Photo Title"].take(pc.index_in(wanted, keys)),
+            "Total": pc.cast(top[f"{metric}_sum"], pa.int64()),
+            "Days": top["Date_count"],
+        })
+
+    def rolling_views(self, window: int = 7, start: str = None, end: str = None,
+                      photo_ids: list = None, metric: str = "Daily Views") -> pa.Table:
+        """Return each photo's trailing window-day total for every stored row.
+
+        The total for a date covers that date and the window - 1 days before
+        it, including days before start.
+
+        Args:
+            window:    Window length in days (e.g. 7 or 30).
+            start:     First date (YYYY-MM-DD) to report, or None.
+            end:       Last date (YYYY-MM-DD) to report, or None.
+            photo_ids: Restrict to these photo IDs.
+            metric:    "Daily Views" or "Daily Favorites".
+
+        Returns:
+            Table of Date, Photo ID, the metric and "Rolling {window}d",
+            ordered by photo then date.
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1 day.")
+        ids, days, values = self._read_arrays(start, end, metric, photo_ids, window - 1)
+
+        rolling = values
+        if len(ids):
+            keys = self._photo_keys(ids, days, window)
+            cumulative = np.concatenate(([0], np.cumsum(values)))
+            window_start = np.searchsorted(keys, keys - (window - 1), side="left")
+            rolling = cumulative[1:] - cumulative[window_start]
+
+        if start is not None:
+            keep = days >= _parse_date(start).toordinal() - _EPOCH_ORDINAL
+            ids, days, values, rolling = ids[keep], days[keep], values[keep], rolling[keep]
+
+        return pa.table({
+            "Date": _to_dates(days),
+            "Photo ID": pa.array(ids, pa.int64()),
+            metric: pa.array(values, pa.int64()),
+            f"Rolling {window}d": pa.array(rolling, pa.int64()),
+        })
+
+    def day_over_day(self, start: str = None, end: str = None,
+                     photo_ids: list = None, metric: str = "Daily Views",
+                     n: int = None) -> pa.Table:
+        """Return each photo's change in metric from the previous day.
+
+        Args:
+            start:     First date (YYYY-MM-DD) to report, or None.
+            end:       Last date (YYYY-MM-DD) to report, or None.
+            photo_ids: Restrict to these photo IDs.
+            metric:    "Daily Views" or "Daily Favorites".
+            n:         If set, only the n largest increases, biggest first;
+                       otherwise every row, ordered by photo then date.
+
+        Returns:
+            Table of Date, Photo ID, the metric, Previous and Delta.
+        """
+        ids, days, values = self._read_arrays(start, end, metric, photo_ids, 1)
+
+        previous = np.zeros_like(values)
+        if len(ids):
+            keys = self._photo_keys(ids, days, 1)
+            position = np.searchsorted(keys, keys - 1)
+            found = keys[np.minimum(position, len(keys) - 1)] == keys - 1
+            previous[found] = values[position[found]]
+
+        if start is not None:
+            keep = days >= _parse_date(start).toordinal() - _EPOCH_ORDINAL
+            ids, days, values, previous = ids[keep], days[keep], values[keep], previous[keep]
+
+        delta = values - previous
+        if n is not None:
+            order = np.lexsort((ids, -delta))[:n]
+            ids, days, values, previous, delta = (
+                ids[order], days[order], values[order], previous[order], delta[order])
+
+        return pa.table({
+            "Date": _to_dates(days),
+            "Photo ID": pa.array(ids, pa.int64()),
+            metric: pa.array(values, pa.int64()),
+            "Previous": pa.array(previous, pa.int64()),
+            "Delta": pa.array(delta, pa.int64()),
+        })
+
+
+def print_table(table: pa.Table) -> None:
+    """Print a query result as tab-separated rows with a header."""
+    print("\t".join(table.column_names))
+    for row in table.to_pylist():
+        print("\t".join(str(value) for value in row.values()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the local Flickr stats history.")
+    parser.add_argument("--path", default=FLICKR_HISTORY_PATH, help="dataset root directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("dates", help="list stored dates")
+    for name, help_text in (("top", "top photos in a range"),
+                            ("rolling", "per-photo rolling totals"),
+                            ("deltas", "day-over-day changes")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--start")
+        command.add_argument("--end")
+        command.add_argument("--metric", choices=METRICS, default="Daily Views")
+        command.add_argument("-n", type=int, default=None if name == "rolling" else 10)
+        if name != "top":
+            command.add_argument("--photo-id", type=int, action="append", dest="photo_ids")
+        if name == "rolling":
+            command.add_argument("--window", type=int, default=7)
+    args = parser.parse_args()
+
+    store = HistoryStore(args.path)
+    started = time.perf_counter()
+    if args.command == "dates":
+        dates = store.stored_dates()
+        print(f"{len(dates)} dates" + (f": {dates[0]} to {dates[-1]}" if dates else ""))
+    else:
+        if args.command == "top":
+            result = store.top_photos(args.n, args.start, args.end, args.metric)
+        elif args.command == "rolling":
+            result = store.rolling_views(args.window, args.start, args.end,
+                                         args.photo_ids, args.metric)
+            if args.n is not None:
+                result = result.slice(0, args.n)
+        else:
+            result = store.day_over_day(args.start, args.end, args.photo_ids,
+                                        args.metric, args.n)
+        print_table(result)
+    print(f"({(time.perf_counter() - started) * 1000:.1f} ms)")
@@ -6,16 +6,46 @@ by Cloud Scheduler) and performs the following steps:
 1. Calculates the previous calendar day automatically.
 2. Authenticates with the Flickr API using OAuth tokens stored in Secret Manager
    (surfaced as environment variables by the Cloud Functions runtime).
-3. Fetches all popular photo statistics for that day via the Flickr Stats API.
-4. Constructs the photo Link and Thumbnail URLs from the API response fields.
-5. Streams the rows into the BigQuery staging table
-   (flickrstats-492309.flickrstats.stage_daily_extract).
+3. Fetches all popular photo statistics for that day via the Flickr Stats API
+   (page 1 first, then the remaining pages concurrently through a bounded
+   worker pool sized by FLICKR_FETCH_WORKERS), FLICKR_PAGE_SIZE photos per
+   page. With FLICKR_MIN_VIEWS / the `MinViews` payload field set, paging
+   stops at the first photo below that many views.
+4. Keeps each photo as a compact PhotoStat record. Only (Date, Photo ID,
+   views, favorites) is staged; the title, secret, server and owner of new or
+   edited photos (compared with an in-process cache) are upserted into the
+   flickrstats-492309.flickrstats.photos dimension after the MERGE.
+5. Loads the rows into a per-run staging table named after
+   flickrstats-492309.flickrstats.stage_daily_extract (plus a random suffix)
+   with a single batch load job from an in-memory NDJSON buffer, or with
+   streaming inserts when BQ_LOAD_MODE / the `LoadMode` payload field is
+   "stream". Each date is fingerprinted while its rows are staged; if every
+   staged date matches the fingerprint recorded in the load_manifest table by
+   its previous load (unless `Force` is set), the MERGE is skipped.
 6. Executes a MERGE statement to upsert the staged rows into the main table
    (flickrstats-492309.flickrstats.flickrstats_all):
-   - MATCHED on (Date, Photo ID) → updates Daily Views, Daily Favorites,
-     and updated_at.
-   - NOT MATCHED → inserts the full row and sets loaded_at/updated_at.
-7. Truncates the staging table to prepare it for the next run.
+   - MATCHED on (Date, Photo ID) with different values → updates Daily
+     Views, Daily Favorites, and updated_at (unchanged rows are not rewritten).
+   - NOT MATCHED → inserts the row and sets loaded_at/updated_at.
+   The ON clause is bounded to the staged date range so only the matching
+   partitions of the (Date-partitioned, Photo ID-clustered) target are scanned.
+   The same job then recomputes the photo_totals summary table for the staged
+   photos and daily_totals for the staged dates, and rebuilds photo_windows
+   (7/30-day views) from the last 30 days (BQ_AGGREGATES=0 turns this off).
+7. Drops the per-run staging table. With BQ_STAGE_STRATEGY=shared the fixed
+   staging table is used instead and truncated to prepare it for the next run.
+8. Emits one structured log record with per-stage timings, Flickr call
+   latency/retry totals, MERGE cost and peak memory (see run_metrics), and
+   returns it as the JSON body when the payload sets `ReturnMetrics`.
+9. Stops fetching RUN_RESERVE_SECONDS before the function timeout, merges
+   what it has, and returns a `continuation` payload for the remaining pages
+   and dates (see main_handler).
+10. With `FillGaps` in the payload, processes only the dates of the requested
+    window that are missing from the load_manifest table or stale there.
+
+Heavy dependencies (flickrapi, google.cloud.bigquery) are imported on first
+use, and the Flickr and BigQuery clients are kept at module level so warm
+instances reuse them across requests.
 
 Environment variables required (recommended via Cloud Secret Manager):
     FLICKR_API_KEY            – Flickr application API key.
@@ -30,15 +60,28 @@ Deployment:
     endpoint to kick off the daily run.
 """
 
+from __future__ import annotations
+
+import hashlib
+import io
+import itertools
 import logging
 import os
+import re
+import threading
 import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from queue import Full, Queue
+from typing import TYPE_CHECKING, NamedTuple
 
-import flickrapi
-from google.cloud import bigquery
-
-from flickr_auth import get_cloud_authenticated_client
+# flickrapi, google.cloud.bigquery and the modules that wrap them are imported
+# on first use (see get_flickr_client / get_bq_client) to keep cold starts
+# short; the clients are then reused by every request a warm instance serves.
+if TYPE_CHECKING:
+    from google.cloud import bigquery
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -48,17 +91,96 @@ GCP_PROJECT_ID = "flickrstats-492309"
 BQ_DATASET = "flickrstats"
 BQ_STAGE_TABLE = f"{GCP_PROJECT_ID}.{BQ_DATASET}.stage_daily_extract"
 BQ_TARGET_TABLE = f"{GCP_PROJECT_ID}.{BQ_DATASET}.flickrstats_all"
+# Photo dimension: one row per photo with its title, secret, server and owner.
+# The fact table only keeps (Date, Photo ID, views, favorites); the
+# flickrstats_daily view joins the two and rebuilds Link and thumbnail.
+BQ_PHOTOS_TABLE = f"{GCP_PROJECT_ID}.{BQ_DATASET}.photos"
+# Largest number of photos sent in one upsert_photos MERGE (query parameters
+# count towards BigQuery's 10 MB request limit).
+PHOTO_UPSERT_BATCH = 10000
+# One row per loaded date with a fingerprint of its (Photo ID, views,
+# favorites) values; dates whose fresh data matches are not reloaded.
+BQ_MANIFEST_TABLE = f"{GCP_PROJECT_ID}.{BQ_DATASET}.load_manifest"
+# Summary tables maintained by run_merge_with_aggregates after every MERGE.
+BQ_PHOTO_TOTALS_TABLE = f"{GCP_PROJECT_ID}.{BQ_DATASET}.photo_totals"
+BQ_DAILY_TOTALS_TABLE = f"{GCP_PROJECT_ID}.{BQ_DATASET}.daily_totals"
+BQ_PHOTO_WINDOWS_TABLE = f"{GCP_PROJECT_ID}.{BQ_DATASET}.photo_windows"
+# Set to 0 to run the plain MERGE without refreshing the summary tables.
+BQ_AGGREGATES = os.getenv("BQ_AGGREGATES", "1") == "1"
+STAGE_SCHEMA_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "docs",
+    "stage_daily_extract.schema.json",
+)
+AGGREGATES_DDL_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "docs",
+    "aggregates.ddl.sql",
+)
 
-FLICKR_PAGE_SIZE = 100  # Photos per page (max 500)
-MAX_RETRIES = 3
-INITIAL_RETRY_DELAY = 2   # seconds
-MAX_RETRY_DELAY = 60       # seconds
+FLICKR_MAX_PAGE_SIZE = 500  # Largest per_page accepted by the Flickr API
+FLICKR_PAGE_SIZE = min(
+    int(os.getenv("FLICKR_PAGE_SIZE", str(FLICKR_MAX_PAGE_SIZE))),
+    FLICKR_MAX_PAGE_SIZE,
+)
+# Photos come back in descending order of views; pagination stops at the
+# first page that drops below this many views (0 = fetch every page).
+# Can be overridden per request with the `MinViews` payload field.
+FLICKR_MIN_VIEWS = int(os.getenv("FLICKR_MIN_VIEWS", "0"))
+# Opt-in fast path: request the raw JSON body and decode it with
+# flickr_api.parse_json_response (orjson when installed) instead of
+# flickrapi's parsed-json path. Set to 1 to enable.
+FLICKR_RAW_JSON = os.getenv("FLICKR_RAW_JSON", "0") == "1"
+# Pages 2..N of a date are fetched concurrently through a bounded pool.
+# Set to 1 to fall back to sequential paging.
+FLICKR_FETCH_WORKERS = int(os.getenv("FLICKR_FETCH_WORKERS", "4"))
+# Dates of a multi-date (backfill) request are fetched concurrently too; the
+# total number of in-flight requests is FLICKR_DATE_WORKERS * FLICKR_FETCH_WORKERS.
+FLICKR_DATE_WORKERS = int(os.getenv("FLICKR_DATE_WORKERS", "2"))
+# The function is deployed with --timeout=540s (cloudbuild.yaml). Fetching
+# stops RUN_RESERVE_SECONDS before that so the rows already fetched can still
+# be loaded and merged; the rest is returned as a continuation payload.
+FUNCTION_TIMEOUT_SECONDS = int(os.getenv("FUNCTION_TIMEOUT_SECONDS", "540"))
+RUN_RESERVE_SECONDS = int(os.getenv("RUN_RESERVE_SECONDS", "120"))
+MAX_BATCH_DATES = 366  # Upper bound on dates accepted in a single request
+# `FillGaps` runs check a window of dates against the load manifest and fetch
+# only the dates that were never loaded or are stale. Without an explicit
+# range the window is the FILL_GAPS_DAYS days up to yesterday.
+FILL_GAPS_DAYS = min(int(os.getenv("FILL_GAPS_DAYS", "30")), MAX_BATCH_DATES)
+# A date last fetched less than this many days after it ended counts as stale
+# in fill-gaps runs, as Flickr may still have been counting its views
+# (0 = only missing dates are filled). Overridable with `SettleDays`.
+MANIFEST_SETTLE_DAYS = int(os.getenv("MANIFEST_SETTLE_DAYS", "0"))
+DATE_QUEUE_PAGES = 2  # Pages a date fetched ahead may buffer for the consumer
+
+# How rows reach the staging table:
+#   "load"   – one batch load job from an in-memory NDJSON buffer (free, rows
+#              are visible to the MERGE as soon as the job completes).
+#   "stream" – insert_rows_json streaming inserts (billed, streaming buffer).
+# Can be overridden per request with the `LoadMode` payload field.
+LOAD_MODES = ("load", "stream")
+BQ_LOAD_MODE = os.getenv("BQ_LOAD_MODE", "load")
+# Rows are flushed to staging in chunks of this size while later pages are
+# still downloading; at most STAGE_MAX_PENDING_CHUNKS chunks are in flight.
+STAGE_CHUNK_ROWS = int(os.getenv("STAGE_CHUNK_ROWS", "10000"))
+STAGE_MAX_PENDING_CHUNKS = 2
+
+# Where each run stages its rows:
+#   "ephemeral" – a per-run table (BQ_STAGE_TABLE + random suffix) that is
+#                 dropped after the MERGE, so concurrent runs never see each
+#                 other's rows. Tables expire after STAGE_TABLE_TTL in case
+#                 cleanup is skipped.
+#   "shared"    – the fixed BQ_STAGE_TABLE, truncated after the MERGE. Runs
+#                 must not overlap.
+STAGE_STRATEGIES = ("ephemeral", "shared")
+BQ_STAGE_STRATEGY = os.getenv("BQ_STAGE_STRATEGY", "ephemeral")
+STAGE_TABLE_TTL = timedelta(hours=2)
 DATE_FORMAT = "%Y-%m-%d"
 
-# Flickr URL templates (standard static-image CDN)
-PHOTO_URL_TEMPLATE = "https://www.flickr.com/photos/{owner}/{photo_id}"
-THUMBNAIL_URL_TEMPLATE = (
-    "https://live.staticflickr.com/{server}/{photo_id}_{secret}_q.jpg"
+# One staging row as NDJSON. Photo metadata goes to BQ_PHOTOS_TABLE instead.
+NDJSON_ROW_TEMPLATE = (
+    '{{"Date":"{date}","Photo ID":{photo_id},'
+    '"Daily Views":{views},"Daily Favorites":{favorites}}}'
 )
 
 logging.basicConfig(level=logging.INFO)
@@ -68,202 +190,1354 @@ logging.getLogger().setLevel(logging.INFO)
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
+_END_OF_DATE = object()  # Queue sentinel used by iter_dates_rows
+# Table written by one statement of a multi-statement job (script_child_jobs).
+_STATEMENT_TARGET_PATTERN = re.compile(r"(?:MERGE|TABLE)\s+`([^`]+)`")
+# Extra MERGE join condition that limits the scan of the fact table.
+_MERGE_DATE_PREDICATE = "\n      AND T.Date BETWEEN @min_date AND @max_date"
+
+
+# ---------------------------------------------------------------------------
+# Reusable clients
+# ---------------------------------------------------------------------------
+
+_clients = {}
+# One lock per client, so building the BigQuery client (and importing
+# google.cloud.bigquery) in the background never holds up the Flickr client.
+_client_locks = {"flickr": threading.Lock(), "bigquery": threading.Lock()}
+
+# Photo ID -> PhotoStat.metadata as last stored in BQ_PHOTOS_TABLE. Filled
+# from the table on an instance's first run (see known_photos) and kept up to
+# date by upsert_photos, so photos whose metadata is unchanged are not written.
+_photo_cache = {}
+_photo_cache_lock = threading.Lock()
+_photo_cache_loaded = threading.Event()
+
+
+def get_flickr_client():
+    """Return the process-wide authenticated Flickr client.
+
+    The client (and flickrapi itself) is created on first use and reused by
+    every later request served by the same warm instance. Its keep-alive
+    connection pool is sized to the maximum number of concurrent page
+    requests (FLICKR_DATE_WORKERS * FLICKR_FETCH_WORKERS).
+
+    Returns:
+        Authenticated FlickrAPI instance.
+    """
+    with _client_locks["flickr"]:
+        if "flickr" not in _clients:
+            from flickr_auth import get_cloud_authenticated_client
+
+            # One keep-alive connection per concurrent page request.
+            _clients["flickr"] = get_cloud_authenticated_client(
+                pool_size=FLICKR_DATE_WORKERS * FLICKR_FETCH_WORKERS
+            )
+        return _clients["flickr"]
+
+
+def get_bq_client() -> bigquery.Client:
+    """Return the process-wide BigQuery client.
+
+    google.cloud.bigquery is imported and the client created on first use;
+    warm instances reuse it. main_handler calls this from a background thread
+    at the start of a run so that the import overlaps the Flickr fetch.
+
+    Returns:
+        BigQuery client for GCP_PROJECT_ID.
+    """
+    with _client_locks["bigquery"]:
+        if "bigquery" not in _clients:
+            from google.cloud import bigquery
+
+            _clients["bigquery"] = bigquery.Client(project=GCP_PROJECT_ID)
+        return _clients["bigquery"]
+
+
+def _prefetch_fingerprints(dates: list) -> dict:
+    """Create the BigQuery client and read the stored fingerprints of dates.
+
+    Runs in the background while the first Flickr pages download. Any failure
+    (e.g. a missing manifest table) is logged and treated as "no fingerprints",
+    so every date is loaded.
+    """
+    try:
+        return read_fingerprints(get_bq_client(), dates)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Could not read load fingerprints; loading every date: %s", exc)
+        return {}
+
+
+def _prefetch_known_photos() -> dict:
+    """Create the BigQuery client and load the photo metadata cache.
+
+    Runs in the background while the first Flickr pages download. A failure
+    is logged and leaves the cache empty, so every fetched photo is upserted.
+    """
+    try:
+        return known_photos(get_bq_client())
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Could not read the photo dimension; upserting every photo: %s", exc)
+        return {}
+
+
+def log_connection_stats(flickr_client) -> dict:
+    """Log how many Flickr HTTP requests each pooled connection served.
+
+    Returns:
+        Dict with the number of "requests" and "connections".
+    """
+    from flickr_auth import connection_stats
+
+    stats = connection_stats(flickr_client)
+    logger.info(
+        "Flickr HTTP: %d requests over %d connections (pooled keep-alive).",
+        stats["requests"], stats["connections"],
+    )
+    return stats
+
 
 # ---------------------------------------------------------------------------
 # Flickr helpers
 # ---------------------------------------------------------------------------
 
-def make_api_call_with_retry(flickr_client, method_name: str, **params):
-    """Make a Flickr API call with exponential-backoff retry.
+class PhotoStat(NamedTuple):
+    """Compact, tuple-backed record for one photo's stats on one date.
+
+    Link and thumbnail URLs are not stored; the flickrstats_daily view
+    derives them from the photo's owner, server and secret. Only date,
+    photo_id, views and favorites are staged for the fact table; the rest
+    (see metadata) belongs in BQ_PHOTOS_TABLE.
+    """
+
+    date: str
+    photo_id: int
+    title: str
+    views: int
+    favorites: int
+    secret: str
+    server: str
+    owner: str
+
+    @property
+    def metadata(self) -> tuple:
+        """(title, secret, server, owner): this photo's BQ_PHOTOS_TABLE values."""
+        return (self.title, self.secret, int(self.server), self.owner)
+
+    def to_stage_row(self) -> dict:
+        """Return the fact row dict matching the staging table schema."""
+        return {
+            "Date": self.date,
+            "Photo ID": self.photo_id,
+            "Daily Views": self.views,
+            "Daily Favorites": self.favorites,
+        }
+
+
+def build_rows(date: str, response: dict) -> list:
+    """Convert one stats.getPopularPhotos page into PhotoStat records.
 
     Args:
-        flickr_client: Authenticated FlickrAPI instance.
-        method_name:   Dot-separated method name (e.g. 'stats.getPopularPhotos').
-        **params:      Keyword arguments forwarded to the API method.
+        date:     Date string in YYYY-MM-DD format.
+        response: Parsed-JSON API response for a single page.
+
+    Returns:
+        List of PhotoStat records.
+    """
+    return [
+        PhotoStat(
+            date,
+            int(photo["id"]),
+            photo["title"],
+            int(photo["stats"]["views"]),
+            int(photo["stats"]["favorites"]),
+            photo["secret"],
+            photo["server"],
+            photo.get("owner", ""),
+        )
+        for photo in response["photos"]["photo"]
+    ]
+
+
+class FetchStopped(Exception):
+    """Raised by the fetch iterators when the run deadline stops a date.
+
+    Every page before next_page has already been yielded.
+    """
+
+    def __init__(self, date: str, next_page: int):
+        super().__init__(f"deadline reached at {date} page {next_page}")
+        self.date = date
+        self.next_page = next_page
+
+
+def _page_request(date: str, page: int) -> dict:
+    """Return the make_api_call_with_retry arguments for one stats page."""
+    params = {"date": date, "per_page": FLICKR_PAGE_SIZE, "page": page}
+    if FLICKR_RAW_JSON:
+        from flickr_api import parse_json_response
+
+        params.update(format="json", parser=parse_json_response)
+    return params
+
+
+def _fetch_page_rows(
+    flickr_client, date: str, page: int, stats=None, deadline=None, limiter=None
+) -> list:
+    """Fetch a single stats page and convert it into PhotoStat records.
+
+    Raises:
+        RuntimeError: If the API call returned nothing after all retries.
+        flickr_api.DeadlineExceeded: If the deadline passed first.
+    """
+    from flickr_api import make_api_call_with_retry
+
+    response = make_api_call_with_retry(
+        flickr_client,
+        "stats.getPopularPhotos",
+        limiter=limiter,
+        stats=stats,
+        deadline=deadline,
+        **_page_request(date, page),
+    )
+    if not response:
+        raise RuntimeError(f"empty response for page {page}")
+    return build_rows(date, response)
+
+
+def _apply_min_views(page_rows: list, min_views: int):
+    """Drop rows below min_views from a page of rows in descending view order.
 
     Returns:
-        Parsed-JSON API response, or None if all retries were exhausted.
+        Tuple of (rows kept, whether the page reached the cutoff).
+    """
+    if not min_views or not page_rows or page_rows[-1].views >= min_views:
+        return page_rows, False
+    return [row for row in page_rows if row.views >= min_views], True
+
+
+def iter_page_rows(
+    flickr_client,
+    date: str,
+    max_workers: int = FLICKR_FETCH_WORKERS,
+    stats=None,
+    min_views: int = 0,
+    deadline=None,
+    start_page: int = 1,
+    limiter=None,
+):
+    """Yield the rows of each stats page for a date, in page order.
+
+    Page 1 (or start_page) is fetched first to learn the page count and is
+    reused as-is. The following pages are fetched through a bounded pool with
+    a sliding window of at most max_workers requests in flight, so only that
+    many pages are held in memory at once. A page that fails after all
+    retries is logged and skipped without discarding the others, and the date
+    is recorded as incomplete in stats so that it is neither fingerprinted
+    nor marked as loaded.
+
+    Flickr returns photos in descending order of views, so with min_views set
+    pagination stops at the first page that contains a photo below the
+    threshold: its remaining rows are dropped and no later page is requested
+    (requests already in flight are discarded). The skipped tail is recorded
+    in stats.
+
+    Once deadline has passed no further page is requested: the pages fetched
+    in order so far are yielded and FetchStopped is raised with the first
+    page still missing, from which a later run can resume via start_page.
+
+    Args:
+        flickr_client: Authenticated FlickrAPI instance.
+        date:          Date string in YYYY-MM-DD format.
+        max_workers:   Maximum concurrent page requests (1 = sequential).
+        stats:         Optional run_metrics.CallStats for the page requests.
+        min_views:     Only yield photos with at least this many views
+                       (0 = every photo).
+        deadline:      Optional flickr_api.Deadline for the page requests.
+        start_page:    First page to fetch (greater than 1 when resuming).
+        limiter:       Optional TokenBucket for the page requests (default:
+                       the process-wide limiter).
+
+    Yields:
+        List of PhotoStat records for one page.
 
     Raises:
-        flickrapi.exceptions.FlickrError: For non-rate-limit Flickr errors.
-        Exception: For persistent non-Flickr errors after all retries.
+        FetchStopped: If the deadline stopped the date before its last page.
     """
-    retry_delay = INITIAL_RETRY_DELAY
+    import flickrapi
+    from flickr_api import DeadlineExceeded, make_api_call_with_retry
 
-    for attempt in range(MAX_RETRIES):
-        try:
-            method = flickr_client
-            for part in method_name.split("."):
-                method = getattr(method, part)
-            return method(**params)
-
-        except flickrapi.exceptions.FlickrError as exc:
-            if getattr(exc, "code", None) in [105, "Rate Limit Exceeded"]:
-                if attempt < MAX_RETRIES - 1:
+    try:
+        initial = make_api_call_with_retry(
+            flickr_client,
+            "stats.getPopularPhotos",
+            limiter=limiter,
+            stats=stats,
+            deadline=deadline,
+            **_page_request(date, start_page),
+        )
+    except DeadlineExceeded:
+        raise FetchStopped(date, start_page) from None
+    except flickrapi.exceptions.FlickrError as exc:
+        logger.error("Flickr API error for %s: %s", date, exc)
+        if stats is not None:
+            stats.record_incomplete(date)
+        return
+    except Exception as exc:
+        logger.error("Unexpected error for %s: %s", date, exc)
+        raise
+
+    if not initial:
+        logger.error("Failed to fetch initial page for %s.", date)
+        if stats is not None:
+            stats.record_incomplete(date)
+        return
+
+    total_pages = initial["photos"]["pages"]
+    total_photos = int(initial["photos"]["total"])
+    logger.info(
+        "Date: %s - pages: %d, total photos: %s",
+        date, total_pages, total_photos,
+    )
+    page_rows, reached_cutoff = _apply_min_views(build_rows(date, initial), min_views)
+    del initial
+    last_page = start_page
+    rows_kept = len(page_rows)
+    yield page_rows
+
+    failed = []
+    if total_pages > start_page and not reached_cutoff:
+        pages = iter(range(start_page + 1, total_pages + 1))
+        workers = max(1, min(max_workers, total_pages - start_page))
+
+        def submit(page):
+            return executor.submit(
+                _fetch_page_rows, flickr_client, date, page, stats, deadline,
+                limiter,
+            )
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            window = deque(
+                (page, submit(page)) for page in itertools.islice(pages, workers)
+            )
+            while window:
+                page, future = window.popleft()
+                last_page = page
+                next_page = next(pages, None)
+                if next_page is not None:
+                    window.append((next_page, submit(next_page)))
+                try:
+                    page_rows = future.result()
+                except DeadlineExceeded:
+                    for _, pending in window:
+                        pending.cancel()
                     logger.warning(
-                        "Rate limit hit. Retrying in %ds (attempt %d/%d).",
-                        retry_delay, attempt + 1, MAX_RETRIES,
+                        "Date: %s - deadline reached; stopping before page %d "
+                        "of %d.", date, page, total_pages,
                     )
-                    time.sleep(retry_delay)
-                    retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
+                    raise FetchStopped(date, page) from None
+                except Exception as exc:  # noqa: BLE001
+                    logger.error("Failed to fetch page %d for %s: %s", page, date, exc)
+                    failed.append(page)
                     continue
-            raise
 
-        except Exception as exc:  # noqa: BLE001
-            if attempt < MAX_RETRIES - 1:
-                logger.warning(
-                    "Error: %s. Retrying in %ds (attempt %d/%d).",
-                    exc, retry_delay, attempt + 1, MAX_RETRIES,
-                )
-                time.sleep(retry_delay)
-                retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
-                continue
-            raise
+                page_rows, reached_cutoff = _apply_min_views(page_rows, min_views)
+                rows_kept += len(page_rows)
+                yield page_rows
+                if reached_cutoff:
+                    for _, pending in window:
+                        pending.cancel()
+                    break
+
+    skipped_photos = 0
+    if reached_cutoff:
+        # Photos on the pages before start_page were loaded by an earlier run.
+        skipped_photos = max(
+            0, total_photos - (start_page - 1) * FLICKR_PAGE_SIZE - rows_kept
+        )
+        logger.info(
+            "Date: %s - stopped at page %d of %d (min_views=%d); skipped %d "
+            "photos in the tail.",
+            date, last_page, total_pages, min_views, skipped_photos,
+        )
+    if stats is not None:
+        stats.record_pagination(date, total_pages, last_page, skipped_photos)
+    if failed:
+        logger.warning(
+            "Date: %s - %d of %d pages failed and were skipped: %s",
+            date, len(failed), total_pages, failed,
+        )
+        if stats is not None:
+            stats.record_incomplete(date, failed)
+
+
+def iter_flickr_stats(
+    flickr_client,
+    date: str,
+    max_workers: int = FLICKR_FETCH_WORKERS,
+    stats=None,
+    min_views: int = 0,
+    deadline=None,
+    start_page: int = 1,
+    limiter=None,
+):
+    """Yield the popular photo statistics rows for a date, page by page.
 
-    return None
+    Args:
+        flickr_client: Authenticated FlickrAPI instance.
+        date:          Date string in YYYY-MM-DD format.
+        max_workers:   Maximum concurrent page requests (1 = sequential).
+        stats:         Optional run_metrics.CallStats for the page requests.
+        min_views:     Stop paginating below this many views (0 = every photo).
+        deadline:      Optional flickr_api.Deadline for the page requests.
+        start_page:    First page to fetch (greater than 1 when resuming).
+        limiter:       Optional TokenBucket for the page requests.
 
+    Yields:
+        PhotoStat records, in page order.
 
-def fetch_flickr_stats(flickr_client, date: str) -> list:
+    Raises:
+        FetchStopped: If the deadline stopped the date before its last page.
+    """
+    for page_rows in iter_page_rows(
+        flickr_client, date, max_workers, stats, min_views, deadline, start_page,
+        limiter,
+    ):
+        yield from page_rows
+
+
+def fetch_flickr_stats(
+    flickr_client,
+    date: str,
+    max_workers: int = FLICKR_FETCH_WORKERS,
+    stats=None,
+    min_views: int = 0,
+):
     """Fetch all popular photo statistics for a given date from Flickr.
 
-    Iterates over all pages returned by stats.getPopularPhotos and builds
-    the list of row dictionaries matching the BigQuery schema (my_schema.json),
-    including the constructed Link and Thumbnail URLs.
+    Materialised form of iter_flickr_stats for callers that need the whole
+    day at once. The rows are held in a row_buffer.RowBuffer, which spills to
+    disk beyond ROW_BUFFER_MB; close it to delete its spill file early.
 
     Args:
         flickr_client: Authenticated FlickrAPI instance.
         date:          Date string in YYYY-MM-DD format.
+        max_workers:   Maximum concurrent page requests (1 = sequential).
+        stats:         Optional run_metrics.CallStats for the page requests.
+        min_views:     Stop paginating below this many views (0 = every photo).
 
     Returns:
-        List of row dicts ready for BigQuery insertion.
+        RowBuffer of PhotoStat records ready for BigQuery insertion.
     """
-    rows = []
-    params = {"date": date, "per_page": FLICKR_PAGE_SIZE, "page": 1}
+    from row_buffer import RowBuffer
+
+    rows = RowBuffer(factory=PhotoStat._make)
+    rows.extend(
+        iter_flickr_stats(flickr_client, date, max_workers, stats, min_views)
+    )
+    return rows
+
+
+def _put_until_stopped(page_queue: Queue, item, stop: threading.Event) -> bool:
+    """Put item on a bounded queue, giving up once stop is set."""
+    while not stop.is_set():
+        try:
+            page_queue.put(item, timeout=0.5)
+            return True
+        except Full:
+            continue
+    return False
+
+
+def iter_dates_rows(
+    flickr_client,
+    dates: list,
+    max_workers: int = FLICKR_DATE_WORKERS,
+    stats=None,
+    min_views: int = 0,
+    deadline=None,
+    start_page: int = 1,
+    limiter=None,
+):
+    """Yield rows for several dates, date by date, fetching ahead concurrently.
+
+    Up to max_workers dates are fetched at the same time. Each one hands its
+    pages to the consumer through a queue of DATE_QUEUE_PAGES pages, so memory
+    stays bounded by max_workers * DATE_QUEUE_PAGES pages however many dates
+    or photos are requested. A date whose fetch raises is logged and skipped,
+    except for FetchStopped, which is re-raised once the consumer reaches that
+    date so that everything yielded before it is complete.
+
+    Args:
+        flickr_client: Authenticated FlickrAPI instance.
+        dates:         List of date strings in YYYY-MM-DD format.
+        max_workers:   Maximum number of dates fetched at the same time.
+        stats:         Optional run_metrics.CallStats for the page requests.
+        min_views:     Stop paginating below this many views (0 = every photo).
+        deadline:      Optional flickr_api.Deadline for the page requests.
+        start_page:    First page to fetch for dates[0] (when resuming).
+        limiter:       Optional TokenBucket for the page requests.
+
+    Yields:
+        PhotoStat records, grouped by date in the order of dates.
+
+    Raises:
+        FetchStopped: If the deadline stopped a date before its last page.
+    """
+    stop = threading.Event()
+    pending = iter(dates)
+    workers = max(1, min(max_workers, len(dates)))
+
+    def produce(date: str, page_queue: Queue) -> None:
+        try:
+            for page_rows in iter_page_rows(
+                flickr_client,
+                date,
+                stats=stats,
+                min_views=min_views,
+                deadline=deadline,
+                start_page=start_page if date == dates[0] else 1,
+                limiter=limiter,
+            ):
+                if not _put_until_stopped(page_queue, page_rows, stop):
+                    return
+        except FetchStopped as exc:
+            _put_until_stopped(page_queue, exc, stop)
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Failed to fetch stats for %s: %s", date, exc)
+            if stats is not None:
+                stats.record_incomplete(date)
+        finally:
+            _put_until_stopped(page_queue, _END_OF_DATE, stop)
+
+    def start(date: str) -> Queue:
+        page_queue = Queue(maxsize=DATE_QUEUE_PAGES)
+        executor.submit(produce, date, page_queue)
+        return page_queue
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            window = deque(start(date) for date in itertools.islice(pending, workers))
+            while window:
+                page_queue = window.popleft()
+                for page_rows in iter(page_queue.get, _END_OF_DATE):
+                    if isinstance(page_rows, FetchStopped):
+                        raise page_rows
+                    yield from page_rows
+
+                date = next(pending, None)
+                if date is not None:
+                    window.append(start(date))
+        finally:
+            # Unblock producers if the consumer stopped early.
+            stop.set()
 
+
+def iter_until_stopped(rows, stopped: list):
+    """Yield rows until the fetch raises FetchStopped, then end normally.
+
+    Lets a deadline-bounded fetch feed load_rows_in_chunks, which then stages
+    every row yielded so far instead of failing.
+
+    Args:
+        rows:    Iterable of PhotoStat records from the fetch iterators.
+        stopped: List that receives the FetchStopped exception, if any.
+    """
     try:
-        initial = make_api_call_with_retry(
-            flickr_client, "stats.getPopularPhotos", **params
-        )
-        if not initial:
-            logger.error("Failed to fetch initial page for %s.", date)
-            return rows
+        yield from rows
+    except FetchStopped as exc:
+        stopped.append(exc)
 
-        total_pages = initial["photos"]["pages"]
-        logger.info(
-            "Date: %s - pages: %d, total photos: %s",
-            date, total_pages, initial["photos"]["total"],
-        )
 
-        for page in range(1, total_pages + 1):
-            params["page"] = page
-            response = make_api_call_with_retry(
-                flickr_client, "stats.getPopularPhotos", **params
-            )
-            if not response:
-                logger.error("Failed to fetch page %d for %s. Stopping.", page, date)
-                break
+def date_fingerprint(rows: list) -> str:
+    """Return an order-independent fingerprint of one date's rows.
 
-            for photo in response["photos"]["photo"]:
-                photo_id = photo["id"]
-                owner = photo.get("owner", "")
-                rows.append(
-                    {
-                        "Date": date,
-                        "Photo ID": int(photo_id),
-                        "Photo Title": photo["title"],
-                        "Daily Views": int(photo["stats"]["views"]),
-                        "Daily Favorites": int(photo["stats"]["favorites"]),
-                        "Secret": photo["secret"],
-                        "Server": int(photo["server"]),
-                        "Link": PHOTO_URL_TEMPLATE.format(
-                            owner=owner, photo_id=photo_id
-                        ),
-                        "thumbnail": THUMBNAIL_URL_TEMPLATE.format(
-                            server=photo["server"],
-                            photo_id=photo_id,
-                            secret=photo["secret"],
-                        ),
-                    }
-                )
+    The SHA-256 of the sorted (Photo ID, views, favorites) triples, i.e. of
+    exactly the values the MERGE writes for existing rows plus the set of
+    photos present.
 
-    except flickrapi.exceptions.FlickrError as exc:
-        logger.error("Flickr API error for %s: %s", date, exc)
-    except Exception as exc:
-        logger.error("Unexpected error for %s: %s", date, exc)
-        raise
+    Args:
+        rows: PhotoStat records of a single date.
+    """
+    return _values_fingerprint(
+        [(row.photo_id, row.views, row.favorites) for row in rows]
+    )
 
-    return rows
+
+def _values_fingerprint(values: list) -> str:
+    """Return date_fingerprint for (Photo ID, views, favorites) triples.
+
+    Sorts values in place, so no second copy of the date is held.
+    """
+    values.sort()
+    digest = hashlib.sha256()
+    # Hashed line by line rather than joined into one string first.
+    for index, value in enumerate(values):
+        if index:
+            digest.update(b"\n")
+        digest.update(b"%d,%d,%d" % value)
+    return digest.hexdigest()
+
+
+def iter_fingerprinted_dates(rows, fingerprints: dict, is_complete):
+    """Yield rows unchanged while fingerprinting each complete date.
+
+    rows must be grouped by date, as the fetch iterators yield them. Every row
+    is passed on as soon as it arrives, so staging keeps overlapping the
+    fetch; only its (Photo ID, views, favorites) values are kept until the
+    date's last row has gone by. The date is then fingerprinted, unless
+    is_complete rejects it (resumed mid-date, cut short by the deadline or
+    missing failed pages). The caller compares the fingerprints with the
+    manifest once the rows are staged and skips the MERGE if nothing changed.
+
+    Args:
+        rows:         Iterable of PhotoStat records grouped by date.
+        fingerprints: Dict that receives {date: (fingerprint, row_count)} for
+                      every complete date, for write_fingerprints.
+        is_complete:  Callable telling whether a date's rows are all there.
+
+    Yields:
+        The PhotoStat records of rows.
+    """
+    for date, date_rows in itertools.groupby(rows, key=lambda row: row.date):
+        values = []
+        for row in date_rows:
+            values.append((row.photo_id, row.views, row.favorites))
+            yield row
+        if is_complete(date):
+            fingerprints[date] = (_values_fingerprint(values), len(values))
+
+
+def unchanged_dates(fingerprints: dict, stored: dict) -> list:
+    """Return the dates whose new fingerprint matches the stored one.
+
+    Args:
+        fingerprints: {date: (fingerprint, row_count)} from
+                      iter_fingerprinted_dates.
+        stored:       {date: fingerprint} from the manifest.
+
+    Returns:
+        Sorted list of the unchanged dates.
+    """
+    return sorted(
+        date for date, (fingerprint, _) in fingerprints.items()
+        if stored.get(date) == fingerprint
+    )
+
+
+def iter_photo_changes(rows, known, changed: dict):
+    """Yield rows unchanged while collecting photos with new metadata.
+
+    A photo is collected when its (title, secret, server, owner) differs from
+    the known value, i.e. it is new or was edited on Flickr. All other photos
+    need no BQ_PHOTOS_TABLE write.
+
+    Args:
+        rows:    Iterable of PhotoStat records.
+        known:   Callable returning {photo_id: metadata} (see known_photos);
+                 called once, when the first row arrives.
+        changed: Dict that receives {photo_id: metadata} for upsert_photos.
+
+    Yields:
+        The PhotoStat records of rows.
+    """
+    known_metadata = None
+    for row in rows:
+        if known_metadata is None:
+            known_metadata = known()
+        metadata = row.metadata
+        if known_metadata.get(row.photo_id) != metadata:
+            changed[row.photo_id] = metadata
+        yield row
 
 
 # ---------------------------------------------------------------------------
 # BigQuery helpers
 # ---------------------------------------------------------------------------
 
-def load_to_stage(bq_client: bigquery.Client, rows: list) -> None:
-    """Stream rows into the BigQuery staging table.
+def rows_to_ndjson(rows: list) -> bytes:
+    """Serialise PhotoStat records as newline-delimited JSON for a load job.
+
+    Lines are formatted directly from the record fields rather than through
+    an intermediate dict per row; the output is equivalent to
+    json.dumps(row.to_stage_row()).
 
     Args:
-        bq_client: Authenticated BigQuery client.
-        rows:      List of row dicts to insert.
+        rows: List of PhotoStat records.
+
+    Returns:
+        UTF-8 encoded NDJSON payload.
+    """
+    return "\n".join(
+        NDJSON_ROW_TEMPLATE.format(
+            date=row.date,
+            photo_id=row.photo_id,
+            views=row.views,
+            favorites=row.favorites,
+        )
+        for row in rows
+    ).encode("utf-8")
+
+
+def load_to_stage(
+    bq_client: bigquery.Client,
+    rows: list,
+    mode: str = BQ_LOAD_MODE,
+    stage_table: str = BQ_STAGE_TABLE,
+) -> float:
+    """Load rows into the BigQuery staging table.
+
+    In "load" mode the rows are serialised to NDJSON in memory and submitted
+    as a single batch load job, which is free and leaves no streaming buffer
+    behind. In "stream" mode they are sent with insert_rows_json.
+
+    Args:
+        bq_client:   Authenticated BigQuery client.
+        rows:        List of PhotoStat records to insert.
+        mode:        One of LOAD_MODES.
+        stage_table: Fully-qualified staging table ID.
+
+    Returns:
+        Seconds spent in the load job or streaming insert.
 
     Raises:
-        RuntimeError: If the BigQuery streaming insert returns errors.
+        ValueError:   If mode is not one of LOAD_MODES.
+        RuntimeError: If the load job or streaming insert reports errors.
     """
+    from google.cloud import bigquery
+
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Unknown load mode {mode!r}; expected one of {LOAD_MODES}.")
+
     if not rows:
         logger.info("No rows to load into the staging table.")
-        return
+        return 0.0
 
-    errors = bq_client.insert_rows_json(BQ_STAGE_TABLE, rows)
-    if errors:
-        raise RuntimeError(f"BigQuery insert errors: {errors}")
+    started = time.monotonic()
+    if mode == "stream":
+        errors = bq_client.insert_rows_json(
+            stage_table, [row.to_stage_row() for row in rows]
+        )
+        if errors:
+            raise RuntimeError(f"BigQuery insert errors: {errors}")
+    else:
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+        )
+        load_job = bq_client.load_table_from_file(
+            io.BytesIO(rows_to_ndjson(rows)), stage_table, job_config=job_config
+        )
+        load_job.result()
+        if load_job.errors:
+            raise RuntimeError(f"BigQuery load job errors: {load_job.errors}")
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        "Inserted %d rows into %s (mode=%s) in %.2fs.",
+        len(rows), stage_table, mode, elapsed,
+    )
+    return elapsed
+
+
+def load_rows_in_chunks(
+    bq_client: bigquery.Client,
+    rows,
+    mode: str = BQ_LOAD_MODE,
+    stage_table: str = BQ_STAGE_TABLE,
+    chunk_size: int = STAGE_CHUNK_ROWS,
+) -> dict:
+    """Stream an iterable of rows into staging in fixed-size chunks.
+
+    Each chunk is handed to load_to_stage on a background thread while the
+    caller keeps producing rows, so Flickr downloads and BigQuery loads
+    overlap. At most STAGE_MAX_PENDING_CHUNKS chunks are held at once, which
+    keeps peak memory flat regardless of how many rows are loaded.
+
+    Args:
+        bq_client:   Authenticated BigQuery client.
+        rows:        Iterable of PhotoStat records (typically a generator).
+        mode:        One of LOAD_MODES.
+        stage_table: Fully-qualified staging table ID.
+        chunk_size:  Rows per load job / streaming insert.
 
-    logger.info("Inserted %d rows into %s.", len(rows), BQ_STAGE_TABLE)
+    Returns:
+        Dict with the number of "rows" and "chunks" loaded, the sorted list
+        of "dates" seen and "insert_seconds", the time spent in load jobs or
+        streaming inserts (which overlaps with fetching).
 
+    Raises:
+        RuntimeError: If any chunk fails to load.
+    """
+    row_count = 0
+    chunk_count = 0
+    insert_seconds = 0.0
+    dates = set()
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
 
-def run_merge(bq_client: bigquery.Client) -> None:
+            row_count += len(chunk)
+            chunk_count += 1
+            dates.update(row.date for row in chunk)
+
+            while len(pending) >= STAGE_MAX_PENDING_CHUNKS:
+                insert_seconds += pending.popleft().result()
+            pending.append(
+                executor.submit(load_to_stage, bq_client, chunk, mode, stage_table)
+            )
+            del chunk
+
+        while pending:
+            insert_seconds += pending.popleft().result()
+
+    return {
+        "rows": row_count,
+        "chunks": chunk_count,
+        "dates": sorted(dates),
+        "insert_seconds": round(insert_seconds, 3),
+    }
+
+
+def run_merge(
+    bq_client: bigquery.Client,
+    stage_table: str = BQ_STAGE_TABLE,
+    min_date: str = None,
+    max_date: str = None,
+):
     """Upsert staged rows into the main table using a BigQuery MERGE.
 
     Composite PK: Date + Photo ID
-    - MATCHED     → update Daily Views, Daily Favorites, and updated_at.
+    - MATCHED with different Daily Views or Daily Favorites → update them and
+      updated_at. Identical rows are left alone, so reruns rewrite nothing.
     - NOT MATCHED → insert the full row and set loaded_at/updated_at.
 
+    When min_date/max_date are given they are added to the ON clause as
+    constant predicates on the target's Date column, so BigQuery only scans
+    the target partitions for the staged dates instead of the whole history.
+
     Args:
-        bq_client: Authenticated BigQuery client.
+        bq_client:   Authenticated BigQuery client.
+        stage_table: Fully-qualified staging table ID to merge from.
+        min_date:    Earliest staged date (YYYY-MM-DD), or None.
+        max_date:    Latest staged date (YYYY-MM-DD), or None.
+
+    Returns:
+        The finished MERGE QueryJob (bytes processed, slot-ms, rows affected).
     """
-    merge_sql = f"""
+    from google.cloud import bigquery
+
+    date_predicate = ""
+    query_parameters = []
+    if min_date and max_date:
+        date_predicate = _MERGE_DATE_PREDICATE
+        query_parameters = [
+            bigquery.ScalarQueryParameter("min_date", "DATE", min_date),
+            bigquery.ScalarQueryParameter("max_date", "DATE", max_date),
+        ]
+
+    job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
+    query_job = bq_client.query(
+        _merge_sql(stage_table, date_predicate), job_config=job_config
+    )
+    query_job.result()
+    logger.info(
+        "MERGE completed successfully (dates %s to %s): %s rows affected, "
+        "%s bytes processed.",
+        min_date or "*", max_date or "*",
+        query_job.num_dml_affected_rows, query_job.total_bytes_processed,
+    )
+    return query_job
+
+
+def _merge_sql(stage_table: str, date_predicate: str = "") -> str:
+    """Return the fact-table MERGE statement used by run_merge."""
+    return f"""
     MERGE `{BQ_TARGET_TABLE}` T
-    USING `{BQ_STAGE_TABLE}` S
-      ON T.Date = S.Date AND T.`Photo ID` = S.`Photo ID`
-    WHEN MATCHED THEN
+    USING `{stage_table}` S
+      ON T.Date = S.Date AND T.`Photo ID` = S.`Photo ID`{date_predicate}
+    WHEN MATCHED AND (
+      T.`Daily Views` IS DISTINCT FROM S.`Daily Views`
+      OR T.`Daily Favorites` IS DISTINCT FROM S.`Daily Favorites`
+    ) THEN
       UPDATE SET
         T.`Daily Views`     = S.`Daily Views`,
         T.`Daily Favorites` = S.`Daily Favorites`,
         T.updated_at        = CURRENT_TIMESTAMP()
     WHEN NOT MATCHED THEN
       INSERT (
-        `Date`, `Photo ID`, `Photo Title`, `Daily Views`, `Daily Favorites`,
-        `Secret`, `Server`, `Link`, `thumbnail`, `loaded_at`, `updated_at`
+        `Date`, `Photo ID`, `Daily Views`, `Daily Favorites`, `loaded_at`, `updated_at`
       )
       VALUES (
-        S.Date, S.`Photo ID`, S.`Photo Title`, S.`Daily Views`, S.`Daily Favorites`,
-        S.Secret, S.Server, S.Link, S.thumbnail, CURRENT_TIMESTAMP(), CURRENT_TIMESTAMP()
+        S.Date, S.`Photo ID`, S.`Daily Views`, S.`Daily Favorites`,
+        CURRENT_TIMESTAMP(), CURRENT_TIMESTAMP()
       )
     """
-    query_job = bq_client.query(merge_sql)
-    query_job.result()
-    logger.info("MERGE completed successfully.")
 
 
-def truncate_stage(bq_client: bigquery.Client) -> None:
+def run_merge_with_aggregates(
+    bq_client: bigquery.Client,
+    stage_table: str,
+    min_date: str,
+    max_date: str,
+) -> dict:
+    """Run the fact MERGE, then refresh the summary tables from the fact table.
+
+    One multi-statement query job without a transaction. Each statement
+    commits on its own:
+
+    * The fact MERGE (see run_merge).
+    * photo_totals (per photo: lifetime views/favorites, days seen, first and
+      last date) is recomputed from the fact table for the staged photos.
+    * daily_totals (per date: photos, views, favorites) is recomputed for
+      the staged date range only.
+    * photo_windows (per photo: 7- and 30-day views and favorites up to the
+      latest loaded date) is rebuilt from the last 30 partitions when the run
+      touched them; older backfills leave it alone.
+
+    The summaries are recomputed from the fact table rather than adjusted by
+    deltas, so the refresh is idempotent. Concurrent runs (parallel shards,
+    backfill workers) therefore never hold a transaction on a shared summary
+    table. BigQuery cancels such transactions when they overlap, whereas
+    conflicting single DML statements are retried. If a refresh statement
+    fails after the fact MERGE, the run fails before its fingerprints are
+    recorded, and the next run refreshes the summaries again. The summary
+    tables are created from the full fact table the first time (see
+    docs/aggregates.ddl.sql).
+
+    Args:
+        bq_client:   Authenticated BigQuery client.
+        stage_table: Fully-qualified staging table ID to merge from.
+        min_date:    Earliest staged date (YYYY-MM-DD).
+        max_date:    Latest staged date (YYYY-MM-DD).
+
+    Returns:
+        Dict of finished QueryJobs: "merge" for the fact MERGE, one per summary
+        table ("photo_totals", "daily_totals", "photo_windows") when BigQuery
+        reports it, and "script" for the whole job.
+    """
+    from google.cloud import bigquery
+
+    with open(AGGREGATES_DDL_PATH, encoding="utf-8") as ddl_file:
+        create_sql = ddl_file.read()
+
+    script = f"""
+    DECLARE window_end DATE;
+
+    {create_sql}
+
+    {_merge_sql(stage_table, _MERGE_DATE_PREDICATE)};
+
+    MERGE `{BQ_PHOTO_TOTALS_TABLE}` T
+    USING (
+      SELECT
+        `Photo ID`,
+        SUM(`Daily Views`) AS lifetime_views,
+        SUM(`Daily Favorites`) AS lifetime_favorites,
+        COUNT(*) AS days_seen,
+        MIN(Date) AS first_date,
+        MAX(Date) AS last_date
+      FROM `{BQ_TARGET_TABLE}`
+      WHERE `Photo ID` IN (SELECT DISTINCT `Photo ID` FROM `{stage_table}`)
+      GROUP BY `Photo ID`
+    ) S
+      ON T.`Photo ID` = S.`Photo ID`
+    WHEN MATCHED AND (
+      T.lifetime_views IS DISTINCT FROM S.lifetime_views
+      OR T.lifetime_favorites IS DISTINCT FROM S.lifetime_favorites
+      OR T.days_seen IS DISTINCT FROM S.days_seen
+      OR T.first_date IS DISTINCT FROM S.first_date
+      OR T.last_date IS DISTINCT FROM S.last_date
+    ) THEN
+      UPDATE SET
+        T.lifetime_views     = S.lifetime_views,
+        T.lifetime_favorites = S.lifetime_favorites,
+        T.days_seen          = S.days_seen,
+        T.first_date         = S.first_date,
+        T.last_date          = S.last_date,
+        T.updated_at         = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN
+      INSERT (
+        `Photo ID`, lifetime_views, lifetime_favorites,
+        days_seen, first_date, last_date, updated_at
+      )
+      VALUES (
+        S.`Photo ID`, S.lifetime_views, S.lifetime_favorites,
+        S.days_seen, S.first_date, S.last_date, CURRENT_TIMESTAMP()
+      );
+
+    MERGE `{BQ_DAILY_TOTALS_TABLE}` T
+    USING (
+      SELECT
+        Date,
+        COUNT(*) AS photos,
+        SUM(`Daily Views`) AS views,
+        SUM(`Daily Favorites`) AS favorites
+      FROM `{BQ_TARGET_TABLE}`
+      WHERE Date BETWEEN @min_date AND @max_date
+      GROUP BY Date
+    ) S
+      ON T.Date = S.Date
+    WHEN MATCHED THEN
+      UPDATE SET
+        T.photos     = S.photos,
+        T.views      = S.views,
+        T.favorites  = S.favorites,
+        T.updated_at = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN
+      INSERT (Date, photos, views, favorites, updated_at)
+      VALUES (S.Date, S.photos, S.views, S.favorites, CURRENT_TIMESTAMP());
+
+    SET window_end = (SELECT MAX(Date) FROM `{BQ_DAILY_TOTALS_TABLE}`);
+    IF @max_date > DATE_SUB(window_end, INTERVAL 30 DAY) THEN
+      CREATE OR REPLACE TABLE `{BQ_PHOTO_WINDOWS_TABLE}`
+      CLUSTER BY `Photo ID`
+      AS
+      SELECT
+        `Photo ID`,
+        window_end,
+        SUM(IF(Date > DATE_SUB(window_end, INTERVAL 7 DAY), `Daily Views`, 0)) AS views_7d,
+        SUM(IF(Date > DATE_SUB(window_end, INTERVAL 7 DAY), `Daily Favorites`, 0)) AS favorites_7d,
+        SUM(`Daily Views`) AS views_30d,
+        SUM(`Daily Favorites`) AS favorites_30d
+      FROM `{BQ_TARGET_TABLE}`
+      WHERE Date BETWEEN DATE_SUB(window_end, INTERVAL 29 DAY) AND window_end
+      GROUP BY `Photo ID`;
+    END IF;
+    """
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ScalarQueryParameter("min_date", "DATE", min_date),
+            bigquery.ScalarQueryParameter("max_date", "DATE", max_date),
+        ]
+    )
+    script_job = bq_client.query(script, job_config=job_config)
+    script_job.result()
+
+    jobs = script_child_jobs(bq_client, script_job)
+    merge_job = jobs.get("merge")
+    logger.info(
+        "MERGE and summary refresh completed (dates %s to %s): %s fact rows "
+        "affected, %s bytes processed in total.",
+        min_date, max_date,
+        getattr(merge_job, "num_dml_affected_rows", None),
+        script_job.total_bytes_processed,
+    )
+    jobs["script"] = script_job
+    return jobs
+
+
+def script_child_jobs(bq_client: bigquery.Client, script_job) -> dict:
+    """Return the DML/DDL statement jobs of a finished multi-statement job.
+
+    Args:
+        bq_client:  Authenticated BigQuery client.
+        script_job: Finished multi-statement QueryJob.
+
+    Returns:
+        Dict keyed by the short name of each statement's target table ("merge"
+        for BQ_TARGET_TABLE); statements without a target are left out.
+    """
+    jobs = {}
+    for child in bq_client.list_jobs(parent_job=script_job):
+        target = _STATEMENT_TARGET_PATTERN.search(getattr(child, "query", "") or "")
+        if target is None:
+            continue
+        table = target.group(1)
+        jobs["merge" if table == BQ_TARGET_TABLE else table.rsplit(".", 1)[-1]] = child
+    return jobs
+
+
+def truncate_stage(bq_client: bigquery.Client, stage_table: str = BQ_STAGE_TABLE):
     """Truncate the staging table after a successful MERGE.
 
     Args:
-        bq_client: Authenticated BigQuery client.
+        bq_client:   Authenticated BigQuery client.
+        stage_table: Fully-qualified staging table ID to truncate.
+
+    Returns:
+        The finished TRUNCATE QueryJob.
     """
-    truncate_sql = f"TRUNCATE TABLE `{BQ_STAGE_TABLE}`"
+    truncate_sql = f"TRUNCATE TABLE `{stage_table}`"
     query_job = bq_client.query(truncate_sql)
     query_job.result()
-    logger.info("Staging table %s truncated.", BQ_STAGE_TABLE)
+    logger.info("Staging table %s truncated.", stage_table)
+    return query_job
+
+
+def read_fingerprints(bq_client: bigquery.Client, dates: list) -> dict:
+    """Read the stored load fingerprints of dates from BQ_MANIFEST_TABLE.
+
+    Args:
+        bq_client: Authenticated BigQuery client.
+        dates:     Date strings in YYYY-MM-DD format.
+
+    Returns:
+        Dict mapping date strings to fingerprints, for the dates that have one.
+    """
+    from google.cloud import bigquery
+
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[bigquery.ArrayQueryParameter("dates", "DATE", dates)]
+    )
+    query_job = bq_client.query(
+        f"SELECT Date, fingerprint FROM `{BQ_MANIFEST_TABLE}` "
+        "WHERE Date IN UNNEST(@dates)",
+        job_config=job_config,
+    )
+    return {str(row["Date"]): row["fingerprint"] for row in query_job.result()}
+
+
+def find_gap_dates(bq_client: bigquery.Client, dates: list, settle_days: int = 0,
+                   min_views: int = 0):
+    """Return the dates of a window that are missing from or stale in the manifest.
+
+    Reads one BQ_MANIFEST_TABLE row per date of the window (the table is
+    clustered on Date), so the cost does not depend on the fact table.
+
+    Args:
+        bq_client:   Authenticated BigQuery client.
+        dates:       Sorted date strings (YYYY-MM-DD) of the window.
+        settle_days: A date whose last fetch happened less than this many
+                     days after the date ended is stale (0 = none are).
+        min_views:   Cutoff of the current run. A date whose last load was
+                     cut short by a higher cutoff is truncated.
+
+    Returns:
+        Tuple of (sorted gap dates, {"missing": [...], "stale": [...],
+        "truncated": [...]}).
+    """
+    from google.cloud import bigquery
+
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[bigquery.ArrayQueryParameter("dates", "DATE", dates)]
+    )
+    query_job = bq_client.query(
+        f"SELECT Date, row_count, fetched_at, min_views FROM `{BQ_MANIFEST_TABLE}` "
+        "WHERE Date IN UNNEST(@dates)",
+        job_config=job_config,
+    )
+    fetched = {}
+    truncated = []
+    for row in query_job.result():
+        fetched[str(row["Date"])] = row["fetched_at"]
+        if (row["min_views"] or 0) > min_views:
+            truncated.append(str(row["Date"]))
+
+    missing = [date for date in dates if date not in fetched]
+    stale = []
+    if settle_days > 0:
+        for date, fetched_at in fetched.items():
+            settled_at = datetime.strptime(date, DATE_FORMAT).replace(
+                tzinfo=timezone.utc
+            ) + timedelta(days=1 + settle_days)
+            if fetched_at is None or fetched_at < settled_at:
+                stale.append(date)
+    stale.sort()
+    truncated.sort()
+    logger.info(
+        "Manifest: %d of %d date(s) missing, %d stale (settle days: %d), %d "
+        "truncated by a cutoff above %d views.",
+        len(missing), len(dates), len(stale), settle_days, len(truncated),
+        min_views,
+    )
+    gaps = sorted(set(missing + stale + truncated))
+    return gaps, {"missing": missing, "stale": stale, "truncated": truncated}
+
+
+def write_fingerprints(bq_client: bigquery.Client, fingerprints: dict,
+                       cutoffs: dict = None):
+    """Upsert load fingerprints into BQ_MANIFEST_TABLE after a MERGE.
+
+    Args:
+        bq_client:    Authenticated BigQuery client.
+        fingerprints: Dict of {date: (fingerprint, row_count)}.
+        cutoffs:      Optional {date: min_views} for the dates a MinViews
+                      cutoff cut short; other dates are recorded with 0.
+
+    Returns:
+        The finished MERGE QueryJob.
+    """
+    from google.cloud import bigquery
+
+    entries = [
+        bigquery.StructQueryParameter(
+            None,
+            bigquery.ScalarQueryParameter("Date", "DATE", date),
+            bigquery.ScalarQueryParameter("fingerprint", "STRING", fingerprint),
+            bigquery.ScalarQueryParameter("row_count", "INT64", row_count),
+            bigquery.ScalarQueryParameter(
+                "min_views", "INT64", (cutoffs or {}).get(date, 0)
+            ),
+        )
+        for date, (fingerprint, row_count) in sorted(fingerprints.items())
+    ]
+    merge_sql = f"""
+    MERGE `{BQ_MANIFEST_TABLE}` T
+    USING UNNEST(@entries) S
+      ON T.Date = S.Date
+    WHEN MATCHED THEN
+      UPDATE SET
+        T.fingerprint = S.fingerprint,
+        T.row_count   = S.row_count,
+        T.min_views   = S.min_views,
+        T.fetched_at  = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN
+      INSERT (Date, fingerprint, row_count, min_views, fetched_at)
+      VALUES (S.Date, S.fingerprint, S.row_count, S.min_views, CURRENT_TIMESTAMP())
+    """
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[bigquery.ArrayQueryParameter("entries", "STRUCT", entries)]
+    )
+    query_job = bq_client.query(merge_sql, job_config=job_config)
+    query_job.result()
+    logger.info("Recorded load fingerprints for %d date(s).", len(entries))
+    return query_job
+
+
+def known_photos(bq_client: bigquery.Client) -> dict:
+    """Return the process-wide photo metadata cache, loading it on first use.
+
+    The first call on an instance reads every photo's metadata from
+    BQ_PHOTOS_TABLE (one small, unpartitioned table); later calls, including
+    those of later requests on a warm instance, return the cache as
+    upsert_photos left it.
+
+    Args:
+        bq_client: Authenticated BigQuery client.
+
+    Returns:
+        Dict mapping Photo ID to (title, secret, server, owner).
+    """
+    if _photo_cache_loaded.is_set():
+        return _photo_cache
+    with _photo_cache_lock:
+        if not _photo_cache_loaded.is_set():
+            query_job = bq_client.query(
+                "SELECT `Photo ID`, `Photo Title`, Secret, Server, Owner "
+                f"FROM `{BQ_PHOTOS_TABLE}`"
+            )
+            _photo_cache.update(
+                (row["Photo ID"],
+                 (row["Photo Title"], row["Secret"], row["Server"], row["Owner"]))
+                for row in query_job.result()
+            )
+            _photo_cache_loaded.set()
+            logger.info("Loaded metadata of %d known photos.", len(_photo_cache))
+    return _photo_cache
+
+
+def upsert_photos(bq_client: bigquery.Client, photos: dict) -> dict:
+    """Insert new photos into BQ_PHOTOS_TABLE and update edited ones.
+
+    Photos are sent as query parameters in batches of PHOTO_UPSERT_BATCH.
+    Rows whose stored values already match are left alone. Once a batch is
+    written its photos are added to the in-process cache (see known_photos).
+
+    Args:
+        bq_client: Authenticated BigQuery client.
+        photos:    Dict of {photo_id: (title, secret, server, owner)}, as
+                   collected by iter_photo_changes.
+
+    Returns:
+        Dict of the finished MERGE QueryJobs, keyed "photos" (then
+        "photos_2", "photos_3", ... for further batches).
+    """
+    from google.cloud import bigquery
+
+    merge_sql = f"""
+    MERGE `{BQ_PHOTOS_TABLE}` T
+    USING UNNEST(@photos) S
+      ON T.`Photo ID` = S.photo_id
+    WHEN MATCHED AND (
+      T.`Photo Title` IS DISTINCT FROM S.title
+      OR T.Secret IS DISTINCT FROM S.secret
+      OR T.Server IS DISTINCT FROM S.server
+      OR T.Owner IS DISTINCT FROM S.owner
+    ) THEN
+      UPDATE SET
+        T.`Photo Title` = S.title,
+        T.Secret        = S.secret,
+        T.Server        = S.server,
+        T.Owner         = S.owner,
+        T.updated_at    = CURRENT_TIMESTAMP()
+    WHEN NOT MATCHED THEN
+      INSERT (`Photo ID`, `Photo Title`, Secret, Server, Owner, updated_at)
+      VALUES (S.photo_id, S.title, S.secret, S.server, S.owner, CURRENT_TIMESTAMP())
+    """
+    items = sorted(photos.items())
+    jobs = {}
+    for start in range(0, len(items), PHOTO_UPSERT_BATCH):
+        batch = items[start:start + PHOTO_UPSERT_BATCH]
+        entries = [
+            bigquery.StructQueryParameter(
+                None,
+                bigquery.ScalarQueryParameter("photo_id", "INT64", photo_id),
+                bigquery.ScalarQueryParameter("title", "STRING", title),
+                bigquery.ScalarQueryParameter("secret", "STRING", secret),
+                bigquery.ScalarQueryParameter("server", "INT64", server),
+                bigquery.ScalarQueryParameter("owner", "STRING", owner),
+            )
+            for photo_id, (title, secret, server, owner) in batch
+        ]
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ArrayQueryParameter("photos", "STRUCT", entries)]
+        )
+        query_job = bq_client.query(merge_sql, job_config=job_config)
+        query_job.result()
+        with _photo_cache_lock:
+            _photo_cache.update(batch)
+        jobs["photos" if not jobs else f"photos_{len(jobs) + 1}"] = query_job
+
+    logger.info(
+        "Upserted %d new or changed photos into %s in %d job(s).",
+        len(items), BQ_PHOTOS_TABLE, len(jobs),
+    )
+    return jobs
+
+
+def create_run_stage_table(bq_client: bigquery.Client) -> str:
+    """Create a staging table private to the current run.
+
+    The table uses the stage schema from docs/stage_daily_extract.schema.json
+    and expires after STAGE_TABLE_TTL, so it is cleaned up by BigQuery even if
+    drop_stage_table is never reached.
+
+    Args:
+        bq_client: Authenticated BigQuery client.
+
+    Returns:
+        Fully-qualified ID of the new staging table.
+    """
+    from google.cloud import bigquery
+
+    table_id = f"{BQ_STAGE_TABLE}_{uuid.uuid4().hex[:12]}"
+    table = bigquery.Table(
+        table_id, schema=bq_client.schema_from_json(STAGE_SCHEMA_PATH)
+    )
+    table.expires = datetime.now(timezone.utc) + STAGE_TABLE_TTL
+    bq_client.create_table(table)
+    logger.info("Created run staging table %s.", table_id)
+    return table_id
+
+
+def drop_stage_table(bq_client: bigquery.Client, stage_table: str) -> None:
+    """Delete a per-run staging table created by create_run_stage_table.
+
+    This is a metadata call rather than a query job, so it replaces the
+    TRUNCATE job at no query cost.
+
+    Args:
+        bq_client:   Authenticated BigQuery client.
+        stage_table: Fully-qualified staging table ID to delete.
+    """
+    bq_client.delete_table(stage_table, not_found_ok=True)
+    logger.info("Dropped run staging table %s.", stage_table)
 
 
 def resolve_requested_date(request) -> str:
@@ -318,6 +1592,301 @@ def resolve_requested_date(request) -> str:
         return default_date
 
 
+def _parse_payload_date(value):
+    """Return value normalised to YYYY-MM-DD, or None if it is not a valid date."""
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value, DATE_FORMAT).strftime(DATE_FORMAT)
+    except ValueError:
+        return None
+
+
+def resolve_requested_dates(request) -> list:
+    """Resolve the list of dates to process from the request JSON payload.
+
+    Supported payload shapes, checked in this order:
+
+    * ``{"Dates": ["2026-04-01", "2026-04-03"]}`` – an explicit list. Invalid
+      entries are ignored with a warning; duplicates are removed.
+    * ``{"StartDate": "2026-04-01", "EndDate": "2026-04-30"}`` – an inclusive
+      range.
+    * Anything else is delegated to ``resolve_requested_date`` (single `Date`
+      or yesterday in UTC).
+
+    Args:
+        request: Flask Request object.
+
+    Returns:
+        Sorted list of date strings in YYYY-MM-DD format.
+
+    Raises:
+        ValueError: If the range is inverted, no listed date is valid, or more
+            than MAX_BATCH_DATES dates are requested.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return [resolve_requested_date(request)]
+
+    if "Dates" in payload:
+        requested = payload["Dates"]
+        if not isinstance(requested, list):
+            raise ValueError("Dates must be a list of YYYY-MM-DD strings.")
+        dates = set()
+        for value in requested:
+            parsed = _parse_payload_date(value)
+            if parsed is None:
+                logger.warning("Ignoring invalid Dates entry %r.", value)
+                continue
+            dates.add(parsed)
+        if not dates:
+            raise ValueError("Dates contains no valid YYYY-MM-DD values.")
+        dates = sorted(dates)
+
+    elif "StartDate" in payload or "EndDate" in payload:
+        start = _parse_payload_date(payload.get("StartDate"))
+        end = _parse_payload_date(payload.get("EndDate"))
+        if start is None or end is None:
+            raise ValueError(
+                f"StartDate and EndDate must both be set in {DATE_FORMAT} format."
+            )
+        start_dt = datetime.strptime(start, DATE_FORMAT)
+        end_dt = datetime.strptime(end, DATE_FORMAT)
+        if end_dt < start_dt:
+            raise ValueError("EndDate cannot be before StartDate.")
+        dates = [
+            (start_dt + timedelta(days=offset)).strftime(DATE_FORMAT)
+            for offset in range((end_dt - start_dt).days + 1)
+        ]
+
+    else:
+        return [resolve_requested_date(request)]
+
+    if len(dates) > MAX_BATCH_DATES:
+        raise ValueError(
+            f"{len(dates)} dates requested; at most {MAX_BATCH_DATES} are "
+            "allowed per request."
+        )
+
+    logger.info(
+        "Using %d requested date(s) from payload: %s to %s",
+        len(dates), dates[0], dates[-1],
+    )
+    return dates
+
+
+def resolve_load_mode(request) -> str:
+    """Resolve the staging load mode from the optional `LoadMode` payload field.
+
+    Args:
+        request: Flask Request object.
+
+    Returns:
+        One of LOAD_MODES; BQ_LOAD_MODE when the field is missing or invalid.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or "LoadMode" not in payload:
+        return BQ_LOAD_MODE
+
+    mode = payload["LoadMode"]
+    if mode not in LOAD_MODES:
+        logger.warning(
+            "Ignoring invalid LoadMode %r. Using default: %s", mode, BQ_LOAD_MODE
+        )
+        return BQ_LOAD_MODE
+    return mode
+
+
+def resolve_min_views(request) -> int:
+    """Resolve the pagination cutoff from the optional `MinViews` payload field.
+
+    Args:
+        request: Flask Request object.
+
+    Returns:
+        Minimum daily views to fetch; FLICKR_MIN_VIEWS when the field is
+        missing or not a non-negative integer.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or "MinViews" not in payload:
+        return FLICKR_MIN_VIEWS
+
+    min_views = payload["MinViews"]
+    if isinstance(min_views, bool) or not isinstance(min_views, int) or min_views < 0:
+        logger.warning(
+            "Ignoring invalid MinViews %r. Using default: %d",
+            min_views, FLICKR_MIN_VIEWS,
+        )
+        return FLICKR_MIN_VIEWS
+    return min_views
+
+
+def resolve_start_page(request) -> int:
+    """Resolve the optional `StartPage` payload field of a continuation.
+
+    Args:
+        request: Flask Request object.
+
+    Returns:
+        Page to start the first requested date at; 1 when the field is
+        missing or not a positive integer.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or "StartPage" not in payload:
+        return 1
+
+    start_page = payload["StartPage"]
+    if isinstance(start_page, bool) or not isinstance(start_page, int) or start_page < 1:
+        logger.warning("Ignoring invalid StartPage %r. Starting at page 1.", start_page)
+        return 1
+    return start_page
+
+
+def build_continuation(
+    processing_dates: list, stopped, load_mode: str, min_views: int, force: bool = False
+) -> dict:
+    """Build the payload that resumes a run stopped by its deadline.
+
+    The result is a valid request payload on its own: POSTing it back to the
+    function fetches the remaining dates, starting the interrupted one at the
+    first page that was not loaded.
+
+    Args:
+        processing_dates: Sorted list of dates the run was asked for.
+        stopped:          FetchStopped raised by the fetch iterators.
+        load_mode:        Load mode of the run (carried over).
+        min_views:        Pagination cutoff of the run (carried over).
+        force:            Whether the run ignored fingerprints (carried over).
+
+    Returns:
+        Dict with `Dates`, `StartPage`, `LoadMode`, `MinViews` and `Force`.
+    """
+    remaining = processing_dates[processing_dates.index(stopped.date):]
+    return {
+        "Dates": remaining,
+        "StartPage": stopped.next_page,
+        "LoadMode": load_mode,
+        "MinViews": min_views,
+        "Force": force,
+    }
+
+
+def resolve_force(request) -> bool:
+    """Return whether the `Force` payload field disables fingerprint skipping.
+
+    Args:
+        request: Flask Request object.
+
+    Returns:
+        True only when the payload sets `Force` to true.
+    """
+    payload = request.get_json(silent=True)
+    return isinstance(payload, dict) and payload.get("Force") is True
+
+
+def resolve_fill_gaps(request) -> bool:
+    """Return whether the `FillGaps` payload field asks for gap filling.
+
+    Args:
+        request: Flask Request object.
+
+    Returns:
+        True only when the payload sets `FillGaps` to true.
+    """
+    payload = request.get_json(silent=True)
+    return isinstance(payload, dict) and payload.get("FillGaps") is True
+
+
+def resolve_gap_window(request) -> list:
+    """Resolve the window of dates a `FillGaps` run checks.
+
+    A `Dates`, `StartDate`/`EndDate` or `Date` field is resolved as usual (see
+    resolve_requested_dates); without one the window is the FILL_GAPS_DAYS
+    days up to yesterday in UTC.
+
+    Args:
+        request: Flask Request object.
+
+    Returns:
+        Sorted list of date strings in YYYY-MM-DD format.
+
+    Raises:
+        ValueError: As raised by resolve_requested_dates.
+    """
+    payload = request.get_json(silent=True)
+    if any(key in payload for key in ("Dates", "StartDate", "EndDate", "Date")):
+        return resolve_requested_dates(request)
+
+    yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+    dates = [
+        (yesterday - timedelta(days=offset)).strftime(DATE_FORMAT)
+        for offset in reversed(range(FILL_GAPS_DAYS))
+    ]
+    logger.info("Checking the last %d days for gaps: %s to %s", len(dates), dates[0], dates[-1])
+    return dates
+
+
+def resolve_settle_days(request) -> int:
+    """Resolve the staleness threshold of a `FillGaps` run.
+
+    Args:
+        request: Flask Request object.
+
+    Returns:
+        The payload's `SettleDays` when it is a non-negative integer,
+        otherwise MANIFEST_SETTLE_DAYS.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or "SettleDays" not in payload:
+        return MANIFEST_SETTLE_DAYS
+
+    settle_days = payload["SettleDays"]
+    if isinstance(settle_days, bool) or not isinstance(settle_days, int) or settle_days < 0:
+        logger.warning(
+            "Ignoring invalid SettleDays %r. Using %d.", settle_days, MANIFEST_SETTLE_DAYS
+        )
+        return MANIFEST_SETTLE_DAYS
+    return settle_days
+
+
+def resolve_quota_per_hour(request):
+    """Resolve the optional `QuotaPerHour` payload field.
+
+    backfill_coordinator sends each function instance its share of the
+    Flickr quota, since the instances do not share a rate limiter.
+
+    Args:
+        request: Flask Request object.
+
+    Returns:
+        Flickr requests per hour this run may make, or None (the process-wide
+        FLICKR_HOURLY_QUOTA limiter) when the field is missing or not a
+        positive number.
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or "QuotaPerHour" not in payload:
+        return None
+
+    quota = payload["QuotaPerHour"]
+    if isinstance(quota, bool) or not isinstance(quota, (int, float)) or quota <= 0:
+        logger.warning("Ignoring invalid QuotaPerHour %r.", quota)
+        return None
+    return quota
+
+
+def resolve_return_metrics(request) -> bool:
+    """Return whether the `ReturnMetrics` payload field asks for a JSON body.
+
+    Args:
+        request: Flask Request object.
+
+    Returns:
+        True only when the payload sets `ReturnMetrics` to true.
+    """
+    payload = request.get_json(silent=True)
+    return isinstance(payload, dict) and payload.get("ReturnMetrics") is True
+
+
 # ---------------------------------------------------------------------------
 # Cloud Function entry point
 # ---------------------------------------------------------------------------
@@ -333,28 +1902,461 @@ def main_handler(request):
     an optional `Date` field in YYYY-MM-DD format. If it is missing or invalid,
     the function falls back to yesterday in UTC.
 
+    For backfills the payload may instead carry a `Dates` list or a
+    `StartDate`/`EndDate` range (see resolve_requested_dates). All dates are
+    fetched concurrently, staged together, and upserted with a single MERGE.
+
+    Rows flow from Flickr to staging as a stream: pages are yielded as they
+    arrive and flushed in STAGE_CHUNK_ROWS chunks while later pages are still
+    downloading, so memory stays flat however many photos or dates are
+    processed.
+
+    An optional `MinViews` field stops pagination once photos drop below that
+    many daily views (see iter_page_rows); the skipped tail is reported in the
+    run metrics.
+
+    Each run stages into its own table (see create_run_stage_table), so
+    scheduled runs and manual backfills can execute in parallel.
+
+    Dates whose freshly fetched (Photo ID, views, favorites) values match the
+    fingerprint recorded in BQ_MANIFEST_TABLE by their last load are still
+    staged, but when no staged date changed the MERGE is skipped (see
+    iter_fingerprinted_dates); `"Force": true` merges them anyway.
+
+    With `"FillGaps": true` the requested dates (by default the
+    FILL_GAPS_DAYS days up to yesterday) are only a window: the manifest is
+    read first and just the dates it has no row for, or that were fetched
+    less than `SettleDays` (MANIFEST_SETTLE_DAYS) days after they ended, are
+    processed (see find_gap_dates).
+
+    Fetching stops RUN_RESERVE_SECONDS before the FUNCTION_TIMEOUT_SECONDS
+    timeout: no Flickr request, retry or rate-limiter wait is started past
+    that point. The rows fetched so far are still staged and merged, and the
+    response carries a `continuation` payload (remaining `Dates` plus the
+    `StartPage` of the interrupted one) that resumes the run when POSTed
+    back, so long backfills finish over several invocations.
+
+    Every run emits one structured log record with per-stage timings, Flickr
+    call latency and retry totals, BigQuery job costs and peak memory (see
+    run_metrics). With `"ReturnMetrics": true` in the payload the same record
+    is returned as the JSON response body alongside the message.
+
     Args:
         request: Flask Request object with an optional JSON payload.
 
     Returns:
-        Tuple of (message, HTTP status code).
+        Tuple of (message, HTTP status code), or (dict with "message" and
+        "metrics" and/or "continuation", HTTP status code) when metrics were
+        requested or the run was cut short by its deadline.
     """
-    processing_date = resolve_requested_date(request)
-    logger.info("Starting Flickr stats extraction for: %s", processing_date)
+    from flickr_api import Deadline
 
-    flickr_client = get_cloud_authenticated_client()
-    rows = fetch_flickr_stats(flickr_client, processing_date)
+    deadline = Deadline(FUNCTION_TIMEOUT_SECONDS - RUN_RESERVE_SECONDS)
 
-    if not rows:
-        msg = f"No data returned from Flickr for {processing_date}."
+    fill_gaps = resolve_fill_gaps(request)
+    try:
+        if fill_gaps:
+            processing_dates = resolve_gap_window(request)
+        else:
+            processing_dates = resolve_requested_dates(request)
+    except ValueError as exc:
+        msg = f"Invalid request: {exc}"
         logger.warning(msg)
-        return msg, 200
+        return msg, 400
+
+    result = process_dates(
+        processing_dates,
+        load_mode=resolve_load_mode(request),
+        min_views=resolve_min_views(request),
+        start_page=resolve_start_page(request),
+        force=resolve_force(request),
+        fill_gaps=fill_gaps,
+        settle_days=resolve_settle_days(request),
+        deadline=deadline,
+        quota_per_hour=resolve_quota_per_hour(request),
+    )
+    return_metrics = resolve_return_metrics(request)
+    if not return_metrics and result["continuation"] is None:
+        return result["message"], 200
+    body = {"message": result["message"]}
+    if result["continuation"] is not None:
+        body["continuation"] = result["continuation"]
+    if return_metrics:
+        body["metrics"] = result["metrics"]
+    return body, 200
+
+
+def process_dates(
+    processing_dates: list,
+    load_mode: str = BQ_LOAD_MODE,
+    min_views: int = FLICKR_MIN_VIEWS,
+    start_page: int = 1,
+    force: bool = False,
+    fill_gaps: bool = False,
+    settle_days: int = MANIFEST_SETTLE_DAYS,
+    deadline=None,
+    quota_per_hour: float = None,
+) -> dict:
+    """Fetch, stage and merge the Flickr stats of a list of dates.
+
+    The work behind main_handler, without the HTTP request: the handler
+    resolves its payload into these arguments, and backfill_coordinator
+    workers call it directly for each shard they claim. Emits the run's
+    structured log record.
+
+    Args:
+        processing_dates: Sorted list of dates (or, with fill_gaps, the window
+                          to check for gaps).
+        load_mode:        One of LOAD_MODES.
+        min_views:        Pagination cutoff (0 = fetch every photo).
+        start_page:       First page of processing_dates[0] (when resuming).
+        force:            Stage and merge every date, even unchanged ones.
+        fill_gaps:        Process only the missing or stale dates of the
+                          window (see find_gap_dates).
+        settle_days:      Staleness threshold of a fill_gaps run.
+        deadline:         Optional flickr_api.Deadline after which no more
+                          pages are fetched and a continuation is returned.
+        quota_per_hour:   Pace this run's Flickr requests with a limiter of
+                          its own at this rate, without bursts, instead of the
+                          process-wide one.
+
+    Returns:
+        Dict with the outcome "message", the "continuation" payload (None when
+        every date was fetched) and the run's "metrics" record.
+
+    Raises:
+        ValueError: If BQ_STAGE_STRATEGY is not one of STAGE_STRATEGIES.
+    """
+    from run_metrics import RunMetrics, emit_structured_log
+
+    if fill_gaps and start_page > 1:
+        logger.warning("Ignoring StartPage %d in a FillGaps run.", start_page)
+        start_page = 1
+    stage_strategy = BQ_STAGE_STRATEGY
+    if stage_strategy not in STAGE_STRATEGIES:
+        raise ValueError(
+            f"Unknown BQ_STAGE_STRATEGY {stage_strategy!r}; expected one of "
+            f"{STAGE_STRATEGIES}."
+        )
+    if stage_strategy == "ephemeral" and load_mode == "stream":
+        # Streaming inserts into a freshly created table can be silently
+        # dropped for a few minutes, so streaming always uses the shared table.
+        logger.warning("LoadMode 'stream' uses the shared staging table.")
+        stage_strategy = "shared"
+
+    label = describe_dates(processing_dates)
+    if start_page > 1:
+        label = f"{label}, resuming {processing_dates[0]} at page {start_page}"
+    logger.info(
+        "Starting Flickr stats extraction for: %s%s",
+        "gaps in " if fill_gaps else "", label,
+    )
+
+    metrics = RunMetrics(
+        first_date=processing_dates[0],
+        last_date=processing_dates[-1],
+        date_count=len(processing_dates),
+        load_mode=load_mode,
+        stage_strategy=stage_strategy,
+        page_size=FLICKR_PAGE_SIZE,
+        min_views=min_views,
+        start_page=start_page,
+        force=force,
+        fill_gaps=fill_gaps,
+        quota_per_hour=quota_per_hour,
+    )
+    try:
+        if fill_gaps:
+            with metrics.stage("gaps"):
+                processing_dates = _select_gap_dates(
+                    processing_dates, settle_days, metrics, min_views
+                )
+        if processing_dates:
+            msg, continuation = _run_extraction(
+                processing_dates,
+                describe_dates(processing_dates) if fill_gaps else label,
+                load_mode,
+                stage_strategy,
+                metrics,
+                min_views,
+                deadline,
+                start_page,
+                force,
+                quota_per_hour,
+            )
+        else:
+            msg, continuation = f"No missing or stale dates in {label}.", None
+            logger.info(msg)
+            metrics.status = "no_gaps"
+    except Exception as exc:
+        metrics.record(error=f"{type(exc).__name__}: {exc}")
+        emit_structured_log(metrics.as_dict(), severity="ERROR")
+        raise
+
+    record = metrics.as_dict()
+    emit_structured_log(record, severity="WARNING" if continuation else "INFO")
+    return {"message": msg, "continuation": continuation, "metrics": record}
 
-    bq_client = bigquery.Client(project=GCP_PROJECT_ID)
-    load_to_stage(bq_client, rows)
-    run_merge(bq_client)
-    truncate_stage(bq_client)
 
-    msg = f"Successfully processed {len(rows)} rows for {processing_date}."
+def describe_dates(dates: list) -> str:
+    """Return a short human-readable description of a sorted date list."""
+    if len(dates) == 1:
+        return dates[0]
+    return f"{len(dates)} dates ({dates[0]} to {dates[-1]})"
+
+
+def _select_gap_dates(window: list, settle_days: int, metrics,
+                      min_views: int = 0) -> list:
+    """Narrow a FillGaps window to its missing, stale and truncated dates.
+
+    Args:
+        window:      Sorted list of dates to check.
+        settle_days: Staleness threshold (see find_gap_dates).
+        metrics:     run_metrics.RunMetrics; the date fields are updated to
+                     the gap dates and the window is recorded.
+        min_views:   Cutoff of the run (see find_gap_dates).
+
+    Returns:
+        Sorted list of the dates to process (possibly empty).
+    """
+    gaps, details = find_gap_dates(get_bq_client(), window, settle_days, min_views)
+    metrics.record(
+        window_first_date=window[0],
+        window_last_date=window[-1],
+        window_date_count=len(window),
+        settle_days=settle_days,
+        dates_missing=len(details["missing"]),
+        dates_stale=len(details["stale"]),
+        dates_truncated=len(details["truncated"]),
+        first_date=gaps[0] if gaps else None,
+        last_date=gaps[-1] if gaps else None,
+        date_count=len(gaps),
+    )
+    if gaps:
+        logger.info(
+            "Filling %d gap date(s) of %d: %s", len(gaps), len(window), ", ".join(gaps)
+        )
+    return gaps
+
+
+def _run_extraction(
+    processing_dates: list,
+    label: str,
+    load_mode: str,
+    stage_strategy: str,
+    metrics,
+    min_views: int = 0,
+    deadline=None,
+    start_page: int = 1,
+    force: bool = False,
+    quota_per_hour: float = None,
+):
+    """Fetch, stage and merge the rows for processing_dates.
+
+    Args:
+        processing_dates: Sorted list of dates to process.
+        label:            Human-readable description of the dates for messages.
+        load_mode:        One of LOAD_MODES.
+        stage_strategy:   One of STAGE_STRATEGIES.
+        metrics:          run_metrics.RunMetrics filled in as the run proceeds.
+        min_views:        Pagination cutoff (0 = fetch every photo).
+        deadline:         Optional flickr_api.Deadline after which no more
+                          pages are fetched.
+        start_page:       First page of processing_dates[0] (when resuming).
+        force:            Stage and merge every date, even unchanged ones.
+        quota_per_hour:   Optional Flickr request rate for this run alone
+                          (see process_dates).
+
+    Returns:
+        Tuple of (message describing the outcome, continuation payload or
+        None when every date was fetched).
+    """
+    # Import bigquery, build its client and read the stored fingerprints and
+    # known photos while Flickr pages download.
+    prefetch = ThreadPoolExecutor(max_workers=2)
+    if force:
+        stored_fingerprints = dict
+    else:
+        stored_fingerprints = prefetch.submit(
+            _prefetch_fingerprints, processing_dates
+        ).result
+    photos_known = prefetch.submit(_prefetch_known_photos).result
+    prefetch.shutdown(wait=False)
+
+    with metrics.stage("flickr_client"):
+        flickr_client = get_flickr_client()
+    fetch_options = {
+        "stats": metrics.flickr,
+        "min_views": min_views,
+        "deadline": deadline,
+        "start_page": start_page,
+    }
+    if quota_per_hour is not None:
+        from flickr_ratelimit import TokenBucket
+
+        # Capacity 1: a share of the quota must not be exceeded by bursts.
+        fetch_options["limiter"] = TokenBucket(quota_per_hour / 3600.0, capacity=1)
+    if len(processing_dates) == 1:
+        rows = iter_flickr_stats(flickr_client, processing_dates[0], **fetch_options)
+    else:
+        rows = iter_dates_rows(flickr_client, processing_dates, **fetch_options)
+    stopped = []
+    rows = iter_until_stopped(rows, stopped)
+    changed_photos = {}
+    rows = iter_photo_changes(rows, photos_known, changed_photos)
+
+    def is_complete(date: str) -> bool:
+        if date == processing_dates[0] and start_page > 1:
+            return False
+        if date in metrics.flickr.incomplete_dates:
+            logger.warning(
+                "Date: %s - pages failed; not fingerprinted, so the next run "
+                "fetches it again.", date,
+            )
+            return False
+        return not any(exc.date == date for exc in stopped)
+
+    fingerprints = {}
+    rows = iter_fingerprinted_dates(rows, fingerprints, is_complete)
+
+    def continuation():
+        if not stopped:
+            return None
+        payload = build_continuation(
+            processing_dates, stopped[0], load_mode, min_views, force
+        )
+        metrics.status = "partial"
+        metrics.record(continuation=payload)
+        logger.warning(
+            "Deadline reached: %d date(s) left, resuming %s at page %d.",
+            len(payload["Dates"]), payload["Dates"][0], payload["StartPage"],
+        )
+        return payload
+
+    def record_empty_dates():
+        # Dates Flickr had no (qualifying) photos for never reach
+        # iter_fingerprinted_dates; an empty fingerprint with row_count 0
+        # marks them as loaded, so FillGaps does not fetch them every run.
+        for date in processing_dates:
+            if (
+                date not in fingerprints
+                and date in metrics.flickr.paginated_dates
+                and date not in metrics.flickr.incomplete_dates
+                and is_complete(date)
+            ):
+                fingerprints[date] = (date_fingerprint([]), 0)
+
+    def write_manifest(bq_client):
+        # A date cut short by min_views keeps its cutoff in the manifest, so
+        # a FillGaps run with a lower cutoff fetches its tail.
+        cutoffs = {
+            date: min_views
+            for date in fingerprints if date in metrics.flickr.skipped_tail
+        }
+        with metrics.stage("manifest"):
+            write_fingerprints(bq_client, fingerprints, cutoffs)
+
+    def write_photos():
+        # Runs once every row has been consumed, so all photos are collected.
+        if changed_photos:
+            with metrics.stage("photos"):
+                jobs = upsert_photos(get_bq_client(), changed_photos)
+                for name, job in jobs.items():
+                    metrics.record_job(name, job)
+        metrics.record(photos_upserted=len(changed_photos))
+
+    with metrics.stage("first_page"):
+        first_row = next(rows, None)
+    if first_row is None:
+        write_photos()
+        record_empty_dates()
+        if fingerprints:
+            # Only dates without photos; recording them refreshes fetched_at.
+            write_manifest(get_bq_client())
+        if stopped:
+            msg = f"Deadline reached before any rows were fetched for {label}."
+            logger.warning(msg)
+            return msg, continuation()
+        msg = f"No data returned from Flickr for {label}."
+        logger.warning(msg)
+        metrics.status = "no_data"
+        return msg, None
+    rows = itertools.chain([first_row], rows)
+
+    with metrics.stage("bq_client"):
+        bq_client = get_bq_client()
+    if stage_strategy == "shared":
+        stage_table = BQ_STAGE_TABLE
+    else:
+        with metrics.stage("create_stage"):
+            stage_table = create_run_stage_table(bq_client)
+    try:
+        # Fetching and staging overlap, so they are timed as one stage.
+        with metrics.stage("fetch_and_stage"):
+            loaded = load_rows_in_chunks(
+                bq_client, rows, mode=load_mode, stage_table=stage_table
+            )
+        metrics.rows = loaded["rows"]
+        metrics.record(
+            stage_chunks=loaded["chunks"],
+            insert_seconds=loaded["insert_seconds"],
+        )
+        unchanged = unchanged_dates(fingerprints, stored_fingerprints())
+        metrics.record(dates_unchanged=len(unchanged))
+        if set(loaded["dates"]) <= set(unchanged):
+            logger.info(
+                "No changes in %d staged date(s) since the last load; "
+                "skipping the MERGE.", len(unchanged),
+            )
+            merge_jobs = {}
+        else:
+            # Unchanged dates staged alongside changed ones are merged too;
+            # their rows match, so the MERGE rewrites none of them.
+            with metrics.stage("merge"):
+                if BQ_AGGREGATES:
+                    merge_jobs = run_merge_with_aggregates(
+                        bq_client, stage_table,
+                        loaded["dates"][0], loaded["dates"][-1],
+                    )
+                else:
+                    merge_jobs = {
+                        "merge": run_merge(
+                            bq_client,
+                            stage_table=stage_table,
+                            min_date=loaded["dates"][0],
+                            max_date=loaded["dates"][-1],
+                        )
+                    }
+        for name, job in merge_jobs.items():
+            metrics.record_job(name, job)
+        write_photos()
+        record_empty_dates()
+        if fingerprints:
+            write_manifest(bq_client)
+        if stage_strategy == "shared":
+            with metrics.stage("truncate"):
+                metrics.record_job("truncate", truncate_stage(bq_client))
+    finally:
+        if stage_strategy != "shared":
+            with metrics.stage("drop_stage"):
+                drop_stage_table(bq_client, stage_table)
+
+    metrics.record(flickr_http=log_connection_stats(flickr_client))
+    metrics.status = "ok" if merge_jobs else "unchanged"
+
+    if stopped:
+        msg = (
+            f"Processed {loaded['rows']} rows for {label} before the deadline; "
+            "resubmit the continuation to finish."
+        )
+        logger.warning(msg)
+        return msg, continuation()
+
+    if not merge_jobs:
+        msg = f"No changes for {label} since the last load; skipped the MERGE."
+    else:
+        msg = f"Successfully processed {loaded['rows']} rows for {label}."
+        if unchanged:
+            msg += f" {len(unchanged)} date(s) were unchanged."
     logger.info(msg)
-    return msg, 200
+    return msg, None
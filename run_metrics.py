@@ -0,0 +1,292 @@
+"""Per-run timing and cost instrumentation for the Cloud Function.
+
+``RunMetrics`` collects one run's numbers and turns them into a single flat
+record that main_handler logs (and optionally returns) when the run ends:
+
+* Flickr – per-call latency percentiles, retries, rate-limit hits, time spent
+  sleeping between retries and waiting for the rate limiter (``CallStats``,
+  filled in by ``flickr_api.make_api_call_with_retry``), plus HTTP requests and
+  pooled connections.
+* Stages – wall time of each step of the run (first page, stage load, MERGE,
+  TRUNCATE / table drop), rows/s and the total time spent in load jobs or
+  streaming inserts.
+* BigQuery – bytes processed and billed, slot-milliseconds and rows affected
+  of the MERGE (and any other query job recorded).
+* Memory – peak resident set size during the run (of the process where the
+  kernel's peak cannot be reset) and the row buffer's spill counters.
+
+``emit_structured_log`` writes the record to stdout as one JSON line with a
+``severity`` field, which Cloud Logging stores as a structured ``jsonPayload``
+that can be charted and alerted on with log-based metrics.
+"""
+
+import json
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+STRUCTURED_LOG_MESSAGE = "flickrstats run metrics"
+_PROC_STATUS = "/proc/self/status"
+_PROC_CLEAR_REFS = "/proc/self/clear_refs"
+
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    """Return the nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def reset_peak_rss() -> bool:
+    """Reset the kernel's peak-RSS mark so peak_rss_mib covers what follows.
+
+    Writes to /proc/self/clear_refs, which only Linux supports (and not every
+    sandbox allows).
+
+    Returns:
+        Whether the mark was reset.
+    """
+    try:
+        with open(_PROC_CLEAR_REFS, "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def _proc_status_kib(field: str):
+    """Return a kB field of /proc/self/status (e.g. VmHWM), if available."""
+    try:
+        with open(_PROC_STATUS) as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def peak_rss_mib():
+    """Return the peak resident set size of this process in MiB, if known.
+
+    The value is the high-water mark since the last reset_peak_rss, or since
+    the process started (covering earlier requests on a warm instance) where
+    the mark cannot be reset.
+    """
+    high_water = _proc_status_kib("VmHWM")
+    if high_water is not None:
+        return round(high_water / 1024, 1)
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS.
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+class CallStats:
+    """Thread-safe counters for Flickr API calls made during one run.
+
+    Pass an instance as ``stats`` to ``flickr_api.make_api_call_with_retry``;
+    every call records its end-to-end latency (including retries and waits)
+    and what it spent on retries.  The fetch helpers in main.py also record,
+    per date, how much of the page tail a min_views cutoff skipped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.calls = 0
+        self.cache_hits = 0
+        self.attempts = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failed = 0
+        self.retry_sleep_seconds = 0.0
+        self.limiter_wait_seconds = 0.0
+        self.pages_total = 0
+        self.pages_read = 0
+        self.skipped_tail = {}
+        self.incomplete_dates = {}
+        self.paginated_dates = set()
+
+    def record_call(self, latency: float, attempts: int = 1,
+                    rate_limited: int = 0, retry_sleep: float = 0.0,
+                    limiter_wait: float = 0.0, cache_hit: bool = False,
+                    failed: bool = False) -> None:
+        """Record one make_api_call_with_retry call.
+
+        Args:
+            latency:      Seconds from the start of the call until it returned.
+            attempts:     HTTP attempts made (0 for a cache hit).
+            rate_limited: Attempts answered with a Flickr rate-limit error.
+            retry_sleep:  Seconds slept between attempts.
+            limiter_wait: Seconds spent waiting for rate-limiter tokens.
+            cache_hit:    Whether the response came from the response cache.
+            failed:       Whether the call raised or returned nothing.
+        """
+        with self._lock:
+            self.latencies.append(latency)
+            self.calls += 1
+            self.cache_hits += int(cache_hit)
+            self.attempts += attempts
+            self.retries += max(0, attempts - 1)
+            self.rate_limited += rate_limited
+            self.failed += int(failed)
+            self.retry_sleep_seconds += retry_sleep
+            self.limiter_wait_seconds += limiter_wait
+
+    def record_pagination(self, date: str, total_pages: int, pages_read: int,
+                          skipped_photos: int = 0) -> None:
+        """Record how far pagination of a date went.
+
+        Args:
+            date:           Date string in YYYY-MM-DD format.
+            total_pages:    Page count reported by Flickr.
+            pages_read:     Last page processed; later pages were skipped.
+            skipped_photos: Photos left out by a min_views cutoff.
+        """
+        with self._lock:
+            self.paginated_dates.add(date)
+            self.pages_total += total_pages
+            self.pages_read += pages_read
+            if pages_read < total_pages or skipped_photos:
+                self.skipped_tail[date] = {
+                    "skipped_pages": total_pages - pages_read,
+                    "skipped_photos": skipped_photos,
+                }
+
+    def record_incomplete(self, date: str, failed_pages=None) -> None:
+        """Record that some of a date's rows could not be fetched.
+
+        Such a date must not be fingerprinted or counted as loaded, so a later
+        run fetches it again.
+
+        Args:
+            date:         Date string in YYYY-MM-DD format.
+            failed_pages: Pages that failed after all retries, or None if the
+                          whole date failed.
+        """
+        with self._lock:
+            self.incomplete_dates[date] = (
+                sorted(failed_pages) if failed_pages is not None else "all"
+            )
+
+    def as_dict(self) -> dict:
+        """Return the counters plus p50/p95/max call latency in milliseconds."""
+        with self._lock:
+            latencies = sorted(self.latencies)
+            return {
+                "calls": self.calls,
+                "cache_hits": self.cache_hits,
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "failed": self.failed,
+                "retry_sleep_seconds": round(self.retry_sleep_seconds, 3),
+                "limiter_wait_seconds": round(self.limiter_wait_seconds, 3),
+                "pages_total": self.pages_total,
+                "pages_read": self.pages_read,
+                "skipped_pages": sum(
+                    tail["skipped_pages"] for tail in self.skipped_tail.values()),
+                "skipped_photos": sum(
+                    tail["skipped_photos"] for tail in self.skipped_tail.values()),
+                "skipped_tail": dict(self.skipped_tail),
+                "incomplete_dates": dict(self.incomplete_dates),
+                "page_latency_ms": {
+                    "p50": round(_percentile(latencies, 0.50) * 1000, 1),
+                    "p95": round(_percentile(latencies, 0.95) * 1000, 1),
+                    "max": round((latencies[-1] if latencies else 0.0) * 1000, 1),
+                },
+            }
+
+
+class RunMetrics:
+    """Timings, counters and BigQuery job statistics for one handler run."""
+
+    def __init__(self, clock=time.monotonic, **fields):
+        """
+        Args:
+            clock:    Monotonic clock function (overridable for tests).
+            **fields: Initial top-level fields of the record (dates, modes…).
+        """
+        self._clock = clock
+        self._started = clock()
+        # Runs on one instance overlap only with request concurrency > 1;
+        # then the peak also covers the other runs in flight.
+        self.peak_rss_scope = "run" if reset_peak_rss() else "process"
+        self.run_id = uuid.uuid4().hex[:12]
+        self.status = "error"  # Overwritten once the run finishes normally.
+        self.rows = 0
+        self.flickr = CallStats()
+        self.fields = dict(fields)
+        self.stages = {}
+        self.jobs = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block and add it to the ``stages`` breakdown."""
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.stages[name] = round(
+                self.stages.get(name, 0.0) + self._clock() - started, 3
+            )
+
+    def record(self, **fields) -> None:
+        """Add or overwrite top-level fields of the record."""
+        self.fields.update(fields)
+
+    def record_job(self, name: str, job) -> None:
+        """Record the cost statistics of a finished BigQuery query job.
+
+        Args:
+            name: Key for the job in the record (e.g. "merge").
+            job:  Finished google.cloud.bigquery QueryJob (or None).
+        """
+        if job is None:
+            return
+        self.jobs[name] = {
+            "job_id": getattr(job, "job_id", None),
+            "rows_affected": getattr(job, "num_dml_affected_rows", None),
+            "bytes_processed": getattr(job, "total_bytes_processed", None),
+            "bytes_billed": getattr(job, "total_bytes_billed", None),
+            "slot_ms": getattr(job, "slot_millis", None),
+        }
+
+    def as_dict(self) -> dict:
+        """Return the whole run as one JSON-serialisable dict."""
+        elapsed = self._clock() - self._started
+        return {
+            "run_id": self.run_id,
+            "status": self.status,
+            **self.fields,
+            "rows": self.rows,
+            "wall_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed else 0.0,
+            "stages": dict(self.stages),
+            "flickr": self.flickr.as_dict(),
+            "bigquery": dict(self.jobs),
+            "peak_rss_mib": peak_rss_mib(),
+            "peak_rss_scope": self.peak_rss_scope,
+        }
+
+
+def emit_structured_log(record: dict, severity: str = "INFO") -> None:
+    """Write a run record to stdout as one Cloud Logging structured entry.
+
+    Args:
+        record:   Output of RunMetrics.as_dict().
+        severity: Cloud Logging severity of the entry.
+    """
+    entry = {"severity": severity, "message": STRUCTURED_LOG_MESSAGE, **record}
+    print(json.dumps(entry, default=str), flush=True)